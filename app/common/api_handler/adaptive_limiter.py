@@ -0,0 +1,156 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import aiohttp
+from fastapi import HTTPException
+
+
+class AdaptiveLimiter:
+    """
+    Class for limiting concurrent requests to upstream with AIMD (additive increase, multiplicative decrease).
+    Limit grows by one per limit successful requests while latency stays close to baseline
+    and is decreased by factor on 5xx, 429 or timeouts not more than once per request latency.
+    """
+
+    def __init__(
+            self,
+            initial_limit: int = 10,
+            min_limit: int = 1,
+            max_limit: int = 100,
+            decrease_factor: float = 0.5,
+            latency_tolerance: float = 2.0,
+            smoothing: float = 0.1,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            initial_limit (int): Starting concurrency limit. Default to 10
+            min_limit (int): Minimal concurrency limit. Default to 1
+            max_limit (int): Maximal concurrency limit. Default to 100
+            decrease_factor (float): Limit multiplier on overload. Default to 0.5
+            latency_tolerance (float): Maximum ratio of current to baseline latency to increase limit. Default to 2.0
+            smoothing (float): Weight of new latency in current latency moving average,
+                baseline moving average uses tenth of it. Default to 0.1
+
+        Returns:
+            None
+        """
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.latency: float | None = None
+        self.baseline_latency: float | None = None
+        self.increases = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @staticmethod
+    def is_overload(error: BaseException) -> bool:
+        """
+        Function checks if request error means upstream overload
+
+        Args:
+            error (BaseException): Request error
+
+        Returns:
+            bool: True for timeouts, connection errors, 429 and 5xx responses
+        """
+
+        if isinstance(error, HTTPException):
+            return error.status_code == 429 or error.status_code >= 500
+        return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError))
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Function waits for free concurrency slot and adapts limit to request result
+
+        Returns:
+            AsyncIterator[None]: Context holding slot while request is executed
+        """
+
+        await self._acquire()
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            if self.is_overload(e):
+                self._on_overload()
+            raise
+        else:
+            self._on_success(time.monotonic() - start)
+        finally:
+            self._release()
+
+    async def _acquire(self) -> None:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._wake_up()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._wake_up()
+
+    def _wake_up(self) -> None:
+        free_slots = int(self.limit) - self.in_flight
+        while free_slots > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free_slots -= 1
+
+    def _on_success(self, latency: float) -> None:
+        if self.latency is None:
+            self.latency = self.baseline_latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+            self.baseline_latency += self.smoothing / 10 * (latency - self.baseline_latency)
+        if self.latency <= self.latency_tolerance * self.baseline_latency and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.increases += 1
+
+    def _on_overload(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < (self.latency or 0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self.decreases += 1
+
+    def stats(self) -> dict[str, float | int]:
+        """
+        Function returns current limit state
+
+        Returns:
+            dict[str, float | int]: Current limit, in flight and waiting requests, latencies and limit changes
+        """
+
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "latency_ms": round((self.latency or 0) * 1000, 1),
+            "baseline_latency_ms": round((self.baseline_latency or 0) * 1000, 1),
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
@@ -6,6 +6,12 @@ from loguru import logger
 
 from app.common.config import config
 from app.common.exceptions.http_exception_wrapper import http_exception
+from app.common.metrics import metrics_registry
+from .bulkhead import Bulkhead
+from .circuit_breaker import CircuitBreaker
+from .response_cache import CacheRule, ResponseCache
+from .retry_policy import IDEMPOTENT_METHODS, RetryBudget, RetryPolicy
+from .single_flight import SingleFlight
 
 
 class AsyncApiHandler:
@@ -13,22 +19,186 @@ class AsyncApiHandler:
     Class for handling async requests to apies
     """
 
+    handlers: list["AsyncApiHandler"] = []
+    bulkheads: dict[str, Bulkhead] = {}
+    circuit_breakers: dict[str, CircuitBreaker] = {}
+    retry_budgets: dict[str, RetryBudget] = {}
+
     def __init__(
             self,
             base_url: str,
+            pool_limit: int = 100,
+            keepalive_timeout: int = 30,
+            dns_cache_ttl: int = 300,
+            warmup_connections: int = 0,
+            name: str | None = None,
+            cache_rules: list[CacheRule] | None = None,
+            cache_size: int = 64 * 1024 * 1024,
+            bulkhead: Bulkhead | None = None,
+            retry_policies: dict[str, RetryPolicy] | None = None,
+            retry_budget: RetryBudget | None = None,
+            circuit_breaker: CircuitBreaker | None = None,
     ) -> None:
         """
         Initialisation function
 
         Args:
             base_url (str): Base api url
-            auth_header str: Bearer access token
+            pool_limit (int): Maximum number of simultaneous connections to upstream. Default to 100
+            keepalive_timeout (int): Seconds to keep idle connection open. Default to 30
+            dns_cache_ttl (int): Seconds to cache resolved upstream host. Default to 300
+            warmup_connections (int): Number of connections to open on session start. Default to 0
+            name (str | None): Upstream name for metrics. Default to base url
+            cache_rules (list[CacheRule] | None): Get routes to cache responses for. Default to None (no caching)
+            cache_size (int): Maximum size of cached responses bodies in bytes. Default to 64 MB
+            bulkhead (Bulkhead | None): Upstream rate and in flight limits, shared by handlers with the same
+                base url. Default to in flight limit equal to pool limit
+            retry_policies (dict[str, RetryPolicy] | None): Retry policies by HTTP method.
+                Default to 2 retries, not idempotent methods are retried only on connection failures and 429
+            retry_budget (RetryBudget | None): Retries budget shared by handlers with the same base url.
+                Default to 20% of requests
+            circuit_breaker (CircuitBreaker | None): Upstream circuit breaker shared by handlers with the same
+                base url. Default to opening for 30 seconds after 5 consecutive failures
 
         Returns:
             None
         """
 
         self.base_url = base_url
+        self.name = name or base_url
+        self.cache_rules = cache_rules or []
+        self.response_cache = ResponseCache(cache_size)
+        self._revalidating: dict[tuple, asyncio.Task] = {}
+        self.single_flight = SingleFlight()
+        if self.cache_rules:
+            metrics_registry.register(f"{self.name}_cache", self.response_cache.stats)
+        metrics_registry.register(f"{self.name}_single_flight", self.single_flight.stats)
+        if base_url not in AsyncApiHandler.bulkheads:
+            AsyncApiHandler.bulkheads[base_url] = bulkhead or Bulkhead(max_in_flight=pool_limit)
+            metrics_registry.register(f"{self.name}_bulkhead", AsyncApiHandler.bulkheads[base_url].stats)
+        self.bulkhead = AsyncApiHandler.bulkheads[base_url]
+        self.retry_policies = retry_policies or {}
+        if base_url not in AsyncApiHandler.circuit_breakers:
+            AsyncApiHandler.circuit_breakers[base_url] = circuit_breaker or CircuitBreaker()
+            AsyncApiHandler.retry_budgets[base_url] = retry_budget or RetryBudget()
+            metrics_registry.register(f"{self.name}_circuit_breaker", AsyncApiHandler.circuit_breakers[base_url].stats)
+            metrics_registry.register(f"{self.name}_retries", AsyncApiHandler.retry_budgets[base_url].stats)
+        self.circuit_breaker = AsyncApiHandler.circuit_breakers[base_url]
+        self.retry_budget = AsyncApiHandler.retry_budgets[base_url]
+        self.pool_limit = pool_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.warmup_connections = warmup_connections
+        self._session: aiohttp.ClientSession | None = None
+        self._session_loop: asyncio.AbstractEventLoop | None = None
+        AsyncApiHandler.handlers.append(self)
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        """
+        Function creates pooled session for upstream
+
+        Returns:
+            aiohttp.ClientSession: Session with upstream specific connector
+        """
+
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_limit,
+            limit_per_host=self.pool_limit,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        Function returns pooled session, creates it if session was not opened in app lifespan.
+        Session created in another event loop is closed before it is replaced.
+
+        Returns:
+            aiohttp.ClientSession: Pooled session
+        """
+
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            await self.close_session()
+            self._session = self._create_session()
+            self._session_loop = loop
+        return self._session
+
+    async def warm_up(self) -> None:
+        """
+        Function opens keep-alive connections to upstream in advance
+
+        Returns:
+            None
+        """
+
+        if not self.base_url or self.warmup_connections <= 0:
+            return
+        session = await self.get_session()
+
+        async def open_connection():
+            async with session.head(self.base_url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                await response.read()
+
+        results = await asyncio.gather(
+            *[open_connection() for _ in range(self.warmup_connections)],
+            return_exceptions=True
+        )
+        failed = [result for result in results if isinstance(result, Exception)]
+        if failed:
+            logger.warning(f"Couldn't warm up {len(failed)} connections to {self.base_url}: {failed[0]!r}")
+
+    async def open_session(self) -> None:
+        """
+        Function opens pooled session and warms up connections
+
+        Returns:
+            None
+        """
+
+        await self.get_session()
+        await self.warm_up()
+
+    async def close_session(self) -> None:
+        """
+        Function closes pooled session
+
+        Returns:
+            None
+        """
+
+        if self._session is not None and not self._session.closed:
+            try:
+                await self._session.close()
+            except RuntimeError as e:
+                logger.warning(f"Couldn't close session to {self.base_url} from finished event loop: {e!r}")
+        self._session = None
+        self._session_loop = None
+
+    @classmethod
+    async def open_sessions(cls) -> None:
+        """
+        Function opens pooled sessions for all created handlers
+
+        Returns:
+            None
+        """
+
+        await asyncio.gather(*[handler.open_session() for handler in cls.handlers])
+        logger.info(f"Opened pooled sessions for {len(cls.handlers)} upstreams")
+
+    @classmethod
+    async def close_sessions(cls) -> None:
+        """
+        Function closes pooled sessions for all created handlers
+
+        Returns:
+            None
+        """
+
+        await asyncio.gather(*[handler.close_session() for handler in cls.handlers])
+        logger.info(f"Closed pooled sessions for {len(cls.handlers)} upstreams")
 
     async def get(
             self,
@@ -37,7 +207,10 @@ class AsyncApiHandler:
             headers: dict = None,
     ) -> dict:
         """
-        Function extracts get query within extra url
+        Function extracts get query within extra url.
+        Responses for routes matching cache rules are returned from cache while fresh,
+        concurrent identical queries share one upstream request.
+        Cache and shared requests keep response body, so every caller gets its own decoded result.
 
         Args:
             extra_url (str): Endpoint url
@@ -48,29 +221,198 @@ class AsyncApiHandler:
             dict: Query result in dict format
         """
 
+        key = (
+            extra_url,
+            json.dumps(params, sort_keys=True, default=str),
+            json.dumps(headers, sort_keys=True, default=str),
+        )
+        rule = next((rule for rule in self.cache_rules if rule.match(extra_url)), None)
+        if rule is None:
+            body = await self.single_flight.do(key, lambda: self._get_body(extra_url, params, headers))
+            return json.loads(body)
+        body, state = self.response_cache.lookup(key, rule.ttl, rule.stale_ttl)
+        if state == "stale":
+            self._revalidate(key, extra_url, params, headers)
+        if state is None:
+            body = await self.single_flight.do(key, lambda: self._get_body(extra_url, params, headers))
+            self.response_cache.set(key, body, len(body))
+        return json.loads(body)
+
+    async def _get_body(
+            self,
+            extra_url: str,
+            params: dict = None,
+            headers: dict = None,
+    ) -> bytes:
+        """
+        Function extracts get query within extra url from upstream
+
+        Args:
+            extra_url (str): Endpoint url
+            params (dict): Query parameters
+            headers (dict): Headers for queries
+
+        Returns:
+            bytes: Successful response body
+        """
+
         endpoint_url = self.base_url + extra_url
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                url=endpoint_url,
-                params=params,
-                headers=headers,
-            ) as response:
-                if response.status == 200:
-                    return await response.json()
-                additional_info = await response.json()
-                e = http_exception(
-                    response.status,
-                    "Error during extracting query",
-                    _input={"url": endpoint_url, "params": params},
-                    _detail=additional_info
+        status, body = await self._request("GET", endpoint_url, params=params, headers=headers)
+        if status == 200:
+            return body
+        e = http_exception(
+            status,
+            "Error during extracting query",
+            _input={"url": endpoint_url, "params": params},
+            _detail=self._error_detail(body)
+        )
+        logger.exception(e)
+        raise e
+
+    async def _request(
+            self,
+            method: str,
+            endpoint_url: str,
+            session: aiohttp.ClientSession | None = None,
+            retry_policy: RetryPolicy | None = None,
+            **kwargs,
+    ) -> tuple[int, bytes]:
+        """
+        Function executes request to upstream within upstream bulkhead and reads response body.
+        Failed requests are retried with method retry policy while retry budget allows,
+        requests are rejected with 503 without waiting for upstream while circuit breaker is open.
+
+        Args:
+            method (str): HTTP method
+            endpoint_url (str): Full endpoint url
+            session (aiohttp.ClientSession | None): Session to execute request. Default to pooled session
+            retry_policy (RetryPolicy | None): Retry policy for this request. Default to method retry policy
+            **kwargs: aiohttp request arguments
+
+        Returns:
+            tuple[int, bytes]: Response status and body
+        """
+
+        if session is None:
+            session = await self.get_session()
+        policy = retry_policy or self.get_retry_policy(method)
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            if not self.circuit_breaker.allow():
+                raise http_exception(
+                    503,
+                    "Upstream is unavailable",
+                    _input={"url": endpoint_url, "params": kwargs.get("params")},
+                    _detail={"retry_after": round(self.circuit_breaker.retry_after(), 1)},
                 )
-                logger.exception(e)
-                raise e
+            try:
+                async with self.bulkhead.slot():
+                    async with session.request(method, endpoint_url, **kwargs) as response:
+                        status, body = response.status, await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+                    self.circuit_breaker.record_failure()
+                if (
+                        attempt >= policy.max_retries
+                        or not policy.should_retry_error(e)
+                        or not self.retry_budget.withdraw()
+                ):
+                    raise
+                logger.warning(f"Retrying {method} {endpoint_url} after {e!r}")
+            else:
+                if self.circuit_breaker.is_failure_status(status):
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()
+                if (
+                        attempt >= policy.max_retries
+                        or not policy.should_retry_status(status)
+                        or not self.retry_budget.withdraw()
+                ):
+                    return status, body
+                logger.warning(f"Retrying {method} {endpoint_url} after {status} response")
+            await asyncio.sleep(policy.delay(attempt))
+            attempt += 1
+
+    def get_retry_policy(self, method: str) -> RetryPolicy:
+        """
+        Function returns retry policy for HTTP method
+
+        Args:
+            method (str): HTTP method
+
+        Returns:
+            RetryPolicy: Method retry policy
+        """
+
+        policy = self.retry_policies.get(method)
+        if policy is None:
+            policy = RetryPolicy(idempotent=method in IDEMPOTENT_METHODS)
+            self.retry_policies[method] = policy
+        return policy
+
+    @staticmethod
+    def _error_detail(body: bytes) -> dict | list | str:
+        try:
+            return json.loads(body)
+        except ValueError:
+            return body.decode(errors="replace")
+
+    def _revalidate(
+            self,
+            key: tuple,
+            extra_url: str,
+            params: dict = None,
+            headers: dict = None,
+    ) -> None:
+        """
+        Function refreshes stale cached response in background
+
+        Args:
+            key (tuple): Cache key
+            extra_url (str): Endpoint url
+            params (dict): Query parameters
+            headers (dict): Headers for queries
+
+        Returns:
+            None
+        """
+
+        if key in self._revalidating:
+            return
+
+        async def refresh():
+            try:
+                body = await self._get_body(extra_url, params, headers)
+                self.response_cache.set(key, body, len(body))
+            except Exception as e:
+                logger.warning(f"Couldn't revalidate cached response for {self.base_url + extra_url}: {e!r}")
+            finally:
+                self._revalidating.pop(key, None)
+
+        self._revalidating[key] = asyncio.create_task(refresh())
+
+    def invalidate_cache(
+            self,
+            url_prefix: str | None = None,
+    ) -> int:
+        """
+        Function drops cached responses
+
+        Args:
+            url_prefix (str | None): Drop only responses for urls starting with prefix. Default to None (drop all)
+
+        Returns:
+            int: Number of dropped responses
+        """
+
+        return self.response_cache.invalidate(url_prefix)
 
     async def post(
             self,
             extra_url: str,
-            data: dict | list,
+            data: dict | list | bytes,
             params: dict = None,
             headers: dict = None,
     ) -> dict:
@@ -79,7 +421,7 @@ class AsyncApiHandler:
 
         Args:
             extra_url (str): Endpoint url
-            data (dict): Data to post | list
+            data (dict): Data to post | list | bytes with already encoded json
             params (dict): Query parameters. Default to None
             headers (dict): HTTP headers. Default to None
 
@@ -88,45 +430,49 @@ class AsyncApiHandler:
         """
 
         endpoint_url = self.base_url + extra_url
-        async with aiohttp.ClientSession() as session:
-
-            async with session.post(
-                url=endpoint_url,
-                headers=headers,
-                params=params,
-                json=data,
-                timeout=int(config.get("GENERAL_TIMEOUT"))
-            ) as response:
-                if response.status in (200, 201):
-                    # logger.info(
-                    #     f"Posted data with url: {response.url} and status: {response.status}"
-                    # )
-                    await asyncio.sleep(0.1)
-                    return await response.json()
-                logger.warning(
-                    f"""
-                    Couldn't extract post request with url: {endpoint_url}, status code {response.status}
-                    request_params: {params}
-                    data: {data}
-                    """
-                )
-                additional_info = await response.text()
-                e = http_exception(
-                    response.status,
-                    "Error during extracting query",
-                    _input={"url": endpoint_url, "params": params},
-                    _detail=additional_info
-                )
-                with open(f'{"_".join(extra_url.split("/"))}_{response.status}_error', "w", encoding="utf-8") as f:
-                    json.dump(
-                        {
-                            "error_info": additional_info,
-                            "body": data,
-                        },
-                        f
-                    )
-                logger.exception(e)
-                raise e
+        if isinstance(data, bytes):
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+            body_kwargs = {"data": data}
+        else:
+            body_kwargs = {"json": data}
+        status, body = await self._request(
+            "POST",
+            endpoint_url,
+            headers=headers,
+            params=params,
+            timeout=int(config.get("GENERAL_TIMEOUT")),
+            **body_kwargs,
+        )
+        if status in (200, 201):
+            # logger.info(
+            #     f"Posted data with url: {endpoint_url} and status: {status}"
+            # )
+            await asyncio.sleep(0.1)
+            return json.loads(body)
+        logger.warning(
+            f"""
+            Couldn't extract post request with url: {endpoint_url}, status code {status}
+            request_params: {params}
+            data: {data}
+            """
+        )
+        additional_info = body.decode(errors="replace")
+        e = http_exception(
+            status,
+            "Error during extracting query",
+            _input={"url": endpoint_url, "params": params},
+            _detail=additional_info
+        )
+        with open(f'{"_".join(extra_url.split("/"))}_{status}_error', "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "error_info": additional_info,
+                    "body": data.decode() if isinstance(data, bytes) else data,
+                },
+                f
+            )
+        logger.exception(e)
+        raise e
 
     async def put(
             self,
@@ -135,43 +481,45 @@ class AsyncApiHandler:
             session: aiohttp.ClientSession = None,
             params: dict = None,
             headers: dict = None,
+            retry_policy: RetryPolicy | None = None,
     ) -> dict:
         """
         Function extracts put query within extra url
 
         Args:
-            session (aiohttp.ClientSession): Session to extract requests
+            session (aiohttp.ClientSession): Session to extract requests. Default to pooled session
             extra_url (str): Endpoint url
             data (dict): Data to post | list
             params (dict): Query parameters. Default to None
             headers (dict): HTTP headers. Default to None
+            retry_policy (RetryPolicy | None): Retry policy for this request, callers retrying by themselves
+                pass policy without retries. Default to PUT retry policy
 
         Returns:
             dict: Query result in dict format | list
         """
 
-        if not session:
-            session = aiohttp.ClientSession()
         endpoint_url = self.base_url + extra_url
-        async with session as session:
-            async with session.put(
-                url=endpoint_url,
-                headers=headers,
-                params=params,
-                json=data,
-                timeout=int(config.get("GENERAL_TIMEOUT"))
-            ) as response:
-                if response.status in (200, 201):
-                    return await response.json()
-                additional_info = await response.text()
-                e = http_exception(
-                    response.status,
-                    "Error during extracting query",
-                    _input={"url": endpoint_url, "params": params},
-                    _detail=additional_info
-                )
-                logger.exception(e)
-                raise e
+        status, body = await self._request(
+            "PUT",
+            endpoint_url,
+            session=session,
+            retry_policy=retry_policy,
+            headers=headers,
+            params=params,
+            json=data,
+            timeout=int(config.get("GENERAL_TIMEOUT"))
+        )
+        if status in (200, 201):
+            return json.loads(body)
+        e = http_exception(
+            status,
+            "Error during extracting query",
+            _input={"url": endpoint_url, "params": params},
+            _detail=body.decode(errors="replace")
+        )
+        logger.exception(e)
+        raise e
 
     async def delete(
             self,
@@ -192,26 +540,20 @@ class AsyncApiHandler:
         """
 
         endpoint_url = self.base_url + extra_url
-        async with aiohttp.ClientSession() as session:
-            async with session.delete(
-                url=endpoint_url,
-                params=params,
-                headers=headers,
-            ) as response:
-                if response.status in (200, 201):
-                    logger.info(
-                        f"Delete data with url: {response.url} and status: {response.status}")
-                    return await response.json()
-
-                additional_info = await response.text()
-                e = http_exception(
-                    response.status,
-                    "Error during extracting query",
-                    _input={"url": endpoint_url, "params": params},
-                    _detail=additional_info
-                )
-                logger.exception(e)
-                raise e
+        status, body = await self._request("DELETE", endpoint_url, params=params, headers=headers)
+        if status in (200, 201):
+            logger.info(
+                f"Delete data with url: {endpoint_url} and status: {status}")
+            return json.loads(body)
+
+        e = http_exception(
+            status,
+            "Error during extracting query",
+            _input={"url": endpoint_url, "params": params},
+            _detail=body.decode(errors="replace")
+        )
+        logger.exception(e)
+        raise e
 
     # async def townsnet_post(
     #         self,
@@ -267,9 +609,75 @@ class AsyncApiHandler:
     #             )
 
 
-urban_api_handler = AsyncApiHandler(config.get("URBAN_API"))
-townsnet_api_handler = AsyncApiHandler(config.get("TOWNSNET_API"))
-transport_frame_api_handler = AsyncApiHandler(config.get("TRANSPORT_FRAME_API"))
-pop_frame_api_handler = AsyncApiHandler(config.get("POP_FRAME_API"))
-eco_frame_api_handler = AsyncApiHandler(config.get("ECOFRAME_API"))
-landuse_det_api_handler = AsyncApiHandler(config.get("LANDUSE_DET_API"))
+def init_pooled_handler(
+        url_key: str,
+        handler_class: type[AsyncApiHandler] = AsyncApiHandler,
+        cache_rules: list[CacheRule] | None = None,
+) -> AsyncApiHandler:
+    """
+    Function creates api handler with upstream pool and cache settings from env variables.
+    Settings keys are prefixed with upstream url key, e.g. URBAN_API_POOL_LIMIT.
+    Upstream bulkhead is set with RATE_LIMIT (requests per second), RATE_BURST and MAX_IN_FLIGHT keys,
+    retries with MAX_RETRIES (or {METHOD}_MAX_RETRIES), RETRY_BACKOFF, RETRY_MAX_BACKOFF and RETRY_BUDGET keys,
+    circuit breaker with BREAKER_FAILURES and BREAKER_RECOVERY_TIMEOUT keys.
+
+    Args:
+        url_key (str): Env variable name with upstream base url
+        handler_class (type[AsyncApiHandler]): Handler class to create. Default to AsyncApiHandler
+        cache_rules (list[CacheRule] | None): Get routes to cache responses for. Default to None
+
+    Returns:
+        AsyncApiHandler: Api handler with upstream specific connection pool
+    """
+
+    return handler_class(
+        config.get(url_key),
+        pool_limit=int(config.get(f"{url_key}_POOL_LIMIT", "100")),
+        keepalive_timeout=int(config.get(f"{url_key}_KEEPALIVE_TIMEOUT", "30")),
+        dns_cache_ttl=int(config.get(f"{url_key}_DNS_CACHE_TTL", "300")),
+        warmup_connections=int(config.get(f"{url_key}_WARMUP_CONNECTIONS", "0")),
+        name=url_key.lower(),
+        cache_rules=cache_rules,
+        cache_size=int(config.get(f"{url_key}_CACHE_SIZE_MB", "64")) * 1024 * 1024,
+        bulkhead=Bulkhead(
+            rate=float(config.get(f"{url_key}_RATE_LIMIT", "0")),
+            burst=int(config.get(f"{url_key}_RATE_BURST", "0")) or None,
+            max_in_flight=int(
+                config.get(f"{url_key}_MAX_IN_FLIGHT", config.get(f"{url_key}_POOL_LIMIT", "100"))
+            ),
+        ),
+        retry_policies={
+            method: RetryPolicy(
+                max_retries=int(
+                    config.get(f"{url_key}_{method}_MAX_RETRIES", config.get(f"{url_key}_MAX_RETRIES", "2"))
+                ),
+                backoff=float(config.get(f"{url_key}_RETRY_BACKOFF", "0.2")),
+                max_backoff=float(config.get(f"{url_key}_RETRY_MAX_BACKOFF", "5")),
+                idempotent=method in IDEMPOTENT_METHODS,
+            )
+            for method in ("GET", "POST", "PUT", "DELETE")
+        },
+        retry_budget=RetryBudget(ratio=float(config.get(f"{url_key}_RETRY_BUDGET", "0.2"))),
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=int(config.get(f"{url_key}_BREAKER_FAILURES", "5")),
+            recovery_timeout=float(config.get(f"{url_key}_BREAKER_RECOVERY_TIMEOUT", "30")),
+        ),
+    )
+
+
+urban_api_cache_ttl = float(config.get("URBAN_API_CACHE_TTL", "600"))
+urban_api_cache_stale_ttl = float(config.get("URBAN_API_CACHE_STALE_TTL", "3600"))
+urban_api_cache_rules = [
+    CacheRule(r"^/api/v1/all_territories_without_geometry$", urban_api_cache_ttl, urban_api_cache_stale_ttl),
+    CacheRule(r"^/api/v1/territory/\d+$", urban_api_cache_ttl, urban_api_cache_stale_ttl),
+    CacheRule(r"^/api/v1/indicators_by_parent$", urban_api_cache_ttl, urban_api_cache_stale_ttl),
+    CacheRule(r"^/api/v1/indicators/\d+$", urban_api_cache_ttl, urban_api_cache_stale_ttl),
+]
+
+
+urban_api_handler = init_pooled_handler("URBAN_API", cache_rules=urban_api_cache_rules)
+townsnet_api_handler = init_pooled_handler("TOWNSNET_API")
+transport_frame_api_handler = init_pooled_handler("TRANSPORT_FRAME_API")
+pop_frame_api_handler = init_pooled_handler("POP_FRAME_API")
+eco_frame_api_handler = init_pooled_handler("ECOFRAME_API")
+landuse_det_api_handler = init_pooled_handler("LANDUSE_DET_API")
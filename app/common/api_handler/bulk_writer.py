@@ -0,0 +1,170 @@
+import asyncio
+from contextlib import nullcontext
+from typing import Any, Awaitable, Callable, Iterable
+
+import aiohttp
+from fastapi import HTTPException
+from loguru import logger
+
+from app.common.metrics import metrics_registry
+from .adaptive_limiter import AdaptiveLimiter
+
+
+class BulkWriter:
+    """
+    Class for writing stream of requests with constant number of requests in flight.
+    Items are read lazily into bounded queue, so producer waits while workers are busy.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            concurrency: int = 40,
+            queue_size: int | None = None,
+            max_retries: int = 3,
+            backoff: float = 0.5,
+            max_backoff: float = 10,
+            limiter: AdaptiveLimiter | None = None,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            name (str): Writer name for metrics
+            concurrency (int): Number of requests in flight. Default to 40
+            queue_size (int | None): Maximum number of items waiting for worker. Default to 2 * concurrency
+            max_retries (int): Number of retries for failed item. Default to 3
+            backoff (float): Seconds before first retry, doubled for every next retry. Default to 0.5
+            max_backoff (float): Maximum seconds between retries. Default to 10
+            limiter (AdaptiveLimiter | None): Limiter for requests in flight below concurrency. Default to None
+
+        Returns:
+            None
+        """
+
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size or 2 * concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limiter = limiter
+        self.queued = 0
+        self.in_flight = 0
+        self.written = 0
+        self.retries = 0
+        self.failed = 0
+        metrics_registry.register(f"{name}_bulk_writer", self.stats)
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """
+        Function checks if request can be repeated after error
+
+        Args:
+            error (Exception): Request error
+
+        Returns:
+            bool: True for connection errors, timeouts, 429 and 5xx responses
+        """
+
+        if isinstance(error, HTTPException):
+            return error.status_code == 429 or error.status_code >= 500
+        return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    async def write(
+            self,
+            func: Callable[..., Awaitable[Any]],
+            items: Iterable[dict],
+            **kwargs,
+    ) -> int:
+        """
+        Function executes func for every item keeping concurrency requests in flight
+
+        Args:
+            func (Callable[..., Awaitable[Any]]): Request function
+            items (Iterable[dict]): Request functions kwargs, can be lazy
+            **kwargs: Kwargs shared by all requests
+
+        Returns:
+            int: Number of written items
+
+        Raises:
+            Exception: Last error if some items were not written after retries
+        """
+
+        queue = asyncio.Queue(self.queue_size)
+        errors = []
+        written = 0
+
+        async def worker():
+            nonlocal written
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                self.queued -= 1
+                if await self._write_item(func, item, kwargs, errors):
+                    written += 1
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            for item in items:
+                await queue.put(item)
+                self.queued += 1
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for worker_task in workers:
+                worker_task.cancel()
+            while not queue.empty():
+                if queue.get_nowait() is not None:
+                    self.queued -= 1
+        if errors:
+            logger.error(f"{self.name}: {len(errors)} items were not written, {written} written")
+            raise errors[-1]
+        return written
+
+    async def _write_item(
+            self,
+            func: Callable[..., Awaitable[Any]],
+            item: dict,
+            kwargs: dict,
+            errors: list[Exception],
+    ) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.limiter.slot() if self.limiter else nullcontext():
+                    self.in_flight += 1
+                    try:
+                        await func(**kwargs, **item)
+                    finally:
+                        self.in_flight -= 1
+                self.written += 1
+                return True
+            except Exception as e:
+                if attempt == self.max_retries or not self.is_retryable(e):
+                    self.failed += 1
+                    errors.append(e)
+                    return False
+                self.retries += 1
+            await asyncio.sleep(min(self.max_backoff, self.backoff * 2 ** attempt))
+        return False
+
+    def stats(self) -> dict[str, int]:
+        """
+        Function returns writing progress counters
+
+        Returns:
+            dict[str, int]: Writing progress counters
+        """
+
+        return {
+            "concurrency": self.concurrency,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "written": self.written,
+            "retries": self.retries,
+            "failed": self.failed,
+        }
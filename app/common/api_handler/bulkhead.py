@@ -0,0 +1,120 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+class Bulkhead:
+    """
+    Class for isolating upstream load with token bucket rate limit and maximum number of requests in flight
+    """
+
+    def __init__(
+            self,
+            rate: float = 0,
+            burst: int | None = None,
+            max_in_flight: int = 0,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            rate (float): Requests per second allowed to start. Default to 0 (no rate limit)
+            burst (int | None): Token bucket size. Default to one second of rate
+            max_in_flight (int): Maximum number of requests in flight. Default to 0 (no limit)
+
+        Returns:
+            None
+        """
+
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.max_in_flight = max_in_flight
+        self.tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._waiters: deque[asyncio.Future] = deque()
+        self.in_flight = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Function waits for rate token and free in flight slot
+
+        Returns:
+            AsyncIterator[None]: Context holding slot while request is executed
+        """
+
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._take_token()
+            await self._acquire()
+        finally:
+            self.waiting -= 1
+        wait_time = time.monotonic() - start
+        self.acquired += 1
+        self.wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _take_token(self) -> None:
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+    async def _acquire(self) -> None:
+        while 0 < self.max_in_flight <= self.in_flight:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._wake_up()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._wake_up()
+
+    def _wake_up(self) -> None:
+        while self._waiters and (self.max_in_flight <= 0 or self.in_flight < self.max_in_flight):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def stats(self) -> dict[str, float | int]:
+        """
+        Function returns bulkhead load and queue wait counters
+
+        Returns:
+            dict[str, float | int]: Limits, in flight and waiting requests and queue wait times
+        """
+
+        return {
+            "rate": self.rate,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "avg_wait_ms": round(self.wait_time / self.acquired * 1000, 1) if self.acquired else 0,
+            "max_wait_ms": round(self.max_wait_time * 1000, 1),
+        }
@@ -0,0 +1,96 @@
+import time
+from typing import Literal
+
+
+class CircuitBreaker:
+    """
+    Class for failing fast while upstream is unavailable.
+    Breaker opens after consecutive failures, lets one trial request through every recovery timeout
+    and closes on its success. Only gateway errors, timeouts and connection errors are failures,
+    application errors of single requests don't open breaker shared by all upstream handlers.
+    """
+
+    def __init__(
+            self,
+            failure_threshold: int = 5,
+            recovery_timeout: float = 30,
+            failure_statuses: tuple[int, ...] = (502, 503, 504),
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            failure_threshold (int): Number of consecutive failures to open breaker. Default to 5
+            recovery_timeout (float): Seconds before trial request to open upstream. Default to 30
+            failure_statuses (tuple[int, ...]): Response statuses counted as failures. Default to 502, 503, 504
+
+        Returns:
+            None
+        """
+
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failure_statuses = failure_statuses
+        self.state: Literal["closed", "open", "half_open"] = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """
+        Function checks if request to upstream can be executed
+
+        Returns:
+            bool: False while breaker is open or trial request is in flight
+        """
+
+        if self.state == "closed":
+            return True
+        now = time.monotonic()
+        if now - self.opened_at >= self.recovery_timeout:
+            self.state = "half_open"
+            self.opened_at = now
+            return True
+        self.rejected += 1
+        return False
+
+    def is_failure_status(self, status: int) -> bool:
+        return status in self.failure_statuses
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def retry_after(self) -> float:
+        """
+        Function returns seconds left before trial request
+
+        Returns:
+            float: Seconds before breaker lets trial request through
+        """
+
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+
+    def stats(self) -> dict[str, str | int]:
+        """
+        Function returns breaker state and counters
+
+        Returns:
+            dict[str, str | int]: State, consecutive failures, times opened and rejected requests
+        """
+
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,188 @@
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Literal
+
+
+class CacheRule:
+    """
+    Class describes caching settings for api route
+    """
+
+    def __init__(
+            self,
+            pattern: str,
+            ttl: float,
+            stale_ttl: float = 0,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            pattern (str): Regular expression for extra url to cache
+            ttl (float): Seconds while cached response is fresh
+            stale_ttl (float): Seconds after ttl while stale response is returned and revalidated. Default to 0
+
+        Returns:
+            None
+        """
+
+        self.pattern = re.compile(pattern)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    def match(self, extra_url: str) -> bool:
+        return bool(self.pattern.search(extra_url))
+
+
+class CacheEntry:
+    """
+    Class for cached value with its size and creation time
+    """
+
+    __slots__ = ("value", "size", "created_at")
+
+    def __init__(self, value: Any, size: int) -> None:
+        self.value = value
+        self.size = size
+        self.created_at = time.monotonic()
+
+
+class ResponseCache:
+    """
+    Class for memory bounded LRU cache with ttl and stale-while-revalidate support.
+    Cached values are shared between callers and must not be modified.
+    """
+
+    def __init__(
+            self,
+            max_size: int,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            max_size (int): Maximum summary size of cached values in bytes
+
+        Returns:
+            None
+        """
+
+        self.max_size = max_size
+        self.size = 0
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(
+            self,
+            key: Hashable,
+            ttl: float,
+            stale_ttl: float = 0,
+    ) -> tuple[Any, Literal["fresh", "stale"] | None]:
+        """
+        Function searches value in cache
+
+        Args:
+            key (Hashable): Cache key
+            ttl (float): Seconds while value is fresh
+            stale_ttl (float): Seconds after ttl while value can be returned as stale. Default to 0
+
+        Returns:
+            tuple[Any, Literal["fresh", "stale"] | None]: Cached value and its state, (None, None) on miss
+        """
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, None
+        age = time.monotonic() - entry.created_at
+        if age <= ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value, "fresh"
+        if age <= ttl + stale_ttl:
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return entry.value, "stale"
+        self._remove(key)
+        self.misses += 1
+        return None, None
+
+    def set(
+            self,
+            key: Hashable,
+            value: Any,
+            size: int,
+    ) -> None:
+        """
+        Function puts value to cache and evicts least recently used values above size limit
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to cache
+            size (int): Value size in bytes
+
+        Returns:
+            None
+        """
+
+        if size > self.max_size:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = CacheEntry(value, size)
+        self.size += size
+        while self.size > self.max_size:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def invalidate(
+            self,
+            prefix: str | None = None,
+    ) -> int:
+        """
+        Function drops cached values
+
+        Args:
+            prefix (str | None): Drop only keys which first element starts with prefix. Default to None (drop all)
+
+        Returns:
+            int: Number of dropped values
+        """
+
+        if prefix is None:
+            keys = list(self._entries.keys())
+        else:
+            keys = [
+                key for key in self._entries.keys()
+                if str(key[0] if isinstance(key, tuple) else key).startswith(prefix)
+            ]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Function returns cache counters
+
+        Returns:
+            dict[str, int]: Cache counters
+        """
+
+        return {
+            "entries": len(self._entries),
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self.size -= entry.size
@@ -0,0 +1,119 @@
+import asyncio
+import random
+
+import aiohttp
+
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+class RetryPolicy:
+    """
+    Class describes retries of failed upstream requests with capped exponential backoff and full jitter.
+    Requests with not idempotent methods are retried only if upstream surely didn't process them.
+    """
+
+    def __init__(
+            self,
+            max_retries: int = 2,
+            backoff: float = 0.2,
+            max_backoff: float = 5,
+            retry_statuses: tuple[int, ...] = (429, 502, 503, 504),
+            idempotent: bool = True,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            max_retries (int): Maximum number of retries. Default to 2
+            backoff (float): Maximum seconds before first retry, doubled for every next retry. Default to 0.2
+            max_backoff (float): Maximum seconds between retries. Default to 5
+            retry_statuses (tuple[int, ...]): Response statuses to retry. Default to 429, 502, 503, 504
+            idempotent (bool): If False only connection failures and 429 responses are retried. Default to True
+
+        Returns:
+            None
+        """
+
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+        self.idempotent = idempotent
+
+    def should_retry_status(self, status: int) -> bool:
+        if not self.idempotent:
+            return status == 429
+        return status in self.retry_statuses
+
+    def should_retry_error(self, error: Exception) -> bool:
+        if not self.idempotent:
+            return isinstance(error, aiohttp.ClientConnectorError)
+        return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+    def delay(self, attempt: int) -> float:
+        """
+        Function calculates seconds to wait before retry
+
+        Args:
+            attempt (int): Number of failed attempt starting from 0
+
+        Returns:
+            float: Random delay between 0 and capped exponential backoff
+        """
+
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class RetryBudget:
+    """
+    Class limits retries to share of requests, so retries don't multiply load on failing upstream
+    """
+
+    def __init__(
+            self,
+            ratio: float = 0.2,
+            min_tokens: float = 10,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            ratio (float): Retries allowed per request. Default to 0.2
+            min_tokens (float): Retries allowed without requests and maximum saved retries above ratio.
+                Default to 10
+
+        Returns:
+            None
+        """
+
+        self.ratio = ratio
+        self.min_tokens = min_tokens
+        self.tokens = float(min_tokens)
+        self.retries = 0
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        self.tokens = min(self.min_tokens + self.ratio * 100, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1
+        self.retries += 1
+        return True
+
+    def stats(self) -> dict[str, float | int]:
+        """
+        Function returns retries counters
+
+        Returns:
+            dict[str, float | int]: Retries made, budget left and retries rejected by budget
+        """
+
+        return {
+            "retries": self.retries,
+            "budget": round(self.tokens, 1),
+            "exhausted": self.exhausted,
+        }
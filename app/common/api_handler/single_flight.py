@@ -0,0 +1,74 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Class for coalescing concurrent identical calls into one execution.
+    All callers with the same key get the result of the same call, so results must not be modified.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialisation function
+
+        Returns:
+            None
+        """
+
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(
+            self,
+            key: Hashable,
+            func: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Function executes func or joins execution already in flight for the same key
+
+        Args:
+            key (Hashable): Call key
+            func (Callable[[], Awaitable[Any]]): Function creating awaitable to execute
+
+        Returns:
+            Any: func result
+        """
+
+        self.calls += 1
+        task = self._calls.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            self.executions += 1
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done_task: self._forget(key, done_task))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(
+            self,
+            key: Hashable,
+            task: asyncio.Task,
+    ) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Function returns coalescing counters
+
+        Returns:
+            dict[str, int]: Coalescing counters
+        """
+
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
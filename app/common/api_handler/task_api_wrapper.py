@@ -1,8 +1,8 @@
 import asyncio
 
-import aiohttp
-
-from tqdm.asyncio import tqdm_asyncio
+from app.common.config import config
+from app.common.metrics import metrics_registry
+from .adaptive_limiter import AdaptiveLimiter
 
 
 class TasksApiHandler:
@@ -10,11 +10,28 @@ class TasksApiHandler:
     Class for wrapping api requests to threads.
     """
 
+    def __init__(
+            self,
+            write_limiter: AdaptiveLimiter,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            write_limiter (AdaptiveLimiter): Concurrency limiter shared by all urban_api bulk writes
+
+        Returns:
+            None
+        """
+
+        self.write_limiter = write_limiter
+        metrics_registry.register("urban_api_writes_limiter", self.write_limiter.stats)
+
     @staticmethod
     async def extract_requests_to_several_urls(
             api_queries: list,
             territory_id: int,
-            geojson_data: dict
+            geojson_data: dict | bytes
     ) -> list:
         """
         Function executes api map in threads
@@ -22,7 +39,7 @@ class TasksApiHandler:
         Args:
             api_queries: list of api queries functions
             territory_id: territory id
-            geojson_data: geojson data
+            geojson_data: geojson data, can be already encoded
 
         Returns:
             list of api queries functions results
@@ -32,38 +49,13 @@ class TasksApiHandler:
         result = await asyncio.gather(*tasks)
         return result
 
-    @staticmethod
-    async def extract_requests_to_one_url(
-            func,
-            data: list[dict],
-            headers: dict,
-            max_concurrent_requests: int = 4
-    ) -> list:
-        """
-        Function executes few api queries to one endpoint
-
-        Args:
-            func: function to execute
-            data (list[dict]): data for api request
-            headers: headers for api request
-            max_concurrent_requests (int): maximum number of concurrent requests
-
-        Returns:
-            list of api queries results
-        """
-
-        semaphore = asyncio.Semaphore(max_concurrent_requests)
-
-        async def bound_func(data_obj):
-            async with semaphore:
-                async with aiohttp.ClientSession() as session:
-                    return await func(session=session, headers=headers, **data_obj)
-
-        tasks_list = [bound_func(data_obj) for data_obj in data]
-        result = await tqdm_asyncio.gather(*tasks_list)
-        return result
-
-
-
 
-tasks_api_handler = TasksApiHandler()
+tasks_api_handler = TasksApiHandler(
+    AdaptiveLimiter(
+        initial_limit=int(config.get("MAX_API_ASYNC_EXTRACTIONS", 40)),
+        min_limit=int(config.get("MIN_API_ASYNC_EXTRACTIONS", 1)),
+        max_limit=int(
+            config.get("MAX_API_ASYNC_EXTRACTIONS_LIMIT", 4 * int(config.get("MAX_API_ASYNC_EXTRACTIONS", 40)))
+        ),
+    )
+)
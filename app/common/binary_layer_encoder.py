@@ -0,0 +1,104 @@
+import io
+from typing import Literal
+
+import geopandas as gpd
+
+
+BinaryLayerFormat = Literal["parquet", "arrow", "fgb"]
+
+
+class BinaryLayerEncoder:
+    """
+    Class for encoding layers to columnar binary formats with WKB geometry.
+    pyarrow is imported only when GeoParquet or Arrow IPC output is requested.
+    """
+
+    media_types: dict[BinaryLayerFormat, str] = {
+        "parquet": "application/vnd.apache.parquet",
+        "arrow": "application/vnd.apache.arrow.stream",
+        "fgb": "application/flatgeobuf",
+    }
+
+    @staticmethod
+    def to_parquet(layer: gpd.GeoDataFrame) -> bytes:
+        """
+        Function encodes layer to GeoParquet
+
+        Args:
+            layer (gpd.GeoDataFrame): Layer to encode
+
+        Returns:
+            bytes: GeoParquet file with WKB geometry
+        """
+
+        buffer = io.BytesIO()
+        layer.to_parquet(buffer, geometry_encoding="WKB")
+        return buffer.getvalue()
+
+    @staticmethod
+    def to_arrow(layer: gpd.GeoDataFrame) -> bytes:
+        """
+        Function encodes layer to Arrow IPC stream
+
+        Args:
+            layer (gpd.GeoDataFrame): Layer to encode
+
+        Returns:
+            bytes: Arrow IPC stream with geoarrow.wkb geometry column
+        """
+
+        import pyarrow as pa
+
+        table = pa.table(layer.to_arrow(geometry_encoding="WKB"))
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    @staticmethod
+    def to_flatgeobuf(layer: gpd.GeoDataFrame) -> bytes:
+        """
+        Function encodes layer to FlatGeobuf
+
+        Args:
+            layer (gpd.GeoDataFrame): Layer to encode
+
+        Returns:
+            bytes: FlatGeobuf file with spatial index
+        """
+
+        buffer = io.BytesIO()
+        layer.to_file(buffer, driver="FlatGeobuf", engine="pyogrio")
+        return buffer.getvalue()
+
+    def encode(
+            self,
+            layer: gpd.GeoDataFrame,
+            layer_format: BinaryLayerFormat,
+            to_wgs84: bool = False,
+    ) -> bytes:
+        """
+        Function encodes layer to binary format
+
+        Args:
+            layer (gpd.GeoDataFrame): Layer to encode
+            layer_format (BinaryLayerFormat): One of "parquet", "arrow" or "fgb"
+            to_wgs84 (bool): If True reprojects layer to 4326 crs. Default to False
+
+        Returns:
+            bytes: Encoded layer
+        """
+
+        if to_wgs84 and layer.crs is not None and not layer.crs.equals(4326):
+            layer = layer.to_crs(4326)
+        match layer_format:
+            case "parquet":
+                return self.to_parquet(layer)
+            case "arrow":
+                return self.to_arrow(layer)
+            case "fgb":
+                return self.to_flatgeobuf(layer)
+        raise ValueError(f"Unknown layer format {layer_format}")
+
+
+binary_layer_encoder = BinaryLayerEncoder()
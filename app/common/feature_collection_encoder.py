@@ -0,0 +1,93 @@
+import json
+from typing import Iterator
+
+import geopandas as gpd
+import shapely
+
+
+class FeatureCollectionEncoder:
+    """
+    Class for encoding layers to GeoJSON FeatureCollection bytes.
+    Geometries are encoded with GEOS by chunks of features instead of per feature geo interface,
+    output is equal to GeoDataFrame.to_json with default parameters for layers without dates and times.
+    Dates, times and timedeltas are encoded as ISO 8601 strings, other values not supported by json as strings.
+    """
+
+    def __init__(
+            self,
+            chunk_size: int = 10000,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            chunk_size (int): Number of features encoded at once. Default to 10000
+
+        Returns:
+            None
+        """
+
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def _encode_value(value: object) -> str:
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        return str(value)
+
+    def iter_chunks(
+            self,
+            layer: gpd.GeoDataFrame,
+            to_wgs84: bool = False,
+    ) -> Iterator[bytes]:
+        """
+        Function lazily encodes layer to FeatureCollection
+
+        Args:
+            layer (gpd.GeoDataFrame): Layer to encode
+            to_wgs84 (bool): If True reprojects layer to 4326 crs. Default to False
+
+        Returns:
+            Iterator[bytes]: FeatureCollection parts, which concatenation is valid json
+        """
+
+        if to_wgs84 and layer.crs is not None and not layer.crs.equals(4326):
+            layer = layer.to_crs(4326)
+        geometry_column = layer.geometry.name
+        yield b'{"type": "FeatureCollection", "features": ['
+        for start in range(0, len(layer), self.chunk_size):
+            chunk = layer.iloc[start:start + self.chunk_size]
+            geometries = shapely.to_geojson(chunk.geometry.values)
+            attributes = chunk.drop(columns=geometry_column)
+            attributes = attributes.astype(object).where(attributes.notna(), None)
+            properties = [
+                json.dumps(record, ensure_ascii=False, default=self._encode_value) for record in attributes.to_dict(orient="records")
+            ]
+            features = ", ".join(
+                f'{{"id": {json.dumps(str(index))}, "type": "Feature", "properties": {feature_properties}, '
+                f'"geometry": {"null" if geometry is None else geometry}}}'
+                for index, feature_properties, geometry in zip(chunk.index, properties, geometries)
+            )
+            yield (", " if start else "").encode() + features.encode()
+        yield b"]}"
+
+    def encode(
+            self,
+            layer: gpd.GeoDataFrame,
+            to_wgs84: bool = False,
+    ) -> bytes:
+        """
+        Function encodes layer to FeatureCollection
+
+        Args:
+            layer (gpd.GeoDataFrame): Layer to encode
+            to_wgs84 (bool): If True reprojects layer to 4326 crs. Default to False
+
+        Returns:
+            bytes: Encoded FeatureCollection
+        """
+
+        return b"".join(self.iter_chunks(layer, to_wgs84))
+
+
+feature_collection_encoder = FeatureCollectionEncoder()
@@ -0,0 +1,127 @@
+import geopandas as gpd
+import h3
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+
+class H3Indexer:
+    """
+    Class for matching hexagonal layers and geometries with H3 cells
+    """
+
+    def __init__(
+            self,
+            sample_size: int = 50,
+            min_overlap: float = 0.9,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            sample_size (int): Number of hexagons to check layer matches H3 grid. Default to 50
+            min_overlap (float): Minimal intersection over union of hexagon and its cell. Default to 0.9
+
+        Returns:
+            None
+        """
+
+        self.sample_size = sample_size
+        self.min_overlap = min_overlap
+
+    def _overlap(self, hexagon: shapely.Geometry, cell: str) -> float:
+        cell_polygon = shape(h3.cells_to_geo([cell]))
+        union_area = hexagon.union(cell_polygon).area
+        if union_area == 0:
+            return 0
+        return hexagon.intersection(cell_polygon).area / union_area
+
+    def detect_resolution(
+            self,
+            hexagon: shapely.Geometry,
+    ) -> int | None:
+        """
+        Function detects H3 resolution of hexagon
+
+        Args:
+            hexagon (shapely.Geometry): Hexagon in 4326 crs
+
+        Returns:
+            int | None: H3 resolution or None if hexagon is not H3 cell
+        """
+
+        center = hexagon.centroid
+        for resolution in range(16):
+            cell = h3.latlng_to_cell(center.y, center.x, resolution)
+            if self._overlap(hexagon, cell) >= self.min_overlap:
+                return resolution
+        return None
+
+    @staticmethod
+    def points_to_cells(
+            geometries: gpd.GeoSeries,
+            resolution: int,
+    ) -> np.ndarray:
+        """
+        Function finds H3 cells containing geometries representative points
+
+        Args:
+            geometries (gpd.GeoSeries): Geometries with crs
+            resolution (int): H3 resolution
+
+        Returns:
+            np.ndarray: H3 cells indexes in geometries order
+        """
+
+        points = geometries.representative_point().to_crs(4326)
+        return np.array(
+            [h3.latlng_to_cell(y, x, resolution) for x, y in zip(points.x, points.y)],
+            dtype=object,
+        )
+
+    def cells_from_hexagons(
+            self,
+            hexagons: gpd.GeoDataFrame,
+    ) -> np.ndarray | None:
+        """
+        Function restores H3 cells indexes for hexagonal layer
+
+        Args:
+            hexagons (gpd.GeoDataFrame): Hexagons layer with crs
+
+        Returns:
+            np.ndarray | None: H3 cells indexes in hexagons order or None if layer is not H3 grid
+        """
+
+        if hexagons.empty:
+            return None
+        sample = hexagons.geometry.iloc[:self.sample_size].to_crs(4326)
+        resolution = self.detect_resolution(sample.iloc[0])
+        if resolution is None:
+            return None
+        cells = self.points_to_cells(hexagons.geometry, resolution)
+        for hexagon, cell in zip(sample, cells[:self.sample_size]):
+            if self._overlap(hexagon, cell) < self.min_overlap:
+                return None
+        return cells
+
+    def layer_cells(
+            self,
+            hexagons: gpd.GeoDataFrame,
+    ) -> np.ndarray | None:
+        """
+        Function returns H3 cells indexes from "h3_index" column or restores them from geometry
+
+        Args:
+            hexagons (gpd.GeoDataFrame): Hexagons layer with crs
+
+        Returns:
+            np.ndarray | None: H3 cells indexes in hexagons order or None if layer is not H3 grid
+        """
+
+        if "h3_index" in hexagons.columns and hexagons["h3_index"].notna().all():
+            return hexagons["h3_index"].to_numpy()
+        return self.cells_from_hexagons(hexagons)
+
+
+h3_indexer = H3Indexer()
@@ -0,0 +1,48 @@
+from typing import Callable
+
+
+class MetricsRegistry:
+    """
+    Class for collecting runtime counters from app components
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialisation function
+
+        Returns:
+            None
+        """
+
+        self._sources: dict[str, Callable[[], dict]] = {}
+
+    def register(
+            self,
+            name: str,
+            source: Callable[[], dict],
+    ) -> None:
+        """
+        Function registers metrics source
+
+        Args:
+            name (str): Metrics group name
+            source (Callable[[], dict]): Function returning current metrics values
+
+        Returns:
+            None
+        """
+
+        self._sources[name] = source
+
+    def collect(self) -> dict[str, dict]:
+        """
+        Function collects current values from all registered sources
+
+        Returns:
+            dict[str, dict]: Metrics values by group name
+        """
+
+        return {name: source() for name, source in self._sources.items()}
+
+
+metrics_registry = MetricsRegistry()
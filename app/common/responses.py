@@ -0,0 +1,119 @@
+import asyncio
+from typing import Annotated, Literal
+
+import geopandas as gpd
+from fastapi import Header, Query
+from fastapi.responses import Response, StreamingResponse
+
+from .binary_layer_encoder import binary_layer_encoder
+from .feature_collection_encoder import feature_collection_encoder
+
+
+LayerFormat = Literal["geojson", "parquet", "arrow", "fgb"]
+
+layer_formats_by_media_type: dict[str, LayerFormat] = {
+    "application/json": "geojson",
+    "application/geo+json": "geojson",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/flatgeobuf": "fgb",
+}
+
+
+class GeoJSONResponse(StreamingResponse):
+    """
+    Class for streaming layer as GeoJSON FeatureCollection.
+    Features are encoded by chunks in threadpool while previous chunks are sent, without building dict of layer.
+    """
+
+    def __init__(
+            self,
+            layer: gpd.GeoDataFrame,
+            to_wgs84: bool = False,
+            status_code: int = 200,
+            headers: dict[str, str] | None = None,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            layer (gpd.GeoDataFrame): Layer to send
+            to_wgs84 (bool): If True reprojects layer to 4326 crs. Default to False
+            status_code (int): Response status code. Default to 200
+            headers (dict[str, str] | None): Response headers. Default to None
+
+        Returns:
+            None
+        """
+
+        super().__init__(
+            feature_collection_encoder.iter_chunks(layer, to_wgs84),
+            status_code=status_code,
+            headers=headers,
+            media_type="application/json",
+        )
+
+
+def get_layer_format(
+        layer_format: Annotated[
+            LayerFormat | None,
+            Query(alias="format", description="Output format, overrides Accept header"),
+        ] = None,
+        accept: Annotated[str | None, Header()] = None,
+) -> LayerFormat:
+    """
+    Function chooses layer output format from format query parameter or Accept header
+
+    Args:
+        layer_format (LayerFormat | None): Format from query parameter
+        accept (str | None): Accept header value
+
+    Returns:
+        LayerFormat: Requested format, geojson if no supported format is requested
+    """
+
+    if layer_format:
+        return layer_format
+    if not accept:
+        return "geojson"
+    media_types = []
+    for position, media_range in enumerate(accept.split(",")):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0 and media_type.lower() in layer_formats_by_media_type:
+            media_types.append((-quality, position, media_type.lower()))
+    if not media_types:
+        return "geojson"
+    return layer_formats_by_media_type[min(media_types)[2]]
+
+
+async def layer_response(
+        layer: gpd.GeoDataFrame,
+        layer_format: LayerFormat = "geojson",
+        to_wgs84: bool = False,
+) -> Response:
+    """
+    Function builds response with layer in requested format
+
+    Args:
+        layer (gpd.GeoDataFrame): Layer to send
+        layer_format (LayerFormat): Output format. Default to "geojson"
+        to_wgs84 (bool): If True reprojects layer to 4326 crs. Default to False
+
+    Returns:
+        Response: Streamed GeoJSON or binary layer encoded in threadpool
+    """
+
+    headers = {"Vary": "Accept"}
+    if layer_format == "geojson":
+        return GeoJSONResponse(layer, to_wgs84=to_wgs84, headers=headers)
+    content = await asyncio.to_thread(binary_layer_encoder.encode, layer, layer_format, to_wgs84)
+    return Response(content, media_type=binary_layer_encoder.media_types[layer_format], headers=headers)
@@ -0,0 +1,317 @@
+import asyncio
+import hashlib
+import math
+from typing import Awaitable, Callable
+
+import geopandas as gpd
+import mapbox_vector_tile
+import numpy as np
+import pandas as pd
+import shapely
+
+from app.common.api_handler.response_cache import ResponseCache
+from app.common.api_handler.single_flight import SingleFlight
+from app.common.config import config
+from app.common.exceptions.http_exception_wrapper import http_exception
+from app.common.metrics import metrics_registry
+
+
+WEB_MERCATOR_BOUND = 20037508.342789244
+
+
+class TileSource:
+    """
+    Class for layer prepared to cut tiles: geometries in 3857 crs with spatial index and features properties.
+    Version is hash of layer content, so tiles of unchanged layer stay cached after source is reloaded.
+    """
+
+    __slots__ = ("key", "version", "geometries", "tree", "attributes", "size")
+
+    def __init__(
+            self,
+            key: str,
+            layer: gpd.GeoDataFrame,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            key (str): Source key, tiles cache keys start with it
+            layer (gpd.GeoDataFrame): Layer to cut tiles from
+
+        Returns:
+            None
+        """
+
+        layer = layer[~layer.geometry.isna()].to_crs(3857)
+        attributes = layer.drop(columns=layer.geometry.name).reset_index(drop=True)
+        wkb = shapely.to_wkb(layer.geometry.values)
+        version = hashlib.sha1(b"".join(wkb))
+        if len(attributes.columns):
+            version.update(pd.util.hash_pandas_object(attributes, index=False).values.tobytes())
+        self.key = key
+        self.version = version.hexdigest()
+        self.geometries = layer.geometry.values.to_numpy()
+        self.tree = shapely.STRtree(self.geometries)
+        self.attributes = attributes
+        self.size = int(sum(len(geometry_wkb) for geometry_wkb in wkb) + attributes.memory_usage(deep=True).sum())
+
+
+class VectorTiles:
+    """
+    Class for serving layers as Mapbox Vector Tiles.
+    Prepared layers are cached by source key, encoded tiles are cached as bytes by source key and layer version.
+    """
+
+    def __init__(
+            self,
+            tiles_cache_size: int = 256 * 1024 * 1024,
+            sources_cache_size: int = 1024 * 1024 * 1024,
+            sources_ttl: float = 3600,
+            extent: int = 4096,
+            buffer: int = 64,
+            min_area: float = 16,
+            max_zoom: int = 20,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            tiles_cache_size (int): Maximum size of cached tiles in bytes. Default to 256 MB
+            sources_cache_size (int): Maximum size of prepared layers in bytes. Default to 1 GB
+            sources_ttl (float): Seconds to keep prepared layer before reloading it. Default to 3600
+            extent (int): Tile extent in quantized coordinates. Default to 4096
+            buffer (int): Tile buffer in quantized coordinates. Default to 64
+            min_area (float): Minimum quantized feature area, smaller features are not drawn. Default to 16
+            max_zoom (int): Maximum zoom level. Default to 20
+
+        Returns:
+            None
+        """
+
+        self.tiles_cache = ResponseCache(tiles_cache_size)
+        self.sources_cache = ResponseCache(sources_cache_size)
+        self.sources_single_flight = SingleFlight()
+        self.sources_ttl = sources_ttl
+        self._invalidations: dict[str, int] = {}
+        self.extent = extent
+        self.buffer = buffer
+        self.min_area = min_area
+        self.max_zoom = max_zoom
+        metrics_registry.register("vector_tiles_cache", self.tiles_cache.stats)
+        metrics_registry.register("vector_tiles_sources_cache", self.sources_cache.stats)
+
+    async def get_source(
+            self,
+            key: str,
+            load: Callable[[], Awaitable[gpd.GeoDataFrame]],
+    ) -> TileSource:
+        """
+        Function returns prepared layer from cache or loads and prepares it
+
+        Args:
+            key (str): Source key
+            load (Callable[[], Awaitable[gpd.GeoDataFrame]]): Function creating awaitable with layer
+
+        Returns:
+            TileSource: Prepared layer
+        """
+
+        source, state = self.sources_cache.lookup(key, self.sources_ttl)
+        if state is None:
+            source = await self.sources_single_flight.do(key, lambda: self._load_source(key, load))
+        return source
+
+    def _invalidations_count(
+            self,
+            key: str,
+    ) -> int:
+        return sum(count for prefix, count in self._invalidations.items() if key.startswith(prefix))
+
+    async def _load_source(
+            self,
+            key: str,
+            load: Callable[[], Awaitable[gpd.GeoDataFrame]],
+    ) -> TileSource:
+        """
+        Function loads and prepares layer and puts it to cache if source was not invalidated during loading
+
+        Args:
+            key (str): Source key
+            load (Callable[[], Awaitable[gpd.GeoDataFrame]]): Function creating awaitable with layer
+
+        Returns:
+            TileSource: Prepared layer
+        """
+
+        invalidations_count = self._invalidations_count(key)
+        layer = await load()
+        source = await asyncio.to_thread(TileSource, key, layer)
+        if invalidations_count == self._invalidations_count(key):
+            self.sources_cache.set(key, source, source.size)
+        return source
+
+    async def get_tile(
+            self,
+            source: TileSource,
+            z: int,
+            x: int,
+            y: int,
+            layer_name: str = "hexagons",
+    ) -> bytes:
+        """
+        Function returns encoded tile from cache or encodes it
+
+        Args:
+            source (TileSource): Prepared layer
+            z (int): Zoom level
+            x (int): Tile column
+            y (int): Tile row
+            layer_name (str): Tile layer name. Default to "hexagons"
+
+        Returns:
+            bytes: Mapbox Vector Tile
+
+        Raises:
+            HTTPException: 400 if tile is out of zoom level bounds
+        """
+
+        if not 0 <= z <= self.max_zoom or not 0 <= x < 2 ** z or not 0 <= y < 2 ** z:
+            raise http_exception(
+                400,
+                msg="Tile is out of bounds",
+                _input={"z": z, "x": x, "y": y},
+                _detail=f"Zoom should be from 0 to {self.max_zoom}, x and y from 0 to 2 ** z - 1",
+            )
+        key = f"{source.key}/{source.version}/{layer_name}/{z}/{x}/{y}"
+        tile, state = self.tiles_cache.lookup(key, math.inf)
+        if state is None:
+            tile = await asyncio.to_thread(self.encode_tile, source, z, x, y, layer_name)
+            self.tiles_cache.set(key, tile, len(tile))
+        return tile
+
+    def encode_tile(
+            self,
+            source: TileSource,
+            z: int,
+            x: int,
+            y: int,
+            layer_name: str = "hexagons",
+    ) -> bytes:
+        """
+        Function clips source geometries by tile with buffer, quantizes them to tile extent and encodes tile
+        with mapbox-vector-tile.
+        Features which quantized area is less than min_area are dropped, so low zoom tiles don't keep subpixel hexes.
+
+        Args:
+            source (TileSource): Prepared layer
+            z (int): Zoom level
+            x (int): Tile column
+            y (int): Tile row
+            layer_name (str): Tile layer name. Default to "hexagons"
+
+        Returns:
+            bytes: Mapbox Vector Tile, empty if there are no features to draw
+        """
+
+        tile_size = 2 * WEB_MERCATOR_BOUND / 2 ** z
+        min_x = -WEB_MERCATOR_BOUND + x * tile_size
+        max_y = WEB_MERCATOR_BOUND - y * tile_size
+        padding = tile_size * self.buffer / self.extent
+        clip_bounds = (min_x - padding, max_y - tile_size - padding, min_x + tile_size + padding, max_y + padding)
+        indexes = np.sort(source.tree.query(shapely.box(*clip_bounds)))
+        geometries = shapely.clip_by_rect(source.geometries[indexes], *clip_bounds)
+        scale = self.extent / tile_size
+        geometries = shapely.transform(
+            geometries, lambda coords: np.rint((coords - (min_x, max_y)) * (scale, -scale))
+        )
+        visible = shapely.area(geometries) >= self.min_area
+        if not visible.any():
+            return b""
+        features = [
+            {"geometry": geometry, "properties": properties}
+            for geometry, properties in zip(
+                self.orient_polygons(geometries[visible]),
+                self.tile_properties(source.attributes.iloc[indexes[visible]]),
+            )
+        ]
+        return mapbox_vector_tile.encode(
+            {"name": layer_name, "features": features},
+            default_options={"extents": self.extent, "y_coord_down": True, "check_winding_order": False},
+        )
+
+    @staticmethod
+    def orient_polygons(
+            geometries: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Function orients exterior rings counterclockwise and interior rings clockwise for all polygons at once,
+        as tile encoder expects for tile coordinates with y axis down, so encoder doesn't check every feature.
+
+        Args:
+            geometries (np.ndarray): Not empty polygons and multipolygons
+
+        Returns:
+            np.ndarray: Oriented geometries of the same types in geometries order
+        """
+
+        polygons, feature_index = shapely.get_parts(geometries, return_index=True)
+        rings, polygon_index = shapely.get_rings(polygons, return_index=True)
+        is_exterior = np.concatenate([[True], polygon_index[1:] != polygon_index[:-1]])
+        rings = np.where(shapely.is_ccw(rings) == is_exterior, rings, shapely.reverse(rings))
+        polygons = shapely.polygons(rings, indices=polygon_index)
+        first_parts = np.searchsorted(feature_index, np.arange(len(geometries)))
+        return np.where(
+            shapely.get_type_id(geometries) == 3,
+            polygons[first_parts],
+            shapely.multipolygons(polygons, indices=feature_index),
+        )
+
+    @staticmethod
+    def tile_properties(
+            attributes: pd.DataFrame,
+    ) -> list[dict]:
+        """
+        Function converts features attributes to tile features properties.
+        Missing values are skipped, values of types not supported by tiles are converted to strings.
+
+        Args:
+            attributes (pd.DataFrame): Features attributes
+
+        Returns:
+            list[dict]: Features properties in attributes order
+        """
+
+        return [
+            {
+                key: value if isinstance(value, (bool, int, float, str)) else str(value)
+                for key, value in record.items()
+                if not pd.isna(value)
+            }
+            for record in attributes.to_dict("records")
+        ]
+
+    def invalidate(
+            self,
+            prefix: str,
+    ) -> int:
+        """
+        Function drops prepared layers and tiles with keys starting with prefix.
+        Layers being loaded at the moment are not cached after loading.
+
+        Args:
+            prefix (str): Source key prefix
+
+        Returns:
+            int: Number of dropped layers and tiles
+        """
+
+        self._invalidations[prefix] = self._invalidations.get(prefix, 0) + 1
+        return self.sources_cache.invalidate(prefix) + self.tiles_cache.invalidate(prefix)
+
+
+vector_tiles = VectorTiles(
+    tiles_cache_size=int(config.get("VECTOR_TILES_CACHE_SIZE_MB", "256")) * 1024 * 1024,
+    sources_cache_size=int(config.get("VECTOR_TILES_SOURCES_CACHE_SIZE_MB", "1024")) * 1024 * 1024,
+    sources_ttl=float(config.get("VECTOR_TILES_SOURCES_TTL", "3600")),
+)
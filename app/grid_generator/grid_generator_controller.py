@@ -1,8 +1,14 @@
+import asyncio
 import json
+from typing import Annotated
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
 from loguru import logger
 
+from app.common.feature_collection_encoder import feature_collection_encoder
+from app.common.responses import LayerFormat, get_layer_format, layer_response
+
 from .services import grid_generator_service
 
 
@@ -10,7 +16,10 @@ grid_generator_router = APIRouter(prefix="/hex_generator", tags=["Grid Generatio
 
 
 @grid_generator_router.get("/generate_full/{territory_id}")
-async def generate_grid_with_indicators_and_potentials(territory_id: int) -> dict:
+async def generate_grid_with_indicators_and_potentials(
+        territory_id: int,
+        layer_format: Annotated[LayerFormat, Depends(get_layer_format)],
+) -> Response:
     """
     Generate grid with provided territory with indicators
 
@@ -26,9 +35,8 @@ async def generate_grid_with_indicators_and_potentials(territory_id: int) -> dic
     result = await grid_generator_service.generate_grid_with_indicators(
         territory_id,
     )
-    result = json.loads(result.to_json())
     logger.info(f"Finished /hex_generator/generate_full/{territory_id}")
-    return result
+    return await layer_response(result, layer_format)
 
 @grid_generator_router.put("/bound_indicators_to_hexes/{territory_id}")
 async def bound_indicators_to_hexes(territory_id: int) -> dict:
@@ -61,13 +69,16 @@ async def generate_grid_to_db(territory_id: int) -> dict:
     grid = await grid_generator_service.generate_grid(territory_id)
     result = await grid_generator_service.save_new_hexagons(
         territory_id,
-        json.loads(grid.to_json())
+        json.loads(await asyncio.to_thread(feature_collection_encoder.encode, grid))
     )
     logger.info("Finished /hex_generator/generate_to_db/{territory_id}")
     return result
 
 @grid_generator_router.get("/generate/{territory_id}")
-async def generate_grid(territory_id: int) -> dict:
+async def generate_grid(
+        territory_id: int,
+        layer_format: Annotated[LayerFormat, Depends(get_layer_format)],
+) -> Response:
     """
     Generate grid with provided territory id, calculate all indicators and profiles potentials and save it to db
 
@@ -78,6 +89,21 @@ async def generate_grid(territory_id: int) -> dict:
 
     logger.info(f"Started /hex_generator/generate/{territory_id}")
     result = await grid_generator_service.generate_grid(territory_id)
-    result = json.loads(result.to_json())
     logger.info(f"Finished /hex_generator/generate/{territory_id}")
-    return result
+    return await layer_response(result, layer_format)
+
+@grid_generator_router.get("/tiles/{territory_id}/{z}/{x}/{y}.mvt")
+async def get_grid_tile(territory_id: int, z: int, x: int, y: int) -> Response:
+    """
+    Get vector tile of grid generated for territory
+
+    Parameters:
+
+        - territory_id (int): Territory ID
+        - z (int): Zoom level
+        - x (int): Tile column
+        - y (int): Tile row
+    """
+
+    result = await grid_generator_service.get_grid_tile(territory_id, z, x, y)
+    return Response(result, media_type="application/vnd.mapbox-vector-tile")
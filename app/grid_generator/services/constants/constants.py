@@ -15,3 +15,10 @@ prioc_objects_types = [
         "Кампус университетский",
         "Тур база",
     ]
+
+prioc_objects_indicators_names = {
+    "Пром объект": "Промышленная зона",
+    "Логистическо-складской комплекс": "Логистический, складской комплекс",
+    "Кампус университетский": "Университетский кампус",
+    "Тур база": "Туристическая база",
+}
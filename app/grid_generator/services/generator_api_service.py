@@ -1,6 +1,11 @@
+from itertools import chain
+from typing import Iterable
+
 from loguru import logger
 
 from app.common import urban_api_handler, http_exception, tasks_api_handler, config
+from app.common.api_handler.bulk_writer import BulkWriter
+from app.common.api_handler.retry_policy import RetryPolicy
 from app.common.api_handler.api_handler import (
     transport_frame_api_handler,
     townsnet_api_handler,
@@ -27,7 +32,13 @@ class GeneratorApiService:
         self.transport_frame_extractor = transport_frame_api_handler
         self.pop_frame_extractor = pop_frame_api_handler
         self.eco_frame_extractor = eco_frame_api_handler
-        self.max_async_extractions = int(config.get("MAX_API_ASYNC_EXTRACTIONS"))
+        self.hexagon_data_writer = BulkWriter(
+            "hexagon_data",
+            concurrency=tasks_api_handler.write_limiter.max_limit,
+            max_retries=int(config.get("MAX_RETRIES", 3)),
+            limiter=tasks_api_handler.write_limiter,
+        )
+        self.hexagon_data_retry_policy = RetryPolicy(max_retries=0)
 
     async def get_territory_data(
             self, territory_id: int
@@ -77,19 +88,19 @@ class GeneratorApiService:
     async def get_social_provision_evaluation(
             self,
             territory_id: int,
-            json_data: dict | list
+            json_data: bytes
     ):
         """
         Function retrieves evaluation for social provision
         Args:
             territory_id (int): Territory ID
-            json_data (dict): Data for evaluation
+            json_data (bytes): Encoded FeatureCollection for evaluation
 
         Returns:
             dict | list: Evaluated data
         """
 
-        logger.info(f"Started provision extraction for {len(json_data['features'])} territories")
+        logger.info(f"Started provision extraction for {len(json_data)} bytes of territories")
         response = await self.townsnet_extractor.post(
             extra_url=f"/provision/{territory_id}/get_evaluation",
             data=json_data,
@@ -101,13 +112,13 @@ class GeneratorApiService:
     async def get_engineering_evaluation(
             self,
             territory_id: int,
-            json_data: dict | list
+            json_data: bytes
     ) -> dict | list:
         """
         Function retrieves evaluation for engineering
         Args:
             territory_id (int): Territory ID
-            json_data (dict): Data for evaluation
+            json_data (bytes): Encoded FeatureCollection for evaluation
 
         Returns:
             dict | list: Evaluated data
@@ -123,13 +134,13 @@ class GeneratorApiService:
     async def get_transport_evaluation(
             self,
             territory_id: int,
-            json_data: dict | list
+            json_data: bytes
     ) -> dict | list:
         """
         Function retrieves transport frame
         Args:
             territory_id (int): Territory ID
-            json_data (dict): Data for evaluation
+            json_data (bytes): Encoded FeatureCollection for evaluation
 
         Returns:
             dict | list: Transport frame
@@ -144,19 +155,19 @@ class GeneratorApiService:
     async def get_ecological_evaluation(
             self,
             territory_id: int,
-            json_data: dict | list
+            json_data: bytes
     ) -> dict | list:
         """
         Function retrieves evaluation for ecological
         Args:
             territory_id (int): Territory ID
-            json_data (dict): Data for evaluation
+            json_data (bytes): Encoded FeatureCollection for evaluation
 
         Returns:
             dict | list: Evaluated data
         """
 
-        eco_feature_collection = {"feature_collection": json_data}
+        eco_feature_collection = b'{"feature_collection": ' + json_data + b"}"
         response = await self.eco_frame_extractor.post(
             extra_url=f"/ecodonut/{territory_id}/mark",
             data=eco_feature_collection
@@ -167,13 +178,13 @@ class GeneratorApiService:
     async def get_population_evaluation(
             self,
             territory_id: int,
-            json_data: dict | list
+            json_data: bytes
     ) -> dict | list:
         """
         Function retrieves evaluation for population
         Args:
             territory_id (int): Territory ID
-            json_data (dict): Data for evaluation
+            json_data (bytes): Encoded FeatureCollection for evaluation
 
         Returns:
             dict | list: Evaluated data
@@ -243,19 +254,27 @@ class GeneratorApiService:
 
     async def put_hexagon_data(
             self,
-            data_list: list[dict]
+            data_batches: Iterable[list[dict]]
     ) -> None:
+        """
+        Function puts hexagons indicators values to urban_api keeping adaptive number of requests in flight.
+        Failed records are retried only by writer, so limiter measures single requests latency.
+
+        Args:
+            data_batches (Iterable[list[dict]]): Batches of indicators values records, can be lazy
+
+        Returns:
+            None
+        """
 
         extra_url = f"{self.scenarios}/indicators_values"
-        list_to_extract = [{"extra_url": extra_url, "data": hex_data} for hex_data in data_list]
-        for i in range(0, len(list_to_extract), self.max_async_extractions):
-            chunk = list_to_extract[i:i + self.max_async_extractions]
-            await tasks_api_handler.extract_requests_to_one_url(
-                func=urban_api_handler.put,
-                headers=self.headers,
-                data=chunk,
-                max_concurrent_requests=self.max_async_extractions
-            )
+        await self.hexagon_data_writer.write(
+            urban_api_handler.put,
+            ({"data": hex_data} for hex_data in chain.from_iterable(data_batches)),
+            extra_url=extra_url,
+            headers=self.headers,
+            retry_policy=self.hexagon_data_retry_policy,
+        )
 
     async def get_regional_base_scenario(
             self,
@@ -1,12 +1,42 @@
+import asyncio
+from itertools import chain
+
 import geopandas as gpd
 import h3
-from shapely.geometry import shape
+import numpy as np
+import shapely
 
 
 class GridGenerator:
 
     @staticmethod
+    def cells_to_polygons(
+            cells: list[str],
+    ) -> np.ndarray:
+        """
+        Function builds polygons for H3 cells in bulk.
+
+        Args:
+            cells (list[str]): H3 cells indexes
+
+        Returns:
+            np.ndarray: Array of shapely polygons in 4326 crs in cells order
+        """
+
+        if not cells:
+            return np.array([], dtype=object)
+        boundaries = [h3.cell_to_boundary(cell) for cell in cells]
+        lengths = np.fromiter((len(boundary) for boundary in boundaries), dtype=np.int64, count=len(boundaries))
+        coordinates = np.fromiter(
+            chain.from_iterable(chain.from_iterable(boundaries)),
+            dtype=np.float64,
+            count=int(lengths.sum()) * 2,
+        ).reshape(-1, 2)[:, ::-1]
+        rings = shapely.linearrings(coordinates, indices=np.repeat(np.arange(len(cells)), lengths))
+        return shapely.polygons(rings)
+
     async def generate_hexagonal_grid(
+            self,
             territory: gpd.GeoDataFrame,
             size: int = 6,
     ) -> gpd.GeoDataFrame:
@@ -18,14 +48,14 @@ class GridGenerator:
             size (int, optional): Size of hexagonal grid. Defaults to 6.
 
         Returns:
-            gpd.GeoDataFrame: The generated hexagonal grid.
+            gpd.GeoDataFrame: The generated hexagonal grid with H3 indexes in "h3_index" column.
         """
 
         if territory.crs != 4326:
             territory.to_crs(4326, inplace=True)
         cells = h3.geo_to_cells(territory.union_all(), res=size)
-        geometries = [shape(h3.cells_to_geo([cell])) for cell in cells]
-        result = gpd.GeoDataFrame(geometry=geometries, crs=territory.crs)
+        geometries = await asyncio.to_thread(self.cells_to_polygons, cells)
+        result = gpd.GeoDataFrame({"h3_index": cells}, geometry=geometries, crs=territory.crs)
         return result
 
 grid_generator = GridGenerator()
@@ -1,7 +1,9 @@
 import json
 import asyncio
+from typing import Iterable, Iterator
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 from shapely.geometry import shape
 from loguru import logger
@@ -9,9 +11,13 @@ from loguru import logger
 from .generator_api_service import generator_api_service
 from .grid_generator import grid_generator
 from .potential_estimator import potential_estimator
-from .constants.constants import prioc_objects_types
+from .constants.constants import prioc_objects_types, prioc_objects_indicators_names
 from app.common import http_exception, params_validator, tasks_api_handler
+from app.common.feature_collection_encoder import feature_collection_encoder
+from app.common.vector_tiles import vector_tiles
 from app.prioc.services.prioc_service import prioc_service
+from app.prioc.services.hex_api_getter import hex_api_getter
+from app.prioc.services.rankings_storage import rankings_storage
 
 
 class GridGeneratorService:
@@ -91,7 +97,7 @@ class GridGeneratorService:
             pure (bool, optional): If True, grid will be cleaned from objects. Defaults to True.
 
         Returns:
-            dict: The generated hexagonal grid.
+            gpd.GeoDataFrame: The generated hexagonal grid without internal H3 indexes column.
         """
 
         available_ids = await params_validator.extract_current_regions()
@@ -116,8 +122,32 @@ class GridGeneratorService:
             water = await self.get_cleaning_gdf(territory_id, [45, 55])
             drop_index = grid.sjoin(water, predicate='within').index.to_list()
             grid.drop(drop_index, inplace=True)
+        grid.drop(columns="h3_index", inplace=True)
         return grid
 
+    async def get_grid_tile(
+            self,
+            territory_id: int,
+            z: int,
+            x: int,
+            y: int,
+    ) -> bytes:
+        """
+        Function returns vector tile of hexagonal grid generated for territory
+
+        Args:
+            territory_id (int): Territory ID
+            z (int): Zoom level
+            x (int): Tile column
+            y (int): Tile row
+
+        Returns:
+            bytes: Mapbox Vector Tile with grid hexagons
+        """
+
+        source = await vector_tiles.get_source(f"grid/{territory_id}", lambda: self.generate_grid(territory_id))
+        return await vector_tiles.get_tile(source, z, x, y)
+
     @staticmethod
     async def calculate_grid_indicators(
             grid: gpd.GeoDataFrame,
@@ -136,7 +166,7 @@ class GridGeneratorService:
 
         if grid.crs  != 4326:
             grid.to_crs(4326, inplace=True)
-        feature_collection_grid = json.loads(grid.to_json())
+        feature_collection_grid = await asyncio.to_thread(feature_collection_encoder.encode, grid)
 
         if territory_id not in await params_validator.extract_current_regions():
             raise http_exception(
@@ -203,6 +233,90 @@ class GridGeneratorService:
         grid_with_profiles = await potential_estimator.estimate_potentials(grid_with_indicators)
         return grid_with_profiles
 
+    @staticmethod
+    def iter_indicators_payload(
+            df_to_put: pd.DataFrame,
+            mapped_name_id: dict[str, int],
+            scenario_id: int,
+            nulls: bool = False,
+            batch_size: int = 10000,
+    ) -> Iterator[list[dict]]:
+        """
+        Function lazily builds hexagons indicators values payload in hexagons order.
+        Frame is melted to (hexagon, indicator) pairs by batches of hexagons, so records are created only for
+        current batch.
+
+        Args:
+            df_to_put (pd.DataFrame): Hexagons with "hexagon_id" column and indicators values columns
+            mapped_name_id (dict[str, int]): Indicators ids by columns names
+            scenario_id (int): Scenario ID to write values to
+            nulls (bool): If True builds records for missing values with None value. Default to False
+            batch_size (int): Approximate number of records in batch. Default to 10000
+
+        Returns:
+            Iterator[list[dict]]: Batches of indicators values records
+        """
+
+        columns = list(df_to_put.drop(columns="hexagon_id").columns)
+        if not columns:
+            return
+        indicators_ids = np.array([int(mapped_name_id[column]) for column in columns], dtype=np.int64)
+        hexagons_ids = df_to_put["hexagon_id"].to_numpy(dtype=np.int64)
+        values = df_to_put[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        batch_hexagons = max(1, batch_size // len(columns))
+        for start in range(0, len(hexagons_ids), batch_hexagons):
+            batch_values = values[start:start + batch_hexagons].ravel()
+            batch_hexagons_ids = np.repeat(hexagons_ids[start:start + batch_hexagons], len(columns))
+            batch_indicators_ids = np.tile(indicators_ids, len(batch_values) // len(columns))
+            mask = np.isnan(batch_values) if nulls else ~np.isnan(batch_values)
+            batch_values = [None] * int(mask.sum()) if nulls else batch_values[mask].tolist()
+            batch = [
+                {
+                    "indicator_id": indicator_id,
+                    "scenario_id": scenario_id,
+                    "territory_id": None,
+                    "hexagon_id": hexagon_id,
+                    "value": value,
+                    "comment": "--",
+                    "information_source": "hextech/grid_generator",
+                    "properties": {}
+                }
+                for indicator_id, hexagon_id, value in zip(
+                    batch_indicators_ids[mask].tolist(), batch_hexagons_ids[mask].tolist(), batch_values
+                )
+            ]
+            if batch:
+                yield batch
+
+    @staticmethod
+    def write_records(
+            path: str,
+            batches: Iterable[list[dict]],
+    ) -> int:
+        """
+        Function writes records batches to json array file as they are produced, so only one batch is kept in memory
+
+        Args:
+            path (str): File path
+            batches (Iterable[list[dict]]): Batches of records, can be lazy
+
+        Returns:
+            int: Number of written records
+        """
+
+        records_num = 0
+        with open(path, "w") as f:
+            f.write("[")
+            for batch in batches:
+                if not batch:
+                    continue
+                if records_num:
+                    f.write(", ")
+                f.write(json.dumps(batch)[1:-1])
+                records_num += len(batch)
+            f.write("]")
+        return records_num
+
     async def bound_hexagons_indicators(
             self,
             territory_id: int
@@ -216,27 +330,17 @@ class GridGeneratorService:
         grid = gpd.GeoDataFrame.from_features(hexagons_geojson, crs=4326)
         grid_with_indicators = await self.calculate_grid_indicators(grid, territory_id)
         bounded_hexagons = await potential_estimator.estimate_potentials(grid_with_indicators)
-        for i in prioc_objects_types:
-            current_object_hexes = await prioc_service.get_hexes_for_object_from_gdf(
-                hexes=bounded_hexagons,
-                territory_id=territory_id,
-                object_type=i
-            )
-            bounded_hexagons = pd.merge(
-                bounded_hexagons,
-                current_object_hexes[["hexagon_id", "weighted_sum"]],
-                on="hexagon_id", how="outer"
-            )
-            if i == "Пром объект":
-                bounded_hexagons.rename(columns={"weighted_sum": "Промышленная зона"}, inplace=True)
-            elif i == "Логистическо-складской комплекс":
-                bounded_hexagons.rename(columns={"weighted_sum": "Логистический, складской комплекс"}, inplace=True)
-            elif i == "Кампус университетский":
-                bounded_hexagons.rename(columns={"weighted_sum": "Университетский кампус"}, inplace=True)
-            elif i == "Тур база":
-                bounded_hexagons.rename(columns={"weighted_sum": "Туристическая база"}, inplace=True)
-            else:
-                bounded_hexagons.rename(columns={"weighted_sum": i}, inplace=True)
+        bounded_hexagons.drop_duplicates("geometry", inplace=True)
+        indicators_version = await asyncio.to_thread(rankings_storage.indicators_version, bounded_hexagons)
+        bounded_hexagons = await prioc_service.get_hexes_for_objects_from_gdf(
+            hexes=bounded_hexagons,
+            territory_id=territory_id,
+            objects_types=prioc_objects_types,
+        )
+        rankings = {
+            i: bounded_hexagons[["hexagon_id", i]].rename(columns={i: "weighted_sum"}) for i in prioc_objects_types
+        }
+        bounded_hexagons.rename(columns=prioc_objects_indicators_names, inplace=True)
         full_map = await generator_api_service.extract_all_indicators()
         mapped_name_id = {}
         for item in full_map:
@@ -244,54 +348,18 @@ class GridGeneratorService:
                 mapped_name_id[item["name_full"]] = item["indicator_id"]
             elif item["name_short"] in bounded_hexagons.columns:
                 mapped_name_id[item["name_short"]] = item["indicator_id"]
-        bounded_hexagons.drop_duplicates("geometry", inplace=True)
         df_to_put = bounded_hexagons.drop(columns=["geometry", "properties"])
-        columns_to_iter = list(df_to_put.drop(columns="hexagon_id").columns)
-        extract_list = []
-        failed_list = []
-        for index, row in df_to_put.iterrows():
-            for column in columns_to_iter:
-                if not pd.isna(row[column]):
-                    extract_list.append(
-                        {
-                        "indicator_id": int(mapped_name_id[column]),
-                        "scenario_id": regional_scenario,
-                        "territory_id": None,
-                        "hexagon_id": int(row["hexagon_id"]),
-                        "value": row[column],
-                        "comment": "--",
-                        "information_source": "hextech/grid_generator",
-                        "properties": {}
-                        }
-                    )
-                elif int(mapped_name_id[column]) in [197, 198, 199, 200, 201]:
-                    failed_object = {
-                        "indicator_id": int(mapped_name_id[column]),
-                        "scenario_id": regional_scenario,
-                        "territory_id": None,
-                        "hexagon_id": int(row["hexagon_id"]),
-                        "value": None,
-                        "comment": "--",
-                        "information_source": "hextech/grid_generator",
-                        "properties": {}
-                        }
-                    failed_list.append(failed_object)
-                else:
-                    failed_object = {
-                        "indicator_id": int(mapped_name_id[column]),
-                        "scenario_id": regional_scenario,
-                        "territory_id": None,
-                        "hexagon_id": int(row["hexagon_id"]),
-                        "value": None,
-                        "comment": "--",
-                        "information_source": "hextech/grid_generator",
-                        "properties": {}
-                        }
-                    failed_list.append(failed_object)
-
-        with open(f"failed_grid_indicators_list.json", "w") as f:
-            json.dump(failed_list, f)
-        await generator_api_service.put_hexagon_data(extract_list)
+        await asyncio.to_thread(
+            self.write_records,
+            "failed_grid_indicators_list.json",
+            self.iter_indicators_payload(df_to_put, mapped_name_id, regional_scenario, nulls=True),
+        )
+        await generator_api_service.put_hexagon_data(
+            self.iter_indicators_payload(df_to_put, mapped_name_id, regional_scenario)
+        )
+        hex_api_getter.invalidate_scenario(regional_scenario)
+        prioc_service.invalidate_tiles(territory_id)
+        await rankings_storage.save_rankings(regional_scenario, indicators_version, rankings)
 
         return {"msg": f"Successfully uploaded hexagons data for {territory_id}"}
 
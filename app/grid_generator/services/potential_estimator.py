@@ -1,6 +1,7 @@
 from collections import ChainMap
 
 import geopandas as gpd
+import numpy as np
 from loguru import logger
 
 from .constants import profiles
@@ -8,8 +9,53 @@ from .constants import profiles
 
 class PotentialEstimator:
 
-    @staticmethod
+    def __init__(self):
+        """
+        Initialisation function. Compiles profiles into (profiles x criteria) thresholds matrix,
+        criteria missing in profile can't be satisfied.
+        """
+
+        self.profiles_names = list(profiles.keys())
+        self.criteria_names = list(
+            dict.fromkeys(
+                criterion for profile in profiles.values() for criterion in profile["Критерии"].keys()
+            )
+        )
+        self.thresholds = np.array(
+            [
+                [profiles[profile_name]["Критерии"].get(criterion, np.inf) for criterion in self.criteria_names]
+                for profile_name in self.profiles_names
+            ],
+            dtype=np.float64,
+        )
+
+    def score(
+            self,
+            values: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Function counts satisfied criteria for every profile
+
+        Args:
+            values (np.ndarray): (n x criteria) indicators values in criteria_names order
+
+        Returns:
+            np.ndarray: (n x profiles) number of satisfied criteria
+        """
+
+        return (values[:, np.newaxis, :] >= self.thresholds[np.newaxis, :, :]).sum(axis=2)
+
+    def _values_from_dict(
+            self,
+            indicators_values: dict[str, int] | ChainMap,
+    ) -> np.ndarray:
+        return np.array(
+            [[indicators_values.get(criterion, np.nan) for criterion in self.criteria_names]],
+            dtype=np.float64,
+        )
+
     async def estimate_potential(
+            self,
             indicators_values: dict[str, int] | ChainMap,
     ) -> list[int]:
         """
@@ -22,48 +68,24 @@ class PotentialEstimator:
             list[int]: estimated value of potential
         """
 
-        result = [
-            sum(
-                [
-                    True for key, value in indicators_values.items()
-                    if value >= profiles[profile_name]["Критерии"][key]
-                ]
-            ) for profile_name in profiles.keys()
-        ]
-        return result
-
-    @staticmethod
+        result = self.score(self._values_from_dict(indicators_values))[0]
+        return result.tolist()
+
     async def estimate_potentials_as_dict(
+            self,
             indicators_values: dict,
-    ):
-
-        result = {
-            profile_name: sum(
-                [
-                    value >= profiles[profile_name]["Критерии"][key]
-                    for key, value in indicators_values.items()
-                ]
-            ) for profile_name in profiles.keys()
-        }
+    ) -> dict[str, int]:
 
-        return result
+        result = self.score(self._values_from_dict(indicators_values))[0]
+        return dict(zip(self.profiles_names, result.tolist()))
 
     async def estimate_potentials(
             self,
             hexes: gpd.GeoDataFrame
     ) -> gpd.GeoDataFrame:
         logger.info(f"Started potential estimation with {len(hexes)} hexes")
-        result_list = []
-        drop_list = [column for column in [
-            "geometry", "hexagon_id", "properties"] if column in list(hexes.columns)
-                     ]
-        hexes_df = hexes.drop(columns=drop_list)
-        for index, row in hexes_df.iterrows():
-            cur_potential = await self.estimate_potential(row.to_dict())
-            result_list.append(cur_potential)
-
-        columns = list(profiles.keys())
-        hexes[columns] = result_list
+        values = hexes.reindex(columns=self.criteria_names).to_numpy(dtype=np.float64, na_value=np.nan)
+        hexes[self.profiles_names] = self.score(values)
         logger.info(f"Finished potential estimation with {len(hexes)} hexes")
 
         return hexes
@@ -1,14 +1,15 @@
 import asyncio
 import json
 
-import aiohttp
 import geopandas as gpd
 import pandas as pd
 from fastapi.exceptions import HTTPException
 from loguru import logger
 
-from app.common import config
+from app.common import config, tasks_api_handler
 from app.common.exceptions.http_exception_wrapper import http_exception
+from app.common.api_handler.bulk_writer import BulkWriter
+from app.common.api_handler.retry_policy import RetryPolicy
 from app.common.api_handler.api_handler import (
     urban_api_handler,
     eco_frame_api_handler,
@@ -25,6 +26,13 @@ class IndicatorsSaviorApiService:
 
     def __init__(self):
         self.headers = {"Authorization" :f'Bearer {config.get("ACCESS_TOKEN")}'}
+        self.indicator_writer = BulkWriter(
+            "indicators_savior",
+            concurrency=1,
+            max_retries=int(config.get("MAX_RETRIES", 3)),
+            limiter=tasks_api_handler.write_limiter,
+        )
+        self.indicator_retry_policy = RetryPolicy(max_retries=0)
 
     async def get_base_scenario_by_project(
             self,
@@ -53,7 +61,8 @@ class IndicatorsSaviorApiService:
             json_data: dict
     ) -> None:
         """
-        Function extracts put indicators query with params
+        Function extracts put indicators query with params within shared urban_api writes limiter.
+        Failed query is retried only by writer, so limiter slot is held for single request without backoff.
         Args:
             scenario_id (int): id of scenario
             json_data (dict): indicators_data_to_post
@@ -61,13 +70,13 @@ class IndicatorsSaviorApiService:
             None
         """
 
-        async with aiohttp.ClientSession() as session:
-            await urban_api_handler.put(
-                session=session,
-                extra_url=f"/api/v1/scenarios/{scenario_id}/indicators_values",
-                headers=self.headers,
-                data=json_data
-            )
+        await self.indicator_writer.write(
+            urban_api_handler.put,
+            [{"data": json_data}],
+            extra_url=f"/api/v1/scenarios/{scenario_id}/indicators_values",
+            headers=self.headers,
+            retry_policy=self.indicator_retry_policy,
+        )
 
     async def save_net_indicators(
             self,
@@ -170,13 +179,7 @@ class IndicatorsSaviorApiService:
         }
 
         for put_data in (first_to_put, second_to_put):
-            async with aiohttp.ClientSession() as session:
-                await urban_api_handler.put(
-                    session=session,
-                    extra_url=f"/api/v1/scenarios/{project_scenario_id}/indicators_values",
-                    headers=self.headers,
-                    data=put_data,
-                )
+            await self.put_indicator(project_scenario_id, put_data)
 
         logger.info("Saved ecoframe indicators")
 
@@ -1,6 +1,5 @@
-from app.common.api_handler.api_handler import AsyncApiHandler
+from app.common.api_handler.api_handler import AsyncApiHandler, init_pooled_handler
 from app.common.exceptions.http_exception_wrapper import http_exception
-from app.common.config.config import config
 
 
 class RecultivationApiHandler(AsyncApiHandler):
@@ -11,19 +10,20 @@ class RecultivationApiHandler(AsyncApiHandler):
     def __init__(
             self,
             base_url: str,
+            **pool_settings,
     ) -> None:
         """
         Initialisation function
 
         Args:
             base_url (str): Base api url
-            auth_header str: Bearer access token
+            pool_settings: Connection pool settings, see AsyncApiHandler
 
         Returns:
             None
         """
 
-        super().__init__(base_url)
+        super().__init__(base_url, **pool_settings)
 
     async def post(
             self,
@@ -65,4 +65,4 @@ class RecultivationApiHandler(AsyncApiHandler):
             return response
 
 
-recultivation_api_handler = RecultivationApiHandler(config.get("REDEVELOPMENT_API_URL"))
+recultivation_api_handler = init_pooled_handler("REDEVELOPMENT_API_URL", RecultivationApiHandler)
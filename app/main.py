@@ -1,10 +1,14 @@
 import sys
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.responses import FileResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
 from .common.config import config
+from .common.api_handler.api_handler import AsyncApiHandler
+from .common.metrics import metrics_registry
 from .prioc import prioc_router
 from .grid_generator import grid_generator_router
 from .limitations import limitations_router
@@ -22,7 +26,15 @@ logger.add(
     'hextech.log', colorize=False, backtrace=True, diagnose=True
 )
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await AsyncApiHandler.open_sessions()
+    yield
+    await AsyncApiHandler.close_sessions()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = ["*"]
 
@@ -46,6 +58,14 @@ async def get_logs():
         filename=f"hextech.log",
     )
 
+@app.get("/metrics")
+async def get_metrics() -> dict:
+    """
+    Get app runtime counters
+    """
+
+    return metrics_registry.collect()
+
 app.include_router(prioc_router, prefix=config.get("FASTAPI_PREFIX"))
 app.include_router(grid_generator_router, prefix=config.get("FASTAPI_PREFIX"))
 app.include_router(limitations_router, prefix=config.get("FASTAPI_PREFIX"))
@@ -1,4 +1,4 @@
-from . hexes_dto import HexesDTO
+from . hexes_dto import HexesDTO, PriocObjectType
 from .territory_dto import TerritoryDTO
 
 prioc_objects_types = [
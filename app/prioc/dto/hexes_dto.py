@@ -2,6 +2,17 @@ from pydantic import BaseModel, Field
 from typing import Literal
 
 
+PriocObjectType = Literal[
+    "Медицинский комплекс",
+    "Бизнес-кластер",
+    "Пром объект",
+    "Логистическо-складской комплекс",
+    "Порт",
+    "Кампус университетский",
+    "Тур база",
+]
+
+
 class HexesDTO(BaseModel):
 
     territory_id: int = Field(
@@ -10,16 +21,41 @@ class HexesDTO(BaseModel):
         description="Territory id to calculate hexes priority"
     )
 
-    object_type: Literal[
-        "Медицинский комплекс",
-        "Бизнес-кластер",
-        "Пром объект",
-        "Логистическо-складской комплекс",
-        "Порт",
-        "Кампус университетский",
-        "Тур база",
-    ] = Field(
+    object_type: PriocObjectType = Field(
         ...,
         examples=["Тур база"],
         description="Possible object to place in territory"
     )
+
+    bbox: str | None = Field(
+        None,
+        pattern=r"^\s*-?\d+(\.\d+)?(\s*,\s*-?\d+(\.\d+)?){3}\s*$",
+        examples=["30.1,59.8,30.5,60.0"],
+        description="Bounds in 4326 crs as minx,miny,maxx,maxy to return only hexes intersecting them"
+    )
+
+    limit: int | None = Field(
+        None,
+        gt=0,
+        examples=[1000],
+        description="Maximum number of hexes or clusters to return"
+    )
+
+    top_k: int | None = Field(
+        None,
+        gt=0,
+        examples=[100],
+        description="Number of hexes or clusters with the highest estimation to return in descending order"
+    )
+
+    min_score: float | None = Field(
+        None,
+        examples=[0.5],
+        description="Minimum estimation value of returned hexes or clusters"
+    )
+
+    @property
+    def bbox_bounds(self) -> tuple[float, float, float, float] | None:
+        if self.bbox is None:
+            return None
+        return tuple(float(value) for value in self.bbox.split(","))
@@ -1,10 +1,11 @@
-import json
 from typing import Annotated
 
 from loguru import logger
 from fastapi import APIRouter, Depends
+from fastapi.responses import Response
 
-from .dto import HexesDTO, TerritoryDTO, prioc_objects_types
+from app.common.responses import LayerFormat, get_layer_format, layer_response
+from .dto import HexesDTO, PriocObjectType, TerritoryDTO, prioc_objects_types
 from .services import prioc_service
 
 
@@ -18,8 +19,9 @@ async def get_prioc_objects_list():
 @prioc_router.get("/object")
 # @decorators.gdf_to_geojson
 async def get_object_hexes(
-        hex_params: Annotated[HexesDTO, Depends(HexesDTO)]
-) -> dict:
+        hex_params: Annotated[HexesDTO, Depends(HexesDTO)],
+        layer_format: Annotated[LayerFormat, Depends(get_layer_format)],
+) -> Response:
     """
     Calculate hexes to place priority objects with estimation value
     """
@@ -27,12 +29,13 @@ async def get_object_hexes(
     logger.info(f"Starting /prioc/object with prams {hex_params.__dict__}")
     result = await prioc_service.get_hexes_for_object(hex_params)
     logger.info(f"Finished /prioc/object with prams {hex_params.__dict__}")
-    return json.loads(result.to_json(to_wgs84=True))
+    return await layer_response(result, layer_format, to_wgs84=True)
 
 @prioc_router.get("/cluster")
 async def get_hexes_clusters(
-        hex_params: Annotated[HexesDTO, Depends(HexesDTO)]
-) -> dict:
+        hex_params: Annotated[HexesDTO, Depends(HexesDTO)],
+        layer_format: Annotated[LayerFormat, Depends(get_layer_format)],
+) -> Response:
     """
     Calculate hexes clusters to place priority objects with estimation value
     """
@@ -40,7 +43,23 @@ async def get_hexes_clusters(
     logger.info(f"Starting /prioc/cluster with prams {hex_params.__dict__}")
     result = await prioc_service.get_hex_clusters_for_object(hex_params)
     logger.info(f"Finished /prioc/cluster with prams {hex_params.__dict__}")
-    return json.loads(result.to_json(to_wgs84=True))
+    return await layer_response(result, layer_format, to_wgs84=True)
+
+@prioc_router.get("/tiles/{object_type}/{z}/{x}/{y}.mvt")
+async def get_object_hexes_tile(
+        territory_id: int,
+        object_type: PriocObjectType,
+        z: int,
+        x: int,
+        y: int,
+) -> Response:
+    """
+    Get vector tile of hexes to place priority objects with estimation value
+    """
+
+    hex_params = HexesDTO(territory_id=territory_id, object_type=object_type)
+    result = await prioc_service.get_object_tile(hex_params, z, x, y)
+    return Response(result, media_type="application/vnd.mapbox-vector-tile")
 
 @prioc_router.post("/territory")
 async def get_territory_value(
@@ -1,10 +1,18 @@
 import asyncio
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import shapely
 from shapely.geometry import shape
 
 from app.common import config, urban_api_handler
+from app.common.api_handler.response_cache import ResponseCache
+from app.common.api_handler.single_flight import SingleFlight
+from app.common.h3_indexer import h3_indexer
+from app.common.metrics import metrics_registry
+
+from .hex_layer_parser import hex_layer_parser
 
 bucket_name = config.get("FILESERVER_BUCKET_NAME")
 lo_hexes_filename= config.get("FILESERVER_LO_NAME")
@@ -25,12 +33,16 @@ class HexApiService:
             territory_url="/api/v1/territory",
             scenarios_url="/api/v1/scenarios",
             physical="/api/v1/physical_objects/around",
+            hexes_cache_size=512 * 1024 * 1024,
+            hexes_cache_ttl=3600,
     ):
         """
         Initialization function
 
         Args:
             territory_url (string): Base URL for requests
+            hexes_cache_size (int): Maximum size of cached hexagons layers in bytes. Default to 512 MB
+            hexes_cache_ttl (float): Seconds to keep cached hexagons layer. Default to 3600
 
         Returns:
             None
@@ -40,34 +52,178 @@ class HexApiService:
         self.extractor = urban_api_handler
         self.scenarios_url = scenarios_url
         self.physical = physical
+        self.hexes_single_flight = SingleFlight()
+        self.hexes_cache = ResponseCache(hexes_cache_size)
+        self.hexes_cache_ttl = hexes_cache_ttl
+        self._scenarios_versions: dict[int, int] = {}
+        metrics_registry.register("hexes_layer_single_flight", self.hexes_single_flight.stats)
+        metrics_registry.register("hexes_layer_cache", self.hexes_cache.stats)
 
     # ToDo make more flexible
     async  def get_hexes_with_indicators_by_territory(
+            self,
+            regional_scenario_id: int,
+            projected: bool = False,
+    ) -> gpd.GeoDataFrame:
+        """
+        Function retrieves hexagons layer with indicators.
+        Parsed layers are cached by scenario, concurrent calls for the same scenario share one download and parsing.
+        Args:
+            regional_scenario_id (int): Regional scenario ID
+            projected (bool): If True returns layer in local utm crs. Default to False
+        Returns:
+            gpd.GeoDataFrame: Hexagons with indicators values as layers attributes in 4326 or local crs
+        """
+
+        hexes, _, _ = await self.get_indexed_hexes_by_territory(regional_scenario_id, projected)
+        return hexes.copy()
+
+    async def get_indexed_hexes_by_territory(
+            self,
+            regional_scenario_id: int,
+            projected: bool = False,
+    ) -> tuple[gpd.GeoDataFrame, shapely.STRtree, str]:
+        """
+        Function retrieves cached hexagons layer with indicators, its spatial index and indicators version
+        without copying data. Layer attributes values are read-only and shared between callers,
+        every caller gets its own shallow frame copy, so columns and crs can be changed without affecting cache.
+        Args:
+            regional_scenario_id (int): Regional scenario ID
+            projected (bool): If True returns layer in local utm crs. Default to False
+        Returns:
+            tuple[gpd.GeoDataFrame, shapely.STRtree, str]: Hexagons with indicators values, STRtree of their
+            geometries and indicators values version calculated once on layer loading
+        """
+
+        key = f"{regional_scenario_id}/{'local' if projected else 4326}"
+        result, state = self.hexes_cache.lookup(key, self.hexes_cache_ttl)
+        if state is None:
+            result = await self.hexes_single_flight.do(
+                key,
+                lambda: self._load_and_cache_hexes(regional_scenario_id, projected),
+            )
+        hexes, hexes_tree, indicators_version = result
+        return hexes.copy(deep=False), hexes_tree, indicators_version
+
+    @staticmethod
+    def read_only_layer(
+            hexes: gpd.GeoDataFrame,
+    ) -> gpd.GeoDataFrame:
+        """
+        Function rebuilds layer with read-only attributes values arrays, so values can't be changed in place
+        by any of callers sharing the layer
+        Args:
+            hexes (gpd.GeoDataFrame): Hexagons layer
+        Returns:
+            gpd.GeoDataFrame: Layer with the same data and read-only attributes values
+        """
+
+        columns = {}
+        for column in hexes.columns:
+            if column == hexes.geometry.name:
+                columns[column] = hexes.geometry.values
+                continue
+            values = hexes[column].to_numpy(copy=True)
+            values.flags.writeable = False
+            columns[column] = values
+        return gpd.GeoDataFrame(columns, geometry=hexes.geometry.name, crs=hexes.crs, index=hexes.index, copy=False)
+
+    @staticmethod
+    def query_bbox(
+            hexes: gpd.GeoDataFrame,
+            hexes_tree: shapely.STRtree,
+            bounds: tuple[float, float, float, float],
+    ) -> np.ndarray:
+        """
+        Function searches hexagons intersecting bounds with layer spatial index
+        Args:
+            hexes (gpd.GeoDataFrame): Hexagons layer
+            hexes_tree (shapely.STRtree): STRtree of hexagons layer geometries
+            bounds (tuple[float, float, float, float]): Bounds in 4326 crs as minx, miny, maxx, maxy
+        Returns:
+            np.ndarray: Sorted positions of hexagons in layer
+        """
+
+        area = gpd.GeoSeries([shapely.box(*bounds)], crs=4326)
+        if not hexes.crs.equals(4326):
+            area = area.segmentize(0.01).to_crs(hexes.crs)
+        return np.sort(hexes_tree.query(area.iloc[0], predicate="intersects"))
+
+    def invalidate_scenario(
+            self,
+            regional_scenario_id: int,
+    ) -> int:
+        """
+        Function drops cached hexagons layers for scenario, e.g. after writing new indicators values
+        Args:
+            regional_scenario_id (int): Regional scenario ID
+        Returns:
+            int: Number of dropped layers
+        """
+
+        self._scenarios_versions[regional_scenario_id] = self._scenarios_versions.get(regional_scenario_id, 0) + 1
+        return self.hexes_cache.invalidate(f"{regional_scenario_id}/")
+
+    async def _load_and_cache_hexes(
+            self,
+            regional_scenario_id: int,
+            projected: bool,
+    ) -> tuple[gpd.GeoDataFrame, shapely.STRtree, str]:
+        """
+        Function loads hexagons layer, builds its spatial index, calculates indicators version and puts them to cache
+        if scenario was not invalidated during loading
+        Args:
+            regional_scenario_id (int): Regional scenario ID
+            projected (bool): If True reprojects layer to local utm crs
+        Returns:
+            tuple[gpd.GeoDataFrame, shapely.STRtree, str]: Hexagons with indicators values, STRtree of their
+            geometries and indicators values version
+        """
+
+        version = self._scenarios_versions.get(regional_scenario_id, 0)
+        if projected:
+            hexes, _, indicators_version = await self.get_indexed_hexes_by_territory(regional_scenario_id)
+            hexes = await asyncio.to_thread(lambda: hexes.to_crs(hexes.estimate_utm_crs()))
+        else:
+            hexes = await self._load_hexes_with_indicators(regional_scenario_id)
+            indicators_version = await asyncio.to_thread(
+                hex_layer_parser.indicators_version, hexes, indicators_names
+            )
+        hexes = await asyncio.to_thread(self.read_only_layer, hexes)
+        hexes_tree = await asyncio.to_thread(shapely.STRtree, hexes.geometry.values)
+        if version == self._scenarios_versions.get(regional_scenario_id, 0):
+            layer_size = int(
+                hexes.drop(columns="geometry").memory_usage(deep=True).sum()
+                + shapely.get_num_coordinates(hexes.geometry.values).sum() * 16
+            )
+            self.hexes_cache.set(
+                f"{regional_scenario_id}/{'local' if projected else 4326}",
+                (hexes, hexes_tree, indicators_version),
+                layer_size,
+            )
+        return hexes, hexes_tree, indicators_version
+
+    async def _load_hexes_with_indicators(
             self,
             regional_scenario_id: int
     ) -> gpd.GeoDataFrame:
         """
-        Function retrieves hexagons layer with indicators
+        Function downloads and parses hexagons layer with indicators
         Args:
             regional_scenario_id (int): Regional scenario ID
         Returns:
-            gpd.GeoDataFrame: Hexagons with indicators values as layers attributes in 4326 crs
+            gpd.GeoDataFrame: Hexagons with indicators values as layers attributes
+            and H3 cells indexes in "h3_index" column if layer is H3 grid in 4326 crs
         """
 
         url = f"{self.scenarios_url}/{regional_scenario_id}/indicators_values/hexagons"
         response = await self.extractor.get(
             extra_url=url,
         )
-        gdf = gpd.GeoDataFrame.from_features(response, crs=4326)
-        df_records = await asyncio.to_thread(
-            gdf["indicators"].apply,
-            func=lambda x: {i["name_full"] : i["value"] if i else None for i in x},
-        )
-        indicators_df = pd.DataFrame.from_records(df_records)
-        keep_columns = ["geometry", "hexagon_id"] + indicators_names
-        result = pd.concat([gdf, indicators_df], axis=1)
-        result = result[keep_columns]
-        result.dropna(inplace=True)
+        result = await asyncio.to_thread(hex_layer_parser.parse, response, indicators_names)
+        cells = await asyncio.to_thread(h3_indexer.cells_from_hexagons, result)
+        if cells is not None:
+            result = result.assign(h3_index=cells)
         return result
 
     async def get_positive_service_by_territory_id(
@@ -119,6 +275,7 @@ class HexApiService:
             service_type_ids (list[int]): Service type ids for retrieving
         Returns:
             gpd.GeoDataFrame: Services centroids with indicators values as layers attributes
+            and service type id in "service_type_id" column
         """
 
         url = f"{self.territory_url}/{territory_id}/services_geojson"
@@ -135,6 +292,7 @@ class HexApiService:
             )
 
             current_gdf = gpd.GeoDataFrame.from_features(response)
+            current_gdf["service_type_id"] = service_type_id
             result_gdf = pd.concat([result_gdf, current_gdf])
 
         if isinstance(result_gdf, gpd.GeoDataFrame):
@@ -167,4 +325,7 @@ class HexApiService:
         return response["results"][0]["base_scenario"]["id"]
 
 
-hex_api_getter = HexApiService()
+hex_api_getter = HexApiService(
+    hexes_cache_size=int(config.get("HEXES_CACHE_SIZE_MB", "512")) * 1024 * 1024,
+    hexes_cache_ttl=float(config.get("HEXES_CACHE_TTL", "3600")),
+)
@@ -1,6 +1,10 @@
 import geopandas as gpd
+import h3
+import numpy as np
 import pandas as pd
 
+from app.common import config
+from app.common.h3_indexer import h3_indexer
 from app.prioc.services.constants.constants import OBJECT_INDICATORS_MIN_VAL
 
 
@@ -9,8 +13,90 @@ class HexCleaner:
     Class for cleaning hex data from inappropriate hexagons.
     """
 
+    def __init__(
+            self,
+            k_ring: int = 1,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            k_ring (int): Number of neighbour hexes rings to exclude around negative services. Default to 1
+
+        Returns:
+            None
+        """
+
+        self.k_ring = k_ring
+
+    def negative_mask(
+            self,
+            hexagons: gpd.GeoDataFrame,
+            negative_services: gpd.GeoDataFrame,
+            k_ring: int | None = None,
+    ) -> np.ndarray:
+        """
+        Function detects hexes not containing services and not within k rings of neighbours around them.
+        H3 cells indexes are used if layer is H3 grid, otherwise neighbours are found with geometry predicates.
+
+        Args:
+            hexagons (gpd.GeoDataFrame): hexes
+            negative_services (gpd.GeoDataFrame): services to exclude
+            k_ring (int | None): Number of neighbour rings to exclude. Default to HexCleaner k_ring
+
+        Returns:
+            np.ndarray: boolean mask of hexes to keep in hexagons order
+        """
+
+        if k_ring is None:
+            k_ring = self.k_ring
+        if negative_services.empty:
+            return np.ones(len(hexagons), dtype=bool)
+        cells = h3_indexer.layer_cells(hexagons)
+        if cells is None:
+            return self.negative_geometry_mask(hexagons, negative_services, k_ring)
+        resolution = h3.get_resolution(cells[0])
+        services_cells = set(h3_indexer.points_to_cells(negative_services.geometry, resolution))
+        excluded_cells = set()
+        for service_cell in services_cells:
+            excluded_cells.update(h3.grid_disk(service_cell, k_ring))
+        return ~pd.Series(cells).isin(excluded_cells).to_numpy()
+
     @staticmethod
+    def negative_geometry_mask(
+            hexagons: gpd.GeoDataFrame,
+            negative_services: gpd.GeoDataFrame,
+            k_ring: int = 1,
+    ) -> np.ndarray:
+        """
+        Function detects hexes not containing services and not within k rings of touching neighbours around them
+
+        Args:
+            hexagons (gpd.GeoDataFrame): hexes
+            negative_services (gpd.GeoDataFrame): services to exclude
+            k_ring (int): Number of neighbour rings to exclude. Default to 1
+
+        Returns:
+            np.ndarray: boolean mask of hexes to keep in hexagons order
+        """
+
+        mask = np.ones(len(hexagons), dtype=bool)
+        if negative_services.empty:
+            return mask
+        _, ring_positions = hexagons.sindex.query(negative_services.geometry, predicate="intersects")
+        ring_positions = np.unique(ring_positions)
+        mask[ring_positions] = False
+        for _ in range(k_ring):
+            _, neighbour_positions = hexagons.sindex.query(
+                hexagons.geometry.values[ring_positions], predicate="touches"
+            )
+            neighbour_positions = np.unique(neighbour_positions)
+            ring_positions = neighbour_positions[mask[neighbour_positions]]
+            mask[ring_positions] = False
+        return mask
+
     async def negative_clean(
+            self,
             hexagons: gpd.GeoDataFrame,
             negative_services: gpd.GeoDataFrame,
     ) -> gpd.GeoDataFrame:
@@ -27,23 +113,33 @@ class HexCleaner:
 
         if negative_services.empty:
             return hexagons
+        return hexagons[self.negative_mask(hexagons, negative_services)].copy()
 
-        negative_services["is_service"] = 1
-        service_hexes = hexagons.sjoin(negative_services)
-        service_hexes = service_hexes[service_hexes["is_service"] == 1].drop_duplicates("geometry")
-        drop_list = service_hexes.index.to_list()
+    @staticmethod
+    def positive_mask(
+            hexagons: gpd.GeoDataFrame,
+            positive_objects: gpd.GeoDataFrame,
+    ) -> np.ndarray:
+        """
+        Function detects hexes intersecting objects
 
-        for index, row in service_hexes.iterrows():
-            current_hex_geom = row['geometry']
-            neighbours = hexagons[current_hex_geom.touches(hexagons.geometry)]
-            drop_list = drop_list + neighbours.index.to_list()
+        Args:
+            hexagons (gpd.GeoDataFrame): hexes
+            positive_objects (gpd.GeoDataFrame): objects to include
 
-        drop_list = list(set(drop_list))
-        cleaned = hexagons[~hexagons.index.isin(drop_list)].copy()
-        return cleaned
+        Returns:
+            np.ndarray: boolean mask of hexes to keep in hexagons order
+        """
+
+        if positive_objects.empty:
+            return np.ones(len(hexagons), dtype=bool)
+        mask = np.zeros(len(hexagons), dtype=bool)
+        _, object_hexes_positions = hexagons.sindex.query(positive_objects.geometry, predicate="intersects")
+        mask[object_hexes_positions] = True
+        return mask
 
-    @staticmethod
     async def positive_clean(
+            self,
             hexagons: gpd.GeoDataFrame,
             positive_objects: gpd.GeoDataFrame,
     ) -> gpd.GeoDataFrame:
@@ -58,13 +154,9 @@ class HexCleaner:
             gpd.GeoDataFrame: cleaned hexes
         """
 
-        positive_objects["service_id"] = True
         if positive_objects.empty:
             return hexagons
-        cleaned_hexes = gpd.sjoin(positive_objects, hexagons, how='right')
-        cleaned_hexes.dropna(subset="service_id", inplace=True)
-
-        return cleaned_hexes
+        return hexagons[self.positive_mask(hexagons, positive_objects)].copy()
 
     @staticmethod
     async def clean_estimation_dict_by_territory(
@@ -101,7 +193,28 @@ class HexCleaner:
         return False
 
     @staticmethod
+    def min_object_val_mask(
+            hexagons: gpd.GeoDataFrame,
+            object_name: str
+    ) -> np.ndarray:
+        """
+        Function detects hexagons without tiny indicators values
+
+        Args:
+            hexagons (gpd.GeoDataFrame): hexes
+            object_name (str): object name
+
+        Returns:
+            np.ndarray: boolean mask of hexes to keep in hexagons order
+        """
+
+        min_map = OBJECT_INDICATORS_MIN_VAL[object_name]
+        values = hexagons[list(min_map.keys())].to_numpy(dtype=np.float64, na_value=np.nan)
+        thresholds = np.fromiter(min_map.values(), dtype=np.float64, count=len(min_map))
+        return ~(values < thresholds).any(axis=1)
+
     def clean_by_min_object_val(
+            self,
             hexagons: gpd.GeoDataFrame,
             object_name: str
     ) -> gpd.GeoDataFrame:
@@ -116,22 +229,7 @@ class HexCleaner:
             gpd.GeoDataFrame: cleaned hexes
         """
 
-        def clean_row(
-                row: pd.Series,
-                min_map: dict[str, int],
-        ) -> bool:
-
-            for key in list(min_map.keys()):
-                if row[key] < min_map[key]:
-                    return False
-            return True
-
-        values = OBJECT_INDICATORS_MIN_VAL[object_name]
-        hexagons = hexagons.copy()
-        hexagons["mask"] = hexagons.apply(clean_row, min_map=values, axis=1)
-        hexagons = hexagons[hexagons["mask"] > 0]
-        hexagons.drop(columns="mask", inplace=True)
-        return hexagons
+        return hexagons[self.min_object_val_mask(hexagons, object_name)].copy()
 
 
-hex_cleaner = HexCleaner()
+hex_cleaner = HexCleaner(k_ring=int(config.get("NEGATIVE_CLEANING_K_RING", "1")))
@@ -1,11 +1,15 @@
 import asyncio
 
 import geopandas as gpd
+import h3
 import numpy as np
 import hdbscan
-import networkx as nx
 import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from shapely.geometry import shape
 
+from app.common.h3_indexer import h3_indexer
 from app.prioc.services.constants.constants import INDICATORS_WEIGHTS
 
 
@@ -16,7 +20,8 @@ class HexEstimator:
 
     def __init__(self):
         """
-        Initialisation function for HexEstimator
+        Initialisation function for HexEstimator.
+        Precomputes rank based (indicators x objects) weights matrix from INDICATORS_WEIGHTS.
         """
 
         self.clusterer = hdbscan.HDBSCAN(
@@ -24,9 +29,28 @@ class HexEstimator:
             min_samples=3,
             max_cluster_size=15
         )
+        self.objects_names = list(INDICATORS_WEIGHTS.keys())
+        self.indicators_names = list(
+            dict.fromkeys(indicator for ranks in INDICATORS_WEIGHTS.values() for indicator in ranks.keys())
+        )
+        self.weights_matrix = np.zeros((len(self.indicators_names), len(self.objects_names)), dtype=np.float64)
+        for object_index, ranks in enumerate(INDICATORS_WEIGHTS.values()):
+            n = len(ranks)
+            denominator = sum([n - rank + 1 for rank in ranks.values()])
+            for indicator, rank in ranks.items():
+                indicator_index = self.indicators_names.index(indicator)
+                self.weights_matrix[indicator_index, object_index] = (n - rank + 1) / denominator
+
+    def _indicators_values(
+            self,
+            hexagons: gpd.GeoDataFrame,
+    ) -> np.ndarray:
+        return hexagons.reindex(columns=self.indicators_names, fill_value=0).to_numpy(
+            dtype=np.float64, na_value=np.nan
+        )
 
-    @staticmethod
     async def weight_hexes(
+            self,
             hexagons: gpd.GeoDataFrame,
             service_name: str
     ) -> gpd.GeoDataFrame:
@@ -41,28 +65,126 @@ class HexEstimator:
             gpd.GeoDataFrame: GeoDataFrame with weighted hexagons
         """
 
-        hexagons["weighted_sum"] = None
-        indicators_names = list(INDICATORS_WEIGHTS[service_name].keys())
-        ranks = INDICATORS_WEIGHTS[service_name]
-        n = len(ranks)
-        weights = {}
-        for indicator, rank in ranks.items():
-            denominator = sum([n - rank + 1 for rank in ranks.values()])
-            weights[indicator] = (n - rank + 1) / denominator
-        for index, row in hexagons.iterrows():
-            total_score = 0
-            for indicator_name in row.keys():
-                if indicator_name in indicators_names:
-                    weight = weights[indicator_name]
-                    score = row[indicator_name]
-                    total_score += score * weight
-                    hexagons.at[index, "weighted_sum"] = total_score
-
+        weights = self.weights_matrix[:, self.objects_names.index(service_name)]
+        hexagons["weighted_sum"] = self._indicators_values(hexagons) @ weights
         return hexagons
 
-    # ToDo rewrite and make faster
+    async def weight_hexes_for_objects(
+            self,
+            hexagons: gpd.GeoDataFrame,
+            objects_names: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Function calculates hexagons weighted estimations for several objects with one matrix multiplication
+
+        Args:
+            hexagons (gpd.GeoDataFrame): GeoDataFrame with hexagons indicators
+            objects_names (list[str] | None): Names of objects. Default to all objects from INDICATORS_WEIGHTS
+
+        Returns:
+            pd.DataFrame: Weighted estimations with objects names as columns and hexagons index
+        """
+
+        if objects_names is None:
+            objects_names = self.objects_names
+        objects_indexes = [self.objects_names.index(object_name) for object_name in objects_names]
+        weighted = self._indicators_values(hexagons) @ self.weights_matrix[:, objects_indexes]
+        return pd.DataFrame(weighted, index=hexagons.index, columns=objects_names)
+
+    @staticmethod
+    def _adjacency_pairs(
+            hexagons: gpd.GeoDataFrame,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Function finds all pairs of neighbour hexagons with H3 neighbours lookup
+        or with one bulk spatial index query for non H3 layers
+
+        Args:
+            hexagons (gpd.GeoDataFrame): GeoDataFrame with hexagons
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: positions of neighbour hexagons pairs
+        """
+
+        cells = h3_indexer.layer_cells(hexagons)
+        if cells is None:
+            return hexagons.sindex.query(hexagons.geometry, predicate="touches")
+        positions = {cell: position for position, cell in enumerate(cells)}
+        left, right = [], []
+        for position, cell in enumerate(cells):
+            for neighbour in h3.grid_disk(cell, 1):
+                neighbour_position = positions.get(neighbour)
+                if neighbour_position is not None and neighbour_position != position:
+                    left.append(position)
+                    right.append(neighbour_position)
+        return np.array(left, dtype=np.int64), np.array(right, dtype=np.int64)
+
+    def _largest_components_mask(
+            self,
+            clustered_hexagons: gpd.GeoDataFrame,
+    ) -> np.ndarray:
+        """
+        Function detects the biggest group of neighbour hexagons in every cluster
+
+        Args:
+            clustered_hexagons (gpd.GeoDataFrame): GeoDataFrame with clustered hexagons
+
+        Returns:
+            np.ndarray: boolean mask of hexagons in the biggest group of their cluster
+        """
+
+        hexes_num = len(clustered_hexagons)
+        clusters = clustered_hexagons["cluster"].to_numpy()
+        left, right = self._adjacency_pairs(clustered_hexagons)
+        same_cluster = clusters[left] == clusters[right]
+        left, right = left[same_cluster], right[same_cluster]
+        adjacency = csr_matrix(
+            (np.ones(len(left), dtype=np.int8), (left, right)),
+            shape=(hexes_num, hexes_num),
+        )
+        _, components = connected_components(adjacency, directed=False)
+        components_sizes = np.bincount(components)
+        hexes_components = pd.DataFrame(
+            {
+                "cluster": clusters,
+                "component": components,
+                "size": components_sizes[components],
+            }
+        )
+        hexes_components = hexes_components[hexes_components["size"] > 1]
+        largest = hexes_components.sort_values("size", ascending=False, kind="stable").drop_duplicates("cluster")
+        return np.isin(components, largest["component"].to_numpy())
+
     @staticmethod
+    def _dissolve_clusters(
+            grouped: gpd.GeoDataFrame,
+    ) -> gpd.GeoDataFrame:
+        """
+        Function unites clusters hexagons in one geometry with mean attributes values.
+        Geometry is built from H3 cells outline, GEOS union is used only for non H3 layers.
+
+        Args:
+            grouped (gpd.GeoDataFrame): GeoDataFrame with clustered hexagons
+
+        Returns:
+            gpd.GeoDataFrame: GeoDataFrame with united clusters and cluster as index
+        """
+
+        cells = h3_indexer.layer_cells(grouped)
+        grouped = grouped.drop(columns=["h3_index"], errors="ignore")
+        if cells is None:
+            return grouped.dissolve(by=["cluster"], aggfunc="mean")
+        attributes = pd.DataFrame(grouped.drop(columns="geometry")).groupby("cluster").mean(numeric_only=True)
+        clusters_cells = pd.Series(cells, index=grouped.index).groupby(grouped["cluster"]).agg(list)
+        geometries = gpd.GeoSeries(
+            [shape(h3.cells_to_geo(cluster_cells)) for cluster_cells in clusters_cells.loc[attributes.index]],
+            index=attributes.index,
+            crs=4326,
+        ).to_crs(grouped.crs)
+        return gpd.GeoDataFrame(attributes, geometry=geometries)
+
     async def clarify_clusters(
+            self,
             clustered_hexagons: gpd.GeoDataFrame
     ) -> gpd.GeoDataFrame:
         """
@@ -76,22 +198,10 @@ class HexEstimator:
         """
         if len(clustered_hexagons["cluster"].unique()) == 1:
             return clustered_hexagons
-        grouped = gpd.GeoDataFrame()
-        for cluster in list(clustered_hexagons.cluster.unique()):
-            tmp_gdf = clustered_hexagons[clustered_hexagons.cluster == cluster]
-            G = nx.Graph()
-            for i, poly in enumerate(tmp_gdf["geometry"]):
-                for j, poly2 in enumerate(tmp_gdf["geometry"]):
-                    if i != j and poly.touches(poly2):
-                        G.add_edge(i, j)
-
-            components = list(nx.connected_components(G))
-            if components:
-                largest_component = max(components, key=len)
-                largest_geometries = tmp_gdf.iloc[list(largest_component)]
-                grouped = pd.concat([grouped, largest_geometries])
-
-        dissolved = grouped.dissolve(by=["cluster"], aggfunc="mean")
+        largest_mask = await asyncio.to_thread(self._largest_components_mask, clustered_hexagons)
+        grouped = clustered_hexagons[largest_mask].copy()
+
+        dissolved = await asyncio.to_thread(self._dissolve_clusters, grouped)
         dissolved.drop(columns=["X", "Y"], inplace=True)
         dissolved["cluster"] = dissolved.index.copy()
         dissolved.reset_index(inplace=True, drop=True)
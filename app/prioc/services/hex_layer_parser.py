@@ -0,0 +1,120 @@
+import hashlib
+from itertools import chain
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import shape
+
+
+class HexLayerParser:
+    """
+    Class for parsing urban_api hexagons with indicators FeatureCollection into columnar layer
+    """
+
+    def __init__(
+            self,
+            chunk_size: int = 10000,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            chunk_size (int): Number of polygons built from one coordinates buffer. Default to 10000
+
+        Returns:
+            None
+        """
+
+        self.chunk_size = chunk_size
+
+    def parse(
+            self,
+            feature_collection: dict,
+            indicators_names: list[str],
+    ) -> gpd.GeoDataFrame:
+        """
+        Function reads hexagons FeatureCollection once filling preallocated columns.
+        Simple polygons geometries are built in bulk, other geometries are built one by one.
+        Hexagons without id, geometry or any of indicators values are dropped,
+        indicators with only integer values are returned as integer columns.
+
+        Args:
+            feature_collection (dict): FeatureCollection with "hexagon_id" and "indicators" list in properties
+            indicators_names (list[str]): Indicators full names to extract as columns
+
+        Returns:
+            gpd.GeoDataFrame: Layer with geometry, hexagon_id and indicators columns in 4326 crs
+        """
+
+        features = feature_collection["features"]
+        features_num = len(features)
+        indicators_num = len(indicators_names)
+        columns_positions = {name: position for position, name in enumerate(indicators_names)}
+        hexagons_ids = [None] * features_num
+        values = np.full((features_num, indicators_num), np.nan)
+        geometries = np.full(features_num, None, dtype=object)
+        rings = []
+        rings_positions = []
+        for position, feature in enumerate(features):
+            properties = feature["properties"]
+            hexagons_ids[position] = properties.get("hexagon_id")
+            row = values[position]
+            for indicator in properties.get("indicators") or ():
+                column_position = columns_positions.get(indicator["name_full"])
+                if column_position is not None and indicator["value"] is not None:
+                    row[column_position] = indicator["value"]
+            geometry = feature["geometry"]
+            if geometry is None:
+                continue
+            coordinates = geometry["coordinates"]
+            if geometry["type"] == "Polygon" and len(coordinates) == 1 and len(coordinates[0][0]) == 2:
+                rings.append(coordinates[0])
+                rings_positions.append(position)
+            else:
+                geometries[position] = shape(geometry)
+        values = values.T
+        hexagons_ids = np.array(hexagons_ids, dtype=np.float64)
+
+        for chunk_start in range(0, len(rings), self.chunk_size):
+            chunk = rings[chunk_start:chunk_start + self.chunk_size]
+            lengths = np.fromiter((len(ring) for ring in chunk), dtype=np.int32, count=len(chunk))
+            flat_coordinates = np.fromiter(
+                chain.from_iterable(chain.from_iterable(chunk)),
+                dtype=np.float64,
+                count=int(lengths.sum()) * 2,
+            ).reshape(-1, 2)
+            linear_rings = shapely.linearrings(flat_coordinates, indices=np.repeat(np.arange(len(chunk)), lengths))
+            geometries[rings_positions[chunk_start:chunk_start + self.chunk_size]] = shapely.polygons(linear_rings)
+
+        keep = ~np.isnan(hexagons_ids) & ~np.isnan(values).any(axis=0) & ~pd.isna(geometries)
+        columns = {"hexagon_id": hexagons_ids[keep].astype(np.int64)}
+        for name, position in columns_positions.items():
+            column = values[position][keep]
+            columns[name] = column.astype(np.int64) if np.array_equal(column, np.trunc(column)) else column
+        result = gpd.GeoDataFrame(columns, geometry=geometries[keep], crs=4326)
+        return result[["geometry", "hexagon_id"] + indicators_names]
+
+    @staticmethod
+    def indicators_version(
+            hexagons: pd.DataFrame,
+            indicators_names: list[str],
+    ) -> str:
+        """
+        Function calculates version of hexagons indicators values.
+        Hexagons with missing indicators values are skipped as they are not present in urban_api layer.
+
+        Args:
+            hexagons (pd.DataFrame): Hexagons with "hexagon_id" and indicators columns
+            indicators_names (list[str]): Indicators names defining version
+
+        Returns:
+            str: Indicators values fingerprint
+        """
+
+        values = hexagons[["hexagon_id"] + indicators_names].dropna().sort_values("hexagon_id")
+        return hashlib.sha1(values.to_numpy(dtype=np.float64).tobytes()).hexdigest()
+
+
+hex_layer_parser = HexLayerParser()
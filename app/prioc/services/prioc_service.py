@@ -2,12 +2,21 @@ import math
 import asyncio
 
 import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
 from shapely.geometry import shape
 
+from app.common import config, http_exception
+from app.common.api_handler.response_cache import ResponseCache
+from app.common.api_handler.single_flight import SingleFlight
+from app.common.metrics import metrics_registry
+from app.common.vector_tiles import vector_tiles
 from app.prioc.dto.hexes_dto import HexesDTO
 from .hex_api_getter import  hex_api_getter
 from .hex_cleaner import hex_cleaner
 from .hex_estimator import hex_estimator
+from .rankings_storage import rankings_storage
 from .territory_estimator import territory_estimator
 from app.prioc.services.constants.constants import POSITIVE_SERVICE_CLEANING, NEGATIVE_SERVICE_CLEANING
 
@@ -15,67 +24,138 @@ from app.prioc.services.constants.constants import POSITIVE_SERVICE_CLEANING, NE
 class PriocService:
     """Class for handling priority objects calculations"""
 
+    def __init__(
+            self,
+            clusters_cache_size: int = 64 * 1024 * 1024,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            clusters_cache_size (int): Maximum size of cached territories clusters in bytes. Default to 64 MB
+
+        Returns:
+            None
+        """
+
+        self.clusters_cache = ResponseCache(clusters_cache_size)
+        self.clusters_single_flight = SingleFlight()
+        metrics_registry.register("prioc_clusters_cache", self.clusters_cache.stats)
+
     @staticmethod
+    def validate_bbox(
+            hex_params: HexesDTO,
+    ) -> tuple[float, float, float, float] | None:
+        """
+        Function checks query bbox bounds order
+
+        Args:
+            hex_params (HexesDTO): Hexes query parameters
+
+        Returns:
+            tuple[float, float, float, float] | None: Bounds in 4326 crs or None if bbox is not set
+
+        Raises:
+            HTTPException: 400 if minimum bounds are not less than maximum
+        """
+
+        bounds = hex_params.bbox_bounds
+        if bounds is not None and (bounds[0] >= bounds[2] or bounds[1] >= bounds[3]):
+            raise http_exception(
+                400,
+                msg="Invalid bbox",
+                _input=hex_params.bbox,
+                _detail="Expected minx,miny,maxx,maxy with minimum values less than maximum",
+            )
+        return bounds
+
     async def get_hexes_for_object(
+        self,
         hex_params: HexesDTO,
+        with_h3_index: bool = False,
     ) -> gpd.GeoDataFrame:
         """
-        Generate hexes with estimation for object use
+        Generate hexes with estimation for object use.
+        Estimation is taken from rankings artifact if scenario indicators were not changed since it was written,
+        otherwise it is calculated for whole territory and added to artifact.
+        Hexes in bbox are selected with spatial index of cached layer and best hexes are selected by estimation
+        before layer rows are taken, so only returned hexes are copied.
 
         Args:
             hex_params (HexesDTO): Hexes query parameters
+            with_h3_index (bool): If True keeps internal "h3_index" column used for clustering. Default to False
 
         Returns:
             gpd.GeoDataFrame: Layer with calculated hexes values
         """
 
+        bounds = self.validate_bbox(hex_params)
         regional_base_scenario = await hex_api_getter.get_regional_base_scenario(hex_params.territory_id)
-        hexes = await hex_api_getter.get_hexes_with_indicators_by_territory(regional_base_scenario)
-        hexes_local_crs = hexes.estimate_utm_crs()
-        hexes.to_crs(hexes_local_crs, inplace=True)
-        positive_services_list = POSITIVE_SERVICE_CLEANING.get(hex_params.object_type)
-        cleaned_hexes = hexes.copy()
-        if positive_services_list:
-            positive_services = await hex_api_getter.get_positive_service_by_territory_id(
-                gpd.GeoDataFrame(geometry=[hexes.union_all()], crs=hexes_local_crs).to_crs(4326).to_geo_dict()["features"][0]["geometry"],
+        hexes, hexes_tree, version = await hex_api_getter.get_indexed_hexes_by_territory(
+            regional_base_scenario, projected=True
+        )
+        ranking = await rankings_storage.get_ranking(regional_base_scenario, version, hex_params.object_type)
+        if ranking is None:
+            estimated_hexes = await self.get_hexes_for_object_from_gdf(
+                hexes=hexes.copy(),
+                territory_id=hex_params.territory_id,
+                object_type=hex_params.object_type,
             )
-            if not positive_services.empty:
-                positive_services.to_crs(hexes_local_crs, inplace=True)
-                cleaned_hexes = await hex_cleaner.positive_clean(
-                    cleaned_hexes,
-                    positive_services
-                )
-        negative_services_list = NEGATIVE_SERVICE_CLEANING.get(hex_params.object_type)
-        if negative_services_list:
-            negative_services = await hex_api_getter.get_negative_service_by_territory_id(
-                hex_params.territory_id,
-                negative_services_list
+            await rankings_storage.save_rankings(
+                regional_base_scenario,
+                version,
+                {hex_params.object_type: estimated_hexes[["hexagon_id", "weighted_sum"]]},
+                replace=False,
             )
-            if not negative_services.empty:
-                negative_services.to_crs(hexes_local_crs, inplace=True)
-                cleaned_hexes = await hex_cleaner.negative_clean(
-                    hexes,
-                    negative_services
-                )
-        cleaned_hexes = await asyncio.to_thread(
-            hex_cleaner.clean_by_min_object_val,
-            hexagons=cleaned_hexes,
-            object_name=hex_params.object_type,
-        )
+            ranking = estimated_hexes.set_index("hexagon_id")["weighted_sum"]
+        if bounds is not None:
+            hexes = hexes.iloc[hex_api_getter.query_bbox(hexes, hexes_tree, bounds)]
+        scores = hexes["hexagon_id"].map(ranking).to_numpy(dtype=np.float64, na_value=np.nan)
+        positions = self.select_best(scores, hex_params.top_k, hex_params.min_score)[:hex_params.limit]
+        if with_h3_index:
+            estimated_hexes = hexes.iloc[positions].copy()
+        else:
+            estimated_hexes = hexes.iloc[positions].drop(columns="h3_index", errors="ignore")
+        estimated_hexes["weighted_sum"] = scores[positions]
+        return estimated_hexes
 
-        estimated_hexes = await hex_estimator.weight_hexes(
-            cleaned_hexes,
-            hex_params.object_type
-        )
+    @staticmethod
+    def select_best(
+            scores: np.ndarray,
+            top_k: int | None = None,
+            min_score: float | None = None,
+    ) -> np.ndarray:
+        """
+        Function selects positions of estimated values with partial selection of top_k values
 
-        return estimated_hexes
+        Args:
+            scores (np.ndarray): Estimation values, NaN values are skipped
+            top_k (int | None): Number of the highest values to select. Default to None (all values)
+            min_score (float | None): Minimum value to select. Default to None
+
+        Returns:
+            np.ndarray: Positions in original order or in descending values order if top_k is set
+        """
+
+        selected = ~np.isnan(scores)
+        if min_score is not None:
+            selected &= scores >= min_score
+        positions = np.flatnonzero(selected)
+        if top_k is None:
+            return positions
+        if top_k < len(positions):
+            positions = positions[np.argpartition(-scores[positions], top_k - 1)[:top_k]]
+        return positions[np.argsort(-scores[positions], kind="stable")]
 
     async def get_hex_clusters_for_object(
             self,
             hex_params: HexesDTO,
     ) -> gpd.GeoDataFrame:
         """
-        Generate hex clusters with estimation for object use
+        Generate hex clusters with estimation for object use.
+        Clusters are built for whole territory and cached by scenario indicators version,
+        so clusters ids and shapes don't depend on bbox. Finished clusters are filtered by bbox
+        and estimation, then limited.
 
         Args:
             hex_params (HexesDTO): Hexes query parameters
@@ -84,15 +164,106 @@ class PriocService:
             gpd.GeoDataFrame: Layer with calculated hex clusters
         """
 
+        bounds = self.validate_bbox(hex_params)
+        regional_base_scenario = await hex_api_getter.get_regional_base_scenario(hex_params.territory_id)
+        _, _, version = await hex_api_getter.get_indexed_hexes_by_territory(regional_base_scenario, projected=True)
+        key = f"{regional_base_scenario}/{version}/{hex_params.object_type}"
+        clustered_hexes, state = self.clusters_cache.lookup(key, math.inf)
+        if state is None:
+            clustered_hexes = await self.clusters_single_flight.do(
+                key,
+                lambda: self._cluster_territory(key, hex_params.territory_id, hex_params.object_type),
+            )
+        if bounds is not None:
+            clustered_hexes = clustered_hexes.iloc[
+                np.sort(clustered_hexes.sindex.query(shapely.box(*bounds), predicate="intersects"))
+            ]
+        if hex_params.top_k is not None or hex_params.min_score is not None:
+            clustered_hexes = clustered_hexes.iloc[self.select_best(
+                clustered_hexes["weighted_sum"].to_numpy(dtype=np.float64, na_value=np.nan),
+                hex_params.top_k,
+                hex_params.min_score,
+            )]
+        return clustered_hexes.iloc[:hex_params.limit].copy()
+
+    async def _cluster_territory(
+            self,
+            key: str,
+            territory_id: int,
+            object_type: str,
+    ) -> gpd.GeoDataFrame:
+        """
+        Function clusters all territory hexes estimated for object use and puts clusters to cache
+
+        Args:
+            key (str): Clusters cache key
+            territory_id (int): Territory id
+            object_type (str): Object type as str
+
+        Returns:
+            gpd.GeoDataFrame: Territory clusters in 4326 crs
+        """
+
         estimated_hexes = await self.get_hexes_for_object(
-            hex_params
+            HexesDTO(territory_id=territory_id, object_type=object_type), with_h3_index=True
         )
-        clustered_hexes = await hex_estimator.cluster_hexes(
-            estimated_hexes
+        clustered_hexes = await hex_estimator.cluster_hexes(estimated_hexes)
+        clustered_hexes = clustered_hexes.drop(columns=["h3_index", "X", "Y"], errors="ignore")
+        clusters_size = int(
+            clustered_hexes.drop(columns="geometry").memory_usage(deep=True).sum()
+            + shapely.get_num_coordinates(clustered_hexes.geometry.values).sum() * 16
         )
-
+        self.clusters_cache.set(key, clustered_hexes, clusters_size)
         return clustered_hexes
 
+    async def get_object_tile(
+            self,
+            hex_params: HexesDTO,
+            z: int,
+            x: int,
+            y: int,
+    ) -> bytes:
+        """
+        Function returns vector tile of hexes estimated for object use.
+        Prepared layer is keyed by regional base scenario and its indicators version,
+        so new scenario or indicators values are served without waiting for layer ttl.
+
+        Args:
+            hex_params (HexesDTO): Hexes query parameters
+            z (int): Zoom level
+            x (int): Tile column
+            y (int): Tile row
+
+        Returns:
+            bytes: Mapbox Vector Tile with hexes and their estimation values
+        """
+
+        regional_base_scenario = await hex_api_getter.get_regional_base_scenario(hex_params.territory_id)
+        _, _, version = await hex_api_getter.get_indexed_hexes_by_territory(regional_base_scenario, projected=True)
+        source = await vector_tiles.get_source(
+            f"prioc/{hex_params.territory_id}/{regional_base_scenario}/{version}/{hex_params.object_type}",
+            lambda: self.get_hexes_for_object(
+                HexesDTO(territory_id=hex_params.territory_id, object_type=hex_params.object_type)
+            ),
+        )
+        return await vector_tiles.get_tile(source, z, x, y)
+
+    @staticmethod
+    def invalidate_tiles(
+            territory_id: int,
+    ) -> int:
+        """
+        Function drops cached tiles of territory hexes, e.g. after writing new indicators values
+
+        Args:
+            territory_id (int): Territory id
+
+        Returns:
+            int: Number of dropped layers and tiles
+        """
+
+        return vector_tiles.invalidate(f"prioc/{territory_id}/")
+
     #ToDO update to saving methods normally
     @staticmethod
     async def get_territory_estimation(
@@ -160,53 +331,85 @@ class PriocService:
 
 
     @staticmethod
-    async def get_hexes_for_object_from_gdf(
+    async def get_objects_masks(
             hexes: gpd.GeoDataFrame,
             territory_id: int,
-            object_type: str
-    ) -> gpd.GeoDataFrame:
+            objects_types: list[str],
+    ) -> pd.DataFrame:
         """
-        Generate hexes with estimation for object use
+        Function detects hexes acceptable for objects placement.
+        Water objects and negative services of all objects are retrieved once, negative masks are calculated
+        once for every distinct services set.
 
         Args:
-            hexes (gpd.GeoDataFrame): Hexes query parameters
+            hexes (gpd.GeoDataFrame): Hexes in local crs
             territory_id (int): Region territory id
-            object_type (str): Object type as str
+            objects_types (list[str]): Objects types as str
         Returns:
-            gpd.GeoDataFrame: Layer with calculated hexes values
+            pd.DataFrame: Boolean masks of hexes to keep with objects types as columns and hexes index
         """
 
-        hexes_local_crs = hexes.estimate_utm_crs()
-        hexes.to_crs(hexes_local_crs, inplace=True)
-        positive_services_list = POSITIVE_SERVICE_CLEANING.get(object_type)
-        cleaned_hexes = hexes.copy()
-        if positive_services_list:
+        hexes_local_crs = hexes.crs
+        masks = pd.DataFrame(
+            {object_type: hex_cleaner.min_object_val_mask(hexes, object_type) for object_type in objects_types},
+            index=hexes.index,
+        )
+        positive_objects = [object_type for object_type in objects_types if POSITIVE_SERVICE_CLEANING.get(object_type)]
+        if positive_objects:
             positive_services = await hex_api_getter.get_positive_service_by_territory_id(
                 gpd.GeoDataFrame(geometry=[hexes.union_all()], crs=hexes_local_crs).to_crs(4326).to_geo_dict()["features"][0]["geometry"],
             )
             if not positive_services.empty:
                 positive_services.to_crs(hexes_local_crs, inplace=True)
-                cleaned_hexes = await hex_cleaner.positive_clean(
-                    cleaned_hexes,
-                    positive_services
-                )
-        negative_services_list = NEGATIVE_SERVICE_CLEANING.get(object_type)
-        if negative_services_list:
+                positive_mask = hex_cleaner.positive_mask(hexes, positive_services)
+                for object_type in positive_objects:
+                    masks[object_type] &= positive_mask
+        negative_services_ids = sorted(
+            {service_id for object_type in objects_types for service_id in NEGATIVE_SERVICE_CLEANING.get(object_type, [])}
+        )
+        if negative_services_ids:
             negative_services = await hex_api_getter.get_negative_service_by_territory_id(
                 territory_id,
-                negative_services_list
+                negative_services_ids
             )
             if not negative_services.empty:
                 negative_services.to_crs(hexes_local_crs, inplace=True)
-                cleaned_hexes = await hex_cleaner.negative_clean(
-                    hexes,
-                    negative_services
-                )
-        cleaned_hexes = await asyncio.to_thread(
-            hex_cleaner.clean_by_min_object_val,
-            hexagons=cleaned_hexes,
-            object_name=object_type,
-        )
+                negative_masks = {}
+                for object_type in objects_types:
+                    services_ids = tuple(NEGATIVE_SERVICE_CLEANING.get(object_type, []))
+                    if not services_ids:
+                        continue
+                    if services_ids not in negative_masks:
+                        negative_masks[services_ids] = await asyncio.to_thread(
+                            hex_cleaner.negative_mask,
+                            hexes,
+                            negative_services[negative_services["service_type_id"].isin(services_ids)],
+                        )
+                    masks[object_type] &= negative_masks[services_ids]
+        return masks
+
+    async def get_hexes_for_object_from_gdf(
+            self,
+            hexes: gpd.GeoDataFrame,
+            territory_id: int,
+            object_type: str
+    ) -> gpd.GeoDataFrame:
+        """
+        Generate hexes with estimation for object use
+
+        Args:
+            hexes (gpd.GeoDataFrame): Hexes query parameters
+            territory_id (int): Region territory id
+            object_type (str): Object type as str
+        Returns:
+            gpd.GeoDataFrame: Layer with calculated hexes values
+        """
+
+        hexes_local_crs = hexes.estimate_utm_crs()
+        if hexes.crs != hexes_local_crs:
+            hexes.to_crs(hexes_local_crs, inplace=True)
+        masks = await self.get_objects_masks(hexes, territory_id, [object_type])
+        cleaned_hexes = hexes[masks[object_type].to_numpy()].copy()
 
         estimated_hexes = await hex_estimator.weight_hexes(
             cleaned_hexes,
@@ -215,5 +418,34 @@ class PriocService:
 
         return estimated_hexes
 
+    async def get_hexes_for_objects_from_gdf(
+            self,
+            hexes: gpd.GeoDataFrame,
+            territory_id: int,
+            objects_types: list[str],
+    ) -> gpd.GeoDataFrame:
+        """
+        Generate hexes with estimations for several objects use in one pass
+
+        Args:
+            hexes (gpd.GeoDataFrame): Hexes layer
+            territory_id (int): Region territory id
+            objects_types (list[str]): Objects types as str
+        Returns:
+            gpd.GeoDataFrame: Layer in local crs with object estimation column for every object type,
+            estimation is None for hexes not acceptable for object
+        """
+
+        hexes_local_crs = hexes.estimate_utm_crs()
+        if hexes.crs != hexes_local_crs:
+            hexes.to_crs(hexes_local_crs, inplace=True)
+        masks = await self.get_objects_masks(hexes, territory_id, objects_types)
+        estimations = await hex_estimator.weight_hexes_for_objects(hexes, objects_types)
+        estimated_hexes = hexes.copy()
+        estimated_hexes[objects_types] = estimations.where(masks)
+        return estimated_hexes
+
 
-prioc_service = PriocService()
+prioc_service = PriocService(
+    clusters_cache_size=int(config.get("PRIOC_CLUSTERS_CACHE_SIZE_MB", "64")) * 1024 * 1024,
+)
@@ -0,0 +1,181 @@
+import asyncio
+import math
+import os
+from pathlib import Path
+
+import pandas as pd
+from loguru import logger
+
+from app.common import config
+from app.common.api_handler.response_cache import ResponseCache
+from app.common.metrics import metrics_registry
+from .hex_api_getter import indicators_names
+from .hex_layer_parser import hex_layer_parser
+
+
+class RankingsStorage:
+    """
+    Class for storing priority objects hexagons rankings as versioned local artifacts.
+    Artifact keeps weighted_sum by hexagon_id for every object type of regional scenario
+    and is valid while scenario hexagons indicators values are the same.
+    Artifacts are written as parquet files, recently used artifacts are kept in memory bounded LRU cache.
+    """
+
+    def __init__(
+            self,
+            cache_dir: str | Path,
+            indicators: list[str],
+            memory_cache_size: int = 256 * 1024 * 1024,
+    ) -> None:
+        """
+        Initialisation function
+
+        Args:
+            cache_dir (str | Path): Directory to store artifacts in
+            indicators (list[str]): Indicators names defining artifact version
+            memory_cache_size (int): Maximum size of artifacts kept in memory in bytes. Default to 256 MB
+
+        Returns:
+            None
+        """
+
+        self.cache_dir = Path(cache_dir)
+        self.indicators = indicators
+        self._artifacts = ResponseCache(memory_cache_size)
+        metrics_registry.register("rankings_cache", self._artifacts.stats)
+
+    def indicators_version(
+            self,
+            hexagons: pd.DataFrame,
+    ) -> str:
+        """
+        Function calculates version of hexagons indicators values.
+        Hexagons with missing indicators values are skipped as they are not present in urban_api layer.
+
+        Args:
+            hexagons (pd.DataFrame): Hexagons with "hexagon_id" and indicators columns
+
+        Returns:
+            str: Indicators values fingerprint
+        """
+
+        return hex_layer_parser.indicators_version(hexagons, self.indicators)
+
+    def _artifact_path(self, regional_scenario_id: int) -> Path:
+        return self.cache_dir / f"rankings_{regional_scenario_id}.parquet"
+
+    @staticmethod
+    def _artifact_size(artifact: dict) -> int:
+        return int(sum(ranking.memory_usage(index=True) for ranking in artifact["rankings"].values()))
+
+    def _cache_artifact(
+            self,
+            regional_scenario_id: int,
+            artifact: dict,
+    ) -> None:
+        self._artifacts.set(regional_scenario_id, artifact, self._artifact_size(artifact))
+
+    def _load_artifact(
+            self,
+            regional_scenario_id: int,
+    ) -> dict | None:
+        path = self._artifact_path(regional_scenario_id)
+        if not path.exists():
+            return None
+        try:
+            table = pd.read_parquet(path, engine="pyarrow")
+        except Exception as e:
+            logger.warning(f"Could not read rankings artifact {path}: {e}")
+            return None
+        rankings = {
+            str(object_type): object_ranking.set_index("hexagon_id")["weighted_sum"]
+            for object_type, object_ranking in table.groupby("object_type", observed=True, sort=False)
+        }
+        artifact = {"version": table.attrs.get("version"), "rankings": rankings}
+        self._cache_artifact(regional_scenario_id, artifact)
+        return artifact
+
+    def _write_artifact(
+            self,
+            regional_scenario_id: int,
+            artifact: dict,
+    ) -> None:
+        if not artifact["rankings"]:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._artifact_path(regional_scenario_id)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        table = pd.concat(artifact["rankings"], names=["object_type", "hexagon_id"]).rename("weighted_sum")
+        table = table.reset_index().astype({"object_type": "category"})
+        table.attrs["version"] = artifact["version"]
+        table.to_parquet(tmp_path, engine="pyarrow", index=False)
+        os.replace(tmp_path, path)
+
+    async def get_ranking(
+            self,
+            regional_scenario_id: int,
+            version: str,
+            object_type: str,
+    ) -> pd.Series | None:
+        """
+        Function searches object ranking for scenario indicators version
+
+        Args:
+            regional_scenario_id (int): Regional scenario ID
+            version (str): Scenario indicators version
+            object_type (str): Object type as str
+
+        Returns:
+            pd.Series | None: weighted_sum indexed by hexagon_id or None if artifact is missing or outdated
+        """
+
+        artifact, state = self._artifacts.lookup(regional_scenario_id, math.inf)
+        if state is None:
+            artifact = await asyncio.to_thread(self._load_artifact, regional_scenario_id)
+        if artifact is None or artifact["version"] != version:
+            return None
+        return artifact["rankings"].get(object_type)
+
+    async def save_rankings(
+            self,
+            regional_scenario_id: int,
+            version: str,
+            rankings: dict[str, pd.DataFrame],
+            replace: bool = True,
+    ) -> None:
+        """
+        Function writes objects rankings artifact for scenario indicators version
+
+        Args:
+            regional_scenario_id (int): Regional scenario ID
+            version (str): Scenario indicators version
+            rankings (dict[str, pd.DataFrame]): Objects hexagons with "hexagon_id" and "weighted_sum" columns
+            replace (bool): If False adds rankings to existing artifact of the same version. Default to True
+
+        Returns:
+            None
+        """
+
+        rankings = {
+            object_type: object_hexes.dropna(subset=["weighted_sum"]).set_index("hexagon_id")["weighted_sum"]
+            for object_type, object_hexes in rankings.items()
+        }
+        if not replace:
+            artifact, state = self._artifacts.lookup(regional_scenario_id, math.inf)
+            if state is None:
+                artifact = await asyncio.to_thread(self._load_artifact, regional_scenario_id)
+            if artifact is not None and artifact["version"] == version:
+                rankings = artifact["rankings"] | rankings
+        artifact = {"version": version, "rankings": rankings}
+        self._cache_artifact(regional_scenario_id, artifact)
+        try:
+            await asyncio.to_thread(self._write_artifact, regional_scenario_id, artifact)
+        except OSError as e:
+            logger.warning(f"Could not write rankings artifact for scenario {regional_scenario_id}: {e}")
+
+
+rankings_storage = RankingsStorage(
+    config.get("HEXTECH_CACHE_DIR", "__hextech_cache__"),
+    indicators_names,
+    memory_cache_size=int(config.get("RANKINGS_CACHE_SIZE_MB", "256")) * 1024 * 1024,
+)
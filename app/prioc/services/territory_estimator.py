@@ -32,7 +32,7 @@ class TerritoryEstimator:
             else:
                 return f"Хороший показатель: {indicator_name.lower()}"
 
-        indicators = territory_hexagons.drop(columns=['geometry']).mean().to_dict()
+        indicators = territory_hexagons.drop(columns=['geometry']).mean(numeric_only=True).to_dict()
 
         result_dict = {}
 
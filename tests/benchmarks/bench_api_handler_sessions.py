@@ -0,0 +1,70 @@
+"""
+Benchmark of requests per second for AsyncApiHandler with session per request and with pooled session.
+
+Run from repository root:
+    python -m tests.benchmarks.bench_api_handler_sessions
+"""
+
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+
+from app.common.api_handler.api_handler import AsyncApiHandler
+
+
+REQUESTS_NUM = 3000
+CONCURRENCY = 50
+
+
+async def start_server() -> tuple[web.AppRunner, str]:
+    async def indicators_values(request: web.Request) -> web.Response:
+        return web.json_response({"indicator_id": 1, "value": 1.0})
+
+    server_app = web.Application()
+    server_app.router.add_put("/api/v1/scenarios/1/indicators_values", indicators_values)
+    runner = web.AppRunner(server_app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def run_requests(func) -> float:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def bound_func():
+        async with semaphore:
+            await func()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[bound_func() for _ in range(REQUESTS_NUM)])
+    return REQUESTS_NUM / (time.perf_counter() - start)
+
+
+async def main():
+    runner, base_url = await start_server()
+    handler = AsyncApiHandler(base_url, pool_limit=CONCURRENCY, warmup_connections=CONCURRENCY)
+    extra_url = "/api/v1/scenarios/1/indicators_values"
+    data = {"indicator_id": 1, "value": 1.0}
+
+    async def session_per_request():
+        async with aiohttp.ClientSession() as session:
+            await handler.put(extra_url=extra_url, data=data, session=session)
+
+    async def pooled_session():
+        await handler.put(extra_url=extra_url, data=data)
+
+    before = await run_requests(session_per_request)
+    await handler.open_session()
+    after = await run_requests(pooled_session)
+    await handler.close_session()
+    await runner.cleanup()
+    print(f"Session per request: {before:.0f} rps")
+    print(f"Pooled session: {after:.0f} rps")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""
+Benchmark of /prioc/object with cached ranking for whole region and for map viewport bbox.
+Upstream calls are replaced with cached layer and ranking.
+
+Run from repository root:
+    python -m tests.benchmarks.bench_bbox_query
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from app.common.feature_collection_encoder import feature_collection_encoder
+from app.prioc.dto import HexesDTO
+from app.prioc.services import prioc_service
+from app.prioc.services.hex_api_getter import indicators_names
+from app.prioc.services.hex_layer_parser import hex_layer_parser
+from tests.benchmarks.bench_hex_layer_parser import make_response
+
+
+REPEATS = 5
+
+
+async def measure(hex_params: HexesDTO) -> tuple[float, int, int]:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = await prioc_service.get_hexes_for_object(hex_params)
+        size = len(await asyncio.to_thread(feature_collection_encoder.encode, result, True))
+    return (time.perf_counter() - start) / REPEATS, len(result), size
+
+
+async def main():
+    layer = hex_layer_parser.parse(make_response(), indicators_names)
+    min_x, min_y, max_x, max_y = layer.total_bounds
+    center_x, center_y = (min_x + max_x) / 2, (min_y + max_y) / 2
+    bbox = f"{center_x - 0.1},{center_y - 0.05},{center_x + 0.1},{center_y + 0.05}"
+    layer = layer.to_crs(layer.estimate_utm_crs())
+    ranking = pd.Series(np.random.default_rng(0).random(len(layer)), index=layer["hexagon_id"], name="weighted_sum")
+    with (
+        patch("app.prioc.services.prioc_service.hex_api_getter.get_regional_base_scenario", AsyncMock(return_value=1)),
+        patch(
+            "app.prioc.services.prioc_service.hex_api_getter.get_indexed_hexes_by_territory",
+            AsyncMock(return_value=(layer, shapely.STRtree(layer.geometry.values), "version")),
+        ),
+        patch("app.prioc.services.prioc_service.rankings_storage.get_ranking", AsyncMock(return_value=ranking)),
+    ):
+        for name, hex_params in (
+            ("region", HexesDTO(territory_id=1, object_type="Порт")),
+            ("viewport", HexesDTO(territory_id=1, object_type="Порт", bbox=bbox)),
+            ("viewport limit 500", HexesDTO(territory_id=1, object_type="Порт", bbox=bbox, limit=500)),
+        ):
+            duration, hexes_num, size = await measure(hex_params)
+            print(f"{name:>18}: {hexes_num} hexes, {size / 2 ** 20:.2f} MiB, {duration * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+"""
+Benchmark of bulk PUTs written by chunks with gather and by sliding window writer.
+Upstream is simulated with heavy tailed latency.
+
+Run from repository root:
+    python -m tests.benchmarks.bench_bulk_writer
+"""
+
+import asyncio
+import time
+
+import numpy as np
+
+from app.common.api_handler.bulk_writer import BulkWriter
+
+
+ITEMS_NUM = 4000
+CONCURRENCY = 40
+
+
+async def main():
+    latencies = np.random.default_rng(0).lognormal(mean=np.log(0.005), sigma=1, size=ITEMS_NUM)
+
+    async def put(extra_url, data):
+        await asyncio.sleep(latencies[data])
+
+    start = time.perf_counter()
+    items = [{"extra_url": "/", "data": i} for i in range(ITEMS_NUM)]
+    for i in range(0, ITEMS_NUM, CONCURRENCY):
+        await asyncio.gather(*[put(**item) for item in items[i:i + CONCURRENCY]])
+    chunks_time = time.perf_counter() - start
+
+    writer = BulkWriter("bench", concurrency=CONCURRENCY)
+    start = time.perf_counter()
+    await writer.write(put, ({"data": i} for i in range(ITEMS_NUM)), extra_url="/")
+    window_time = time.perf_counter() - start
+
+    print(
+        f"{ITEMS_NUM} puts with {CONCURRENCY} in flight: chunks {ITEMS_NUM / chunks_time:.0f} rps, "
+        f"sliding window {ITEMS_NUM / window_time:.0f} rps"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,38 @@
+"""
+Benchmark of grid FeatureCollection fan-out to five evaluation upstreams with dict re-encoded by every request
+and with bytes encoded once.
+
+Run from repository root:
+    python -m tests.benchmarks.bench_feature_collection_encoder
+"""
+
+import json
+import time
+
+from app.common.feature_collection_encoder import feature_collection_encoder
+from app.prioc.services.hex_api_getter import indicators_names
+from app.prioc.services.hex_layer_parser import hex_layer_parser
+from tests.benchmarks.bench_hex_layer_parser import make_response
+
+
+def main():
+    grid = hex_layer_parser.parse(make_response(), indicators_names)
+
+    start = time.perf_counter()
+    feature_collection = json.loads(grid.to_json())
+    for _ in range(4):
+        json.dumps(feature_collection)
+    json.dumps({"feature_collection": feature_collection})
+    dict_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoded = feature_collection_encoder.encode(grid)
+    eco_encoded = b'{"feature_collection": ' + encoded + b"}"
+    bytes_time = time.perf_counter() - start
+
+    assert json.loads(eco_encoded)["feature_collection"] == feature_collection
+    print(f"{len(grid)} hexes to 5 upstreams: dict {dict_time:.2f} s, encoded once {bytes_time:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
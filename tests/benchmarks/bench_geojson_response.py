@@ -0,0 +1,66 @@
+"""
+Benchmark of layer response built as dict with to_json, json.loads and FastAPI encoding
+and streamed with GeoJSONResponse. Peak memory is traced with tracemalloc.
+
+Run from repository root:
+    python -m tests.benchmarks.bench_geojson_response
+"""
+
+import asyncio
+import json
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+
+from app.common.responses import GeoJSONResponse
+from app.prioc.services.hex_api_getter import indicators_names
+from app.prioc.services.hex_layer_parser import hex_layer_parser
+from tests.benchmarks.bench_hex_layer_parser import make_response
+
+
+HEXES_NUM = 30_000
+
+
+def dict_response(layer) -> tuple[float, int]:
+    result = json.loads(layer.to_json(to_wgs84=True))
+    body = json.dumps(
+        jsonable_encoder(result), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+    return time.perf_counter(), len(body)
+
+
+async def streaming_response(layer) -> tuple[float, int]:
+    response = GeoJSONResponse(layer, to_wgs84=True)
+    first_byte_time = None
+    size = 0
+    async for chunk in response.body_iterator:
+        if first_byte_time is None and size:
+            first_byte_time = time.perf_counter()
+        size += len(chunk)
+    return first_byte_time or time.perf_counter(), size
+
+
+def measure(func, layer) -> tuple[float, float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_byte_time, _ = func(layer)
+    total_time = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first_byte_time - start, total_time, peak / 2 ** 20
+
+
+def main():
+    layer = hex_layer_parser.parse(make_response(), indicators_names).iloc[:HEXES_NUM]
+    layer = layer.to_crs(layer.estimate_utm_crs())
+    dict_first, dict_total, dict_peak = measure(dict_response, layer)
+    stream_first, stream_total, stream_peak = measure(lambda x: asyncio.run(streaming_response(x)), layer)
+    print(
+        f"{len(layer)} hexes: dict first byte {dict_first:.2f} s, total {dict_total:.2f} s, peak {dict_peak:.0f} MiB; "
+        f"streaming first byte {stream_first:.2f} s, total {stream_total:.2f} s, peak {stream_peak:.0f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark of hexagonal grid generation with per cell GeoJSON polygons and with bulk polygons construction.
+
+Run from repository root:
+    python -m tests.benchmarks.bench_grid_generator
+"""
+
+import asyncio
+import time
+
+import geopandas as gpd
+import h3
+from shapely.geometry import shape, box
+
+from app.grid_generator.services.grid_generator import grid_generator
+
+
+# Region sized polygon near Saint Petersburg, about 14 000 sq km
+REGION = box(29.0, 59.3, 31.0, 60.3)
+
+
+def per_cell_polygons(cells: list[str]) -> list:
+    return [shape(h3.cells_to_geo([cell])) for cell in cells]
+
+
+async def main():
+    territory = gpd.GeoDataFrame(geometry=[REGION], crs=4326)
+    for resolution in range(6, 10):
+        cells = h3.geo_to_cells(territory.union_all(), res=resolution)
+
+        start = time.perf_counter()
+        before = per_cell_polygons(cells)
+        before_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        after = grid_generator.cells_to_polygons(cells)
+        after_time = time.perf_counter() - start
+
+        assert all(old.equals(new) for old, new in zip(before[:1000], after[:1000]))
+        print(
+            f"Resolution {resolution}, {len(cells)} cells: "
+            f"per cell {before_time:.3f} s, bulk {after_time:.3f} s, speedup {before_time / after_time:.1f}x"
+        )
+
+    start = time.perf_counter()
+    grid = await grid_generator.generate_hexagonal_grid(territory, size=8)
+    print(f"generate_hexagonal_grid at resolution 8: {len(grid)} hexes in {time.perf_counter() - start:.3f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
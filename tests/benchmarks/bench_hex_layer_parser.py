@@ -0,0 +1,86 @@
+"""
+Benchmark of hexagons with indicators payload parsing with from_features and dict records
+and with columnar parser. Peak memory is traced with tracemalloc.
+
+Run from repository root:
+    python -m tests.benchmarks.bench_hex_layer_parser
+"""
+
+import time
+import tracemalloc
+
+import geopandas as gpd
+import h3
+import numpy as np
+import pandas as pd
+
+from app.prioc.services.hex_api_getter import indicators_names
+from app.prioc.services.hex_layer_parser import hex_layer_parser
+
+
+HEXES_NUM = 100_000
+
+
+def records_parse(response: dict) -> gpd.GeoDataFrame:
+    gdf = gpd.GeoDataFrame.from_features(response, crs=4326)
+    df_records = gdf["indicators"].apply(
+        func=lambda x: {i["name_full"] : i["value"] if i else None for i in x},
+    )
+    indicators_df = pd.DataFrame.from_records(df_records)
+    keep_columns = ["geometry", "hexagon_id"] + indicators_names
+    result = pd.concat([gdf, indicators_df], axis=1)
+    result = result[keep_columns]
+    result.dropna(inplace=True)
+    return result
+
+
+def make_response() -> dict:
+    rng = np.random.default_rng(0)
+    cells = list(h3.grid_disk(h3.latlng_to_cell(59.93, 30.31, 9), 200))[:HEXES_NUM]
+    values = rng.integers(1, 6, size=(len(cells), len(indicators_names)))
+    features = []
+    for position, cell in enumerate(cells):
+        ring = [[lng, lat] for lat, lng in h3.cell_to_boundary(cell)]
+        indicators = [
+            {"name_full": name, "value": int(value)} for name, value in zip(indicators_names, values[position])
+        ]
+        if position % 100 == 0:
+            indicators[0]["value"] = None
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": {"type": "Polygon", "coordinates": [ring + [ring[0]]]},
+                "properties": {"hexagon_id": position, "indicators": indicators},
+            }
+        )
+    return {"type": "FeatureCollection", "features": features}
+
+
+def measure(func, response: dict) -> tuple[gpd.GeoDataFrame, float, float]:
+    start = time.perf_counter()
+    result = func(response)
+    elapsed = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = func(response)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+def main():
+    response = make_response()
+    before, before_time, before_peak = measure(records_parse, response)
+    after, after_time, after_peak = measure(lambda x: hex_layer_parser.parse(x, indicators_names), response)
+
+    assert (before["hexagon_id"].to_numpy() == after["hexagon_id"].to_numpy()).all()
+    assert np.allclose(before[indicators_names].to_numpy(dtype=float), after[indicators_names].to_numpy())
+    assert before.geometry.reset_index(drop=True).geom_equals(after.geometry.reset_index(drop=True)).all()
+    print(
+        f"{len(response['features'])} hexes: records {before_time:.2f} s, peak {before_peak:.0f} MiB; "
+        f"columnar {after_time:.2f} s, peak {after_peak:.0f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    main()
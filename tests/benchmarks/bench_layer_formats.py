@@ -0,0 +1,54 @@
+"""
+Benchmark of layer payload size, server encoding and client parse time for GeoJSON and binary formats.
+
+Run from repository root:
+    python -m tests.benchmarks.bench_layer_formats
+"""
+
+import io
+import time
+
+import geopandas as gpd
+import pyarrow as pa
+
+from app.common.binary_layer_encoder import binary_layer_encoder
+from app.common.feature_collection_encoder import feature_collection_encoder
+from app.prioc.services.hex_api_getter import indicators_names
+from app.prioc.services.hex_layer_parser import hex_layer_parser
+from tests.benchmarks.bench_hex_layer_parser import make_response
+
+
+parsers = {
+    "geojson": lambda content: gpd.read_file(io.BytesIO(content)),
+    "parquet": lambda content: gpd.read_parquet(io.BytesIO(content)),
+    "arrow": lambda content: gpd.GeoDataFrame.from_arrow(pa.ipc.open_stream(content).read_all()),
+    "fgb": lambda content: gpd.read_file(io.BytesIO(content)),
+}
+
+
+def encode(layer: gpd.GeoDataFrame, layer_format: str) -> bytes:
+    if layer_format == "geojson":
+        return feature_collection_encoder.encode(layer, to_wgs84=True)
+    return binary_layer_encoder.encode(layer, layer_format, to_wgs84=True)
+
+
+def main():
+    layer = hex_layer_parser.parse(make_response(), indicators_names)
+    layer = layer.to_crs(layer.estimate_utm_crs())
+    print(f"{len(layer)} hexes, {len(layer.columns)} columns")
+    for layer_format, parse in parsers.items():
+        start = time.perf_counter()
+        content = encode(layer, layer_format)
+        encode_time = time.perf_counter() - start
+        start = time.perf_counter()
+        parsed = parse(content)
+        parse_time = time.perf_counter() - start
+        assert len(parsed) == len(layer)
+        print(
+            f"{layer_format:>8}: {len(content) / 2 ** 20:7.1f} MiB, "
+            f"encode {encode_time:5.2f} s, client parse {parse_time:5.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
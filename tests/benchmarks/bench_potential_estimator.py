@@ -0,0 +1,51 @@
+"""
+Benchmark of potentials estimation with row by row dict comparison and with compiled thresholds matrix.
+
+Run from repository root:
+    python -m tests.benchmarks.bench_potential_estimator
+"""
+
+import asyncio
+import time
+
+import geopandas as gpd
+import numpy as np
+
+from app.grid_generator.services.constants import profiles
+from app.grid_generator.services.potential_estimator import potential_estimator
+
+
+HEXES_NUM = 100_000
+
+
+def row_by_row_potentials(hexes: gpd.GeoDataFrame) -> list[list[int]]:
+    return [
+        [
+            sum(value >= profiles[profile_name]["Критерии"][key] for key, value in row.items())
+            for profile_name in profiles.keys()
+        ]
+        for _, row in hexes[potential_estimator.criteria_names].iterrows()
+    ]
+
+
+async def main():
+    rng = np.random.default_rng(0)
+    hexes = gpd.GeoDataFrame(
+        rng.integers(0, 6, size=(HEXES_NUM, len(potential_estimator.criteria_names))),
+        columns=potential_estimator.criteria_names,
+    )
+
+    start = time.perf_counter()
+    before = row_by_row_potentials(hexes)
+    before_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    after = await potential_estimator.estimate_potentials(hexes)
+    after_time = time.perf_counter() - start
+
+    assert (after[potential_estimator.profiles_names].to_numpy() == np.array(before)).all()
+    print(f"{HEXES_NUM} hexes: row by row {before_time:.3f} s, compiled matrix {after_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+"""
+Benchmark of /prioc/object with cached ranking for whole region and for best candidates only.
+Upstream calls are replaced with cached layer and ranking.
+
+Run from repository root:
+    python -m tests.benchmarks.bench_top_k
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from app.common.feature_collection_encoder import feature_collection_encoder
+from app.prioc.dto import HexesDTO
+from app.prioc.services import prioc_service
+from app.prioc.services.hex_api_getter import indicators_names
+from app.prioc.services.hex_layer_parser import hex_layer_parser
+from tests.benchmarks.bench_hex_layer_parser import make_response
+
+
+REPEATS = 5
+
+
+async def measure(hex_params: HexesDTO) -> tuple[float, int, int]:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = await prioc_service.get_hexes_for_object(hex_params)
+        size = len(await asyncio.to_thread(feature_collection_encoder.encode, result, True))
+    return (time.perf_counter() - start) / REPEATS, len(result), size
+
+
+async def main():
+    layer = hex_layer_parser.parse(make_response(), indicators_names)
+    layer = layer.to_crs(layer.estimate_utm_crs())
+    ranking = pd.Series(np.random.default_rng(0).random(len(layer)), index=layer["hexagon_id"], name="weighted_sum")
+    with (
+        patch("app.prioc.services.prioc_service.hex_api_getter.get_regional_base_scenario", AsyncMock(return_value=1)),
+        patch(
+            "app.prioc.services.prioc_service.hex_api_getter.get_indexed_hexes_by_territory",
+            AsyncMock(return_value=(layer, shapely.STRtree(layer.geometry.values), "version")),
+        ),
+        patch("app.prioc.services.prioc_service.rankings_storage.get_ranking", AsyncMock(return_value=ranking)),
+    ):
+        for name, hex_params in (
+            ("region", HexesDTO(territory_id=1, object_type="Порт")),
+            ("min_score 0.9", HexesDTO(territory_id=1, object_type="Порт", min_score=0.9)),
+            ("top_k 100", HexesDTO(territory_id=1, object_type="Порт", top_k=100)),
+        ):
+            duration, hexes_num, size = await measure(hex_params)
+            print(f"{name:>13}: {hexes_num} hexes, {size / 2 ** 20:.2f} MiB, {duration * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
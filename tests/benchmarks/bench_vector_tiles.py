@@ -0,0 +1,56 @@
+"""
+Benchmark of vector tiles against whole GeoJSON layer for map viewport.
+Tiles are encoded cold, then read from tiles cache.
+
+Run from repository root:
+    python -m tests.benchmarks.bench_vector_tiles
+"""
+
+import asyncio
+import math
+import time
+
+import numpy as np
+
+from app.common.feature_collection_encoder import feature_collection_encoder
+from app.common.vector_tiles import VectorTiles
+from app.prioc.services.hex_api_getter import indicators_names
+from app.prioc.services.hex_layer_parser import hex_layer_parser
+from tests.benchmarks.bench_hex_layer_parser import make_response
+
+
+def tile_of(lon: float, lat: float, z: int) -> tuple[int, int]:
+    n = 2 ** z
+    return int((lon + 180) / 360 * n), int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+
+
+async def main():
+    layer = hex_layer_parser.parse(make_response(), indicators_names)
+    layer["weighted_sum"] = np.random.default_rng(0).random(len(layer))
+    geojson_size = len(feature_collection_encoder.encode(layer))
+    tiles = VectorTiles()
+    start = time.perf_counter()
+    source = await tiles.get_source("bench", lambda: asyncio.sleep(0, layer))
+    print(
+        f"{len(layer)} hexes, GeoJSON layer {geojson_size / 2 ** 20:.1f} MiB, "
+        f"source preparation {time.perf_counter() - start:.2f} s"
+    )
+    lon, lat = layer.geometry.iloc[len(layer) // 2].centroid.coords[0]
+    for z in (8, 10, 12, 14):
+        center_x, center_y = tile_of(lon, lat, z)
+        viewport = [(center_x + dx, center_y + dy) for dx in (-1, 0, 1) for dy in (-1, 0)]
+        start = time.perf_counter()
+        sizes = [len(await tiles.get_tile(source, z, x, y)) for x, y in viewport]
+        cold_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for x, y in viewport:
+            await tiles.get_tile(source, z, x, y)
+        warm_time = time.perf_counter() - start
+        print(
+            f"z{z}: {len(viewport)} tiles {sum(sizes) / 1024:.0f} KiB (max {max(sizes) / 1024:.0f} KiB), "
+            f"cold {cold_time * 1000:.0f} ms, cached {warm_time * 1000:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
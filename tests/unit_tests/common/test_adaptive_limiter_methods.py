@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.common.api_handler.adaptive_limiter import AdaptiveLimiter
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_aimd():
+    limiter = AdaptiveLimiter(initial_limit=4, min_limit=1, max_limit=6)
+    in_flight = []
+
+    async def request(status_code=200):
+        async with limiter.slot():
+            in_flight.append(limiter.in_flight)
+            await asyncio.sleep(0.001)
+            if status_code != 200:
+                raise HTTPException(status_code)
+
+    await asyncio.gather(*[request() for _ in range(100)])
+    assert max(in_flight) <= 6
+    assert limiter.stats()["limit"] == 6
+    with pytest.raises(HTTPException):
+        await request(503)
+    assert limiter.stats()["limit"] == 3
+    with pytest.raises(HTTPException):
+        await request(404)
+    assert limiter.stats()["limit"] == 3
+    assert limiter.stats()["in_flight"] == 0
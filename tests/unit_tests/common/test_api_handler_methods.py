@@ -0,0 +1,178 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from fastapi import HTTPException
+
+from app.common.api_handler.api_handler import AsyncApiHandler
+from app.common.api_handler.bulk_writer import BulkWriter
+from app.common.api_handler.circuit_breaker import CircuitBreaker
+from app.common.api_handler.response_cache import CacheRule
+from app.common.api_handler.retry_policy import RetryPolicy
+
+
+async def start_upstream(responses: dict[str, list[int]]) -> tuple[web.AppRunner, str]:
+
+    async def handle(request):
+        return web.json_response({}, status=responses[request.method].pop(0))
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+@pytest.mark.asyncio
+async def test_api_handler_retries_and_circuit_breaker(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    responses = {"GET": [503, 503, 200], "POST": [503, 503, 503, 200]}
+    runner, base_url = await start_upstream(responses)
+    handler = AsyncApiHandler(
+        base_url,
+        name="test_retries",
+        retry_policies={"GET": RetryPolicy(max_retries=2, backoff=0.001), "POST": RetryPolicy(idempotent=False)},
+        circuit_breaker=CircuitBreaker(failure_threshold=3, recovery_timeout=60),
+    )
+    try:
+        assert await handler.get("/") == {}
+        assert handler.retry_budget.stats()["retries"] == 2
+        for _ in range(3):
+            with pytest.raises(HTTPException) as e:
+                await handler.post("/", data={})
+            assert e.value.status_code == 503
+        assert responses["POST"] == [200]
+        assert handler.circuit_breaker.stats()["state"] == "open"
+        with pytest.raises(HTTPException) as e:
+            await handler.post("/", data={})
+        assert e.value.detail["msg"] == "Upstream is unavailable"
+        assert responses["POST"] == [200]
+    finally:
+        await handler.close_session()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_bulk_writer_put_is_retried_once_per_attempt():
+    responses = {"PUT": [503] * 10}
+    runner, base_url = await start_upstream(responses)
+    handler = AsyncApiHandler(
+        base_url,
+        name="test_bulk_put",
+        retry_policies={"PUT": RetryPolicy(max_retries=2, backoff=0.001)},
+        circuit_breaker=CircuitBreaker(failure_threshold=100),
+    )
+    writer = BulkWriter("test_bulk_put", concurrency=1, max_retries=2, backoff=0)
+    try:
+        with pytest.raises(HTTPException):
+            await writer.write(
+                handler.put, [{"data": {}}], extra_url="/", retry_policy=RetryPolicy(max_retries=0)
+            )
+        assert len(responses["PUT"]) == 7
+        assert handler.retry_budget.stats()["retries"] == 0
+    finally:
+        await handler.close_session()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_put_indicator_is_retried_once_per_attempt(monkeypatch):
+    from app.indicators_savior.indicators_savior_services import indicators_savior_api_service as api_service_module
+
+    responses = {"PUT": [503] * 10}
+    runner, base_url = await start_upstream(responses)
+    handler = AsyncApiHandler(
+        base_url,
+        name="test_indicator_put",
+        retry_policies={"PUT": RetryPolicy(max_retries=2, backoff=0.001)},
+        circuit_breaker=CircuitBreaker(failure_threshold=100),
+    )
+    api_service = api_service_module.indicators_savior_api_service
+    limiter_slots = []
+    slot = api_service.indicator_writer.limiter.slot
+
+    def counted_slot():
+        limiter_slots.append(1)
+        return slot()
+
+    monkeypatch.setattr(api_service_module, "urban_api_handler", handler)
+    monkeypatch.setattr(api_service.indicator_writer, "backoff", 0)
+    monkeypatch.setattr(api_service.indicator_writer, "max_retries", 2)
+    monkeypatch.setattr(api_service.indicator_writer.limiter, "slot", counted_slot)
+    try:
+        with pytest.raises(HTTPException):
+            await api_service.put_indicator(1, {"indicator_id": 1, "value": 1})
+        assert len(responses["PUT"]) == 7
+        assert len(limiter_slots) == 3
+        assert handler.retry_budget.stats()["retries"] == 0
+    finally:
+        await handler.close_session()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_ignores_application_errors(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    responses = {"POST": [500] * 5 + [502] * 3}
+    runner, base_url = await start_upstream(responses)
+    handler = AsyncApiHandler(
+        base_url,
+        name="test_breaker_statuses",
+        retry_policies={"POST": RetryPolicy(idempotent=False)},
+        circuit_breaker=CircuitBreaker(failure_threshold=3, recovery_timeout=60),
+    )
+    try:
+        for _ in range(5):
+            with pytest.raises(HTTPException) as e:
+                await handler.post("/", data={})
+            assert e.value.status_code == 500
+        assert handler.circuit_breaker.stats()["state"] == "closed"
+        for _ in range(3):
+            with pytest.raises(HTTPException):
+                await handler.post("/", data={})
+        assert handler.circuit_breaker.stats()["state"] == "open"
+    finally:
+        await handler.close_session()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_api_handler_cached_results_are_not_shared():
+    responses = {"GET": [200]}
+    runner, base_url = await start_upstream(responses)
+    handler = AsyncApiHandler(base_url, name="test_cached_results", cache_rules=[CacheRule(r"^/$", ttl=60)])
+    try:
+        first_result = await handler.get("/")
+        first_result["features"] = []
+        assert await handler.get("/") == {}
+        assert responses["GET"] == []
+        assert handler.response_cache.stats()["hits"] == 1
+    finally:
+        await handler.close_session()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_api_handler_coalesced_results_are_not_shared():
+    responses = {"GET": [200] * 5}
+    runner, base_url = await start_upstream(responses)
+    handler = AsyncApiHandler(base_url, name="test_coalesced_results")
+    try:
+        results = await asyncio.gather(*[handler.get("/") for _ in range(5)])
+        assert handler.single_flight.stats()["coalesced"] == 4
+        assert len({id(result) for result in results}) == 5
+    finally:
+        await handler.close_session()
+        await runner.cleanup()
+
+
+def test_api_handler_closes_session_of_finished_loop():
+    handler = AsyncApiHandler("http://127.0.0.1:9", name="test_sessions")
+    first_session = asyncio.run(handler.get_session())
+    second_session = asyncio.run(handler.get_session())
+    assert first_session.closed
+    assert second_session is not first_session and not second_session.closed
+    asyncio.run(handler.close_session())
+    assert second_session.closed
@@ -0,0 +1,27 @@
+import io
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import Point
+
+from app.common.binary_layer_encoder import binary_layer_encoder
+
+
+@pytest.mark.parametrize("layer_format", ["parquet", "arrow", "fgb"])
+def test_binary_layer_encoder_round_trip(layer_format):
+    pa = pytest.importorskip("pyarrow")
+    layer = gpd.GeoDataFrame(
+        {"hexagon_id": [1, 2], "value": [0.5, None]},
+        geometry=[Point(30, 59).buffer(0.01), Point(31, 60).buffer(0.01)],
+        crs=32636,
+    )
+    content = binary_layer_encoder.encode(layer, layer_format, to_wgs84=True)
+    if layer_format == "arrow":
+        result = gpd.GeoDataFrame.from_arrow(pa.ipc.open_stream(content).read_all())
+    elif layer_format == "parquet":
+        result = gpd.read_parquet(io.BytesIO(content))
+    else:
+        result = gpd.read_file(io.BytesIO(content)).sort_values("hexagon_id", ignore_index=True)
+    assert result.crs.equals(4326)
+    assert result["hexagon_id"].tolist() == [1, 2]
+    assert result.geometry.geom_equals_exact(layer.to_crs(4326).geometry, tolerance=1e-9).all()
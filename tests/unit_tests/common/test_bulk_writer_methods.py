@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.common.api_handler.adaptive_limiter import AdaptiveLimiter
+from app.common.api_handler.bulk_writer import BulkWriter
+
+
+@pytest.mark.asyncio
+async def test_bulk_writer_window_and_retries():
+    writer = BulkWriter("test", concurrency=3, backoff=0)
+    in_flight = []
+    attempts = {}
+
+    async def put(extra_url, data):
+        in_flight.append(writer.stats()["in_flight"])
+        attempts[data] = attempts.get(data, 0) + 1
+        await asyncio.sleep(0.001 * (data % 5))
+        if data == 7 and attempts[data] < 3:
+            raise HTTPException(503)
+
+    written = await writer.write(put, ({"data": i} for i in range(20)), extra_url="/")
+    assert written == 20
+    assert max(in_flight) <= 3
+    assert writer.stats()["retries"] == 2
+
+    async def bad_put(extra_url, data):
+        raise HTTPException(422)
+
+    with pytest.raises(HTTPException):
+        await writer.write(bad_put, [{"data": 1}], extra_url="/")
+    assert writer.stats()["failed"] == 1
+    assert writer.stats()["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_writer_in_flight_counts_only_limiter_slots():
+    writer = BulkWriter(
+        "test_in_flight",
+        concurrency=4,
+        backoff=0,
+        limiter=AdaptiveLimiter(initial_limit=1, min_limit=1, max_limit=1),
+    )
+    in_flight = []
+
+    async def put(extra_url, data):
+        in_flight.append(writer.stats()["in_flight"])
+        await asyncio.sleep(0.001)
+
+    assert await writer.write(put, ({"data": i} for i in range(10)), extra_url="/") == 10
+    assert in_flight == [1] * 10
+    assert writer.stats()["in_flight"] == 0
@@ -0,0 +1,25 @@
+import asyncio
+import time
+
+import pytest
+
+from app.common.api_handler.bulkhead import Bulkhead
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_rate_and_in_flight_limits():
+    bulkhead = Bulkhead(rate=200, burst=5, max_in_flight=2)
+    in_flight = []
+
+    async def request():
+        async with bulkhead.slot():
+            in_flight.append(bulkhead.in_flight)
+            await asyncio.sleep(0.001)
+
+    start = time.monotonic()
+    await asyncio.gather(*[request() for _ in range(25)])
+    assert time.monotonic() - start >= 20 / 200 * 0.9
+    assert max(in_flight) == 2
+    stats = bulkhead.stats()
+    assert stats["acquired"] == 25 and stats["in_flight"] == 0 and stats["waiting"] == 0
+    assert stats["max_wait_ms"] > 0
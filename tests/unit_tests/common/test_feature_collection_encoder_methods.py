@@ -0,0 +1,41 @@
+import datetime
+import json
+
+import geopandas as gpd
+import pandas as pd
+from shapely.geometry import Point
+
+from app.common.feature_collection_encoder import FeatureCollectionEncoder
+
+
+def test_feature_collection_encoder_equals_to_json():
+    layer = gpd.GeoDataFrame(
+        {"hexagon_id": [1, 2, 3], "value": [0.1234567890123456789, None, 3.0], "name": ["а", "b", None]},
+        geometry=[Point(30, 59).buffer(0.01), None, Point(31, 60)],
+        crs=4326,
+    )
+    encoder = FeatureCollectionEncoder(chunk_size=2)
+    assert json.loads(encoder.encode(layer)) == json.loads(layer.to_json())
+    assert json.loads(encoder.encode(layer.iloc[:0])) == {"type": "FeatureCollection", "features": []}
+
+
+def test_feature_collection_encoder_datetimes():
+    layer = gpd.GeoDataFrame(
+        {
+            "updated_at": pd.to_datetime(["2024-01-02 03:04:05.123", None]),
+            "created_at": pd.to_datetime(["2024-01-02T03:04:05+03:00", None]),
+            "date": [datetime.date(2024, 1, 2), None],
+        },
+        geometry=[Point(30, 59), Point(31, 60)],
+        crs=4326,
+    )
+    properties = [
+        feature["properties"] for feature in json.loads(FeatureCollectionEncoder().encode(layer))["features"]
+    ]
+    assert properties == [
+        {"updated_at": "2024-01-02T03:04:05.123000", "created_at": "2024-01-02T03:04:05+03:00", "date": "2024-01-02"},
+        {"updated_at": None, "created_at": None, "date": None},
+    ]
+    assert json.loads(FeatureCollectionEncoder().encode(layer)) == json.loads(
+        layer.to_json(default=lambda value: value.isoformat())
+    )
@@ -0,0 +1,36 @@
+import time
+
+from app.common.api_handler.response_cache import CacheRule, ResponseCache
+
+
+def test_response_cache_ttl_and_stale():
+    cache = ResponseCache(max_size=100)
+    cache.set(("/api/v1/territory/1", "null", "null"), {"territory_id": 1}, size=10)
+    value, state = cache.lookup(("/api/v1/territory/1", "null", "null"), ttl=60)
+    assert value == {"territory_id": 1} and state == "fresh"
+    time.sleep(0.02)
+    value, state = cache.lookup(("/api/v1/territory/1", "null", "null"), ttl=0.01, stale_ttl=60)
+    assert state == "stale"
+    value, state = cache.lookup(("/api/v1/territory/1", "null", "null"), ttl=0.01)
+    assert value is None and state is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["stale_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_response_cache_lru_eviction_and_invalidation():
+    cache = ResponseCache(max_size=25)
+    cache.set(("/api/v1/territory/1",), 1, size=10)
+    cache.set(("/api/v1/territory/2",), 2, size=10)
+    cache.lookup(("/api/v1/territory/1",), ttl=60)
+    cache.set(("/api/v1/projects",), 3, size=10)
+    assert cache.lookup(("/api/v1/territory/2",), ttl=60) == (None, None)
+    assert cache.stats()["evictions"] == 1
+    assert cache.invalidate("/api/v1/territory") == 1
+    assert cache.size == 10
+
+
+def test_cache_rule_match():
+    rule = CacheRule(r"^/api/v1/territory/\d+$", ttl=60)
+    assert rule.match("/api/v1/territory/1")
+    assert not rule.match("/api/v1/territory/1/hexagons")
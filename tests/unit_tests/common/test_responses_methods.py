@@ -0,0 +1,26 @@
+import json
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import Point
+
+from app.common.responses import GeoJSONResponse, get_layer_format
+
+
+@pytest.mark.asyncio
+async def test_geojson_response_streams_layer():
+    layer = gpd.GeoDataFrame({"value": [1, 2, 3]}, geometry=[Point(30, 59), Point(31, 60), Point(32, 61)], crs=4326)
+    response = GeoJSONResponse(layer.to_crs(32636), to_wgs84=True)
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    assert response.media_type == "application/json"
+    assert json.loads(body)["features"][1]["geometry"]["coordinates"] == pytest.approx([31, 60])
+
+
+def test_get_layer_format_negotiation():
+    assert get_layer_format(None, None) == "geojson"
+    assert get_layer_format("fgb", "application/vnd.apache.parquet") == "fgb"
+    assert get_layer_format(None, "application/vnd.apache.parquet") == "parquet"
+    assert get_layer_format(
+        None, "application/json;q=0.5, application/vnd.apache.arrow.stream;q=0.9, */*"
+    ) == "arrow"
+    assert get_layer_format(None, "text/html, */*") == "geojson"
@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+
+from app.common.api_handler.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_calls():
+    single_flight = SingleFlight()
+    executions = []
+
+    async def extract():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return {"features": []}
+
+    results = await asyncio.gather(*[single_flight.do(1, extract) for _ in range(10)])
+    assert len(executions) == 1
+    assert all(result is results[0] for result in results)
+    assert single_flight.stats()["coalesced"] == 9
+    await single_flight.do(1, extract)
+    assert len(executions) == 2
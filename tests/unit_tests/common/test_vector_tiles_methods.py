@@ -0,0 +1,59 @@
+import asyncio
+
+import geopandas as gpd
+import mapbox_vector_tile
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from shapely.geometry import Point
+
+from app.common.vector_tiles import VectorTiles
+
+
+@pytest.mark.asyncio
+async def test_vector_tiles_clip_quantize_and_cache():
+    layer = gpd.GeoDataFrame(
+        {"hexagon_id": [1, 2], "weighted_sum": [0.5, None]},
+        geometry=[Point(30.3, 59.9).buffer(0.01), Point(30.31, 59.9).buffer(0.01, quad_segs=1)],
+        crs=4326,
+    )
+    tiles = VectorTiles(tiles_cache_size=1024 * 1024, sources_cache_size=1024 * 1024)
+    source = await tiles.get_source("test/1", lambda: asyncio.sleep(0, layer))
+    z, x, y = 12, 2392, 1191
+    tile = await tiles.get_tile(source, z, x, y)
+    features = mapbox_vector_tile.decode(tile)["hexagons"]["features"]
+    assert [feature["properties"] for feature in features] == [{"hexagon_id": 1, "weighted_sum": 0.5}, {"hexagon_id": 2}]
+    for feature in features:
+        coords = np.array(feature["geometry"]["coordinates"][0])
+        assert coords.dtype.kind == "i" and coords.min() >= -64 and coords.max() <= 4096 + 64
+    assert await tiles.get_tile(source, z, x, y) is tile
+    assert tiles.tiles_cache.hits == 1
+    assert await tiles.get_tile(source, 5, 0, 0) == b""
+    with pytest.raises(HTTPException):
+        await tiles.get_tile(source, 1, 2, 0)
+    assert tiles.invalidate("test/") == 3
+
+
+@pytest.mark.asyncio
+async def test_vector_tiles_source_invalidated_during_loading():
+    layer = gpd.GeoDataFrame({"hexagon_id": [1]}, geometry=[Point(30.3, 59.9).buffer(0.01)], crs=4326)
+    tiles = VectorTiles(tiles_cache_size=1024 * 1024, sources_cache_size=1024 * 1024)
+    started, loaded = asyncio.Event(), asyncio.Event()
+    loads = []
+
+    async def load():
+        loads.append(1)
+        started.set()
+        await loaded.wait()
+        return layer
+
+    loading = asyncio.create_task(tiles.get_source("test/1/2", load))
+    await started.wait()
+    tiles.invalidate("test/1/")
+    loaded.set()
+    await loading
+    assert tiles.sources_cache.stats()["entries"] == 0
+    await tiles.get_source("test/1/2", load)
+    await tiles.get_source("test/1/2", load)
+    assert len(loads) == 2
+    assert tiles.sources_cache.stats()["entries"] == 1
@@ -0,0 +1,140 @@
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+import geopandas as gpd
+import h3
+import numpy as np
+import pandas as pd
+from shapely.geometry import box, mapping, shape
+
+from app.common import params_validator
+from app.common.geometries import example_territory
+from app.grid_generator.services.constants import profiles
+from app.grid_generator.services.grid_generator import grid_generator
+from app.grid_generator.services.generator_api_service import generator_api_service
+from app.grid_generator.services.grid_generator_service import grid_generator_service
+from app.grid_generator.services.potential_estimator import potential_estimator
+from app.prioc.services.hex_api_getter import indicators_names
+from app.prioc.services.prioc_service import prioc_service
+from app.prioc.services.rankings_storage import rankings_storage
+
+
+@pytest.mark.asyncio
+async def test_generate_hexagonal_grid():
+    territory = gpd.GeoDataFrame(geometry=[shape(example_territory)], crs=4326)
+    grid = await grid_generator.generate_hexagonal_grid(territory, size=9)
+    assert len(grid) > 0
+    for h3_index, geometry in zip(grid["h3_index"], grid.geometry):
+        assert geometry.equals(shape(h3.cells_to_geo([h3_index])))
+
+
+@pytest.mark.asyncio
+async def test_estimate_potentials():
+    indicators_values = {
+        "Население": 3,
+        "Транспортное обеспечение": 4,
+        "Экологическая ситуация": 2,
+        "Социальное обеспечение": 5,
+        "Обеспечение инженерной инфраструктурой": 1
+    }
+    expected = {
+        profile_name: sum(
+            value >= profiles[profile_name]["Критерии"][key] for key, value in indicators_values.items()
+        ) for profile_name in profiles.keys()
+    }
+    hexes = gpd.GeoDataFrame([indicators_values, indicators_values])
+    estimated = await potential_estimator.estimate_potentials(hexes)
+    assert await potential_estimator.estimate_potentials_as_dict(indicators_values) == expected
+    assert await potential_estimator.estimate_potential(indicators_values) == list(expected.values())
+    assert estimated[list(profiles.keys())].iloc[1].to_dict() == expected
+
+
+def test_write_records(tmp_path):
+    batches = [[{"hexagon_id": 1, "value": None}, {"hexagon_id": 2, "value": None}], [], [{"hexagon_id": 3}]]
+    path = tmp_path / "records.json"
+    assert grid_generator_service.write_records(path, iter(batches)) == 3
+    assert path.read_text() == json.dumps([record for batch in batches for record in batch])
+    assert grid_generator_service.write_records(path, iter([])) == 0
+    assert json.loads(path.read_text()) == []
+
+
+def test_iter_indicators_payload():
+    df_to_put = pd.DataFrame(
+        {
+            "hexagon_id": [11, 12, 13, 14, 15, 16, 17],
+            "Население": [1.5, np.nan, 3.0, 4.0, np.nan, 6.0, 7.0],
+            "Экологическая ситуация": [np.nan, np.nan, 0.0, 2.5, 1.0, np.nan, 3.0],
+            "Социальное обеспечение": [5.0, 4.0, np.nan, 1.0, 2.0, 3.0, np.nan],
+        }
+    )
+    mapped_name_id = {"Население": 197, "Экологическая ситуация": 198, "Социальное обеспечение": 210}
+    extract_list, failed_list = [], []
+    for _, row in df_to_put.iterrows():
+        for column in mapped_name_id:
+            record = {
+                "indicator_id": int(mapped_name_id[column]),
+                "scenario_id": 5,
+                "territory_id": None,
+                "hexagon_id": int(row["hexagon_id"]),
+                "value": None,
+                "comment": "--",
+                "information_source": "hextech/grid_generator",
+                "properties": {}
+            }
+            if not pd.isna(row[column]):
+                extract_list.append(record | {"value": row[column]})
+            else:
+                failed_list.append(record)
+    for nulls, expected in ((False, extract_list), (True, failed_list)):
+        batches = list(grid_generator_service.iter_indicators_payload(df_to_put, mapped_name_id, 5, nulls, 7))
+        assert [len(batch) for batch in batches] == [
+            len([record for record in expected if record["hexagon_id"] in hexagons_ids])
+            for hexagons_ids in ((11, 12), (13, 14), (15, 16), (17,))
+        ]
+        assert [record for batch in batches for record in batch] == expected
+        assert all(type(record["value"]) is (type(None) if nulls else float) for batch in batches for record in batch)
+    assert list(grid_generator_service.iter_indicators_payload(df_to_put[["hexagon_id"]], {}, 5)) == []
+
+
+@pytest.mark.asyncio
+async def test_generate_grid_drops_h3_index(monkeypatch):
+    monkeypatch.setattr(params_validator, "extract_current_regions", AsyncMock(return_value=[1]))
+    monkeypatch.setattr(
+        generator_api_service, "get_territory_data", AsyncMock(return_value={"geometry": mapping(box(30, 59, 31, 60))})
+    )
+    grid = await grid_generator_service.generate_grid(1)
+    assert len(grid) > 0
+    assert list(grid.columns) == ["geometry"]
+
+
+@pytest.mark.asyncio
+async def test_bound_hexagons_indicators_version_after_deduplication(monkeypatch):
+    geometries = [box(30, 60, 30.01, 60.01), box(30.01, 60, 30.02, 60.01)]
+    bounded_hexagons = gpd.GeoDataFrame(
+        {"hexagon_id": [1, 2, 3], "properties": [{}, {}, {}]} | {name: [1.0, 2.0, 3.0] for name in indicators_names},
+        geometry=geometries + geometries[:1],
+        crs=4326,
+    )
+    deduplicated = bounded_hexagons.iloc[:2].copy()
+
+    async def get_hexes_for_objects_from_gdf(hexes, territory_id, objects_types):
+        return hexes.assign(**{object_type: 0.5 for object_type in objects_types})
+
+    save_rankings = AsyncMock()
+    monkeypatch.setattr(generator_api_service, "get_regional_base_scenario", AsyncMock(return_value=-30))
+    monkeypatch.setattr(generator_api_service, "get_hexes_from_db", AsyncMock(return_value=mapping(
+        gpd.GeoSeries(geometries, crs=4326)
+    )))
+    monkeypatch.setattr(generator_api_service, "extract_all_indicators", AsyncMock(return_value=[]))
+    monkeypatch.setattr(generator_api_service, "put_hexagon_data", AsyncMock())
+    monkeypatch.setattr(grid_generator_service, "calculate_grid_indicators", AsyncMock())
+    monkeypatch.setattr(grid_generator_service, "write_records", lambda path, batches: 0)
+    monkeypatch.setattr(potential_estimator, "estimate_potentials", AsyncMock(return_value=bounded_hexagons))
+    monkeypatch.setattr(prioc_service, "get_hexes_for_objects_from_gdf", get_hexes_for_objects_from_gdf)
+    monkeypatch.setattr(rankings_storage, "save_rankings", save_rankings)
+    await grid_generator_service.bound_hexagons_indicators(-30)
+    _, version, rankings = save_rankings.await_args.args
+    assert version == rankings_storage.indicators_version(deduplicated)
+    assert all(ranking["hexagon_id"].tolist() == [1, 2] for ranking in rankings.values())
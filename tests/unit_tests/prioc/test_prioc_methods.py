@@ -1,20 +1,42 @@
 import pytest
 import statistics
+from unittest.mock import AsyncMock
 
 from fastapi import HTTPException
-from shapely.geometry import shape
+from shapely import STRtree
+from shapely.geometry import box, shape
 import geopandas as gpd
+import h3
+import numpy as np
+import pandas as pd
 
 from app.common import urban_api_handler, config
-from app.prioc.services.hex_api_getter import hex_api_getter
+from app.common.h3_indexer import h3_indexer
+from app.prioc.services.hex_api_getter import hex_api_getter, indicators_names
+from app.prioc.services.hex_layer_parser import hex_layer_parser
+from app.prioc.services.rankings_storage import RankingsStorage, rankings_storage
 from app.prioc.services.hex_cleaner import hex_cleaner
 from app.prioc.services.hex_estimator import hex_estimator
 from app.prioc.services.territory_estimator import territory_estimator
 from app.prioc.services.prioc_service import prioc_service
+from app.prioc.services.constants.constants import INDICATORS_WEIGHTS, OBJECT_INDICATORS_MIN_VAL
 from app.prioc.dto import HexesDTO, TerritoryDTO
 from app.common.geometries import example_territory
 
 
+def h3_grid(k_ring: int = 4, with_h3_index: bool = True) -> gpd.GeoDataFrame:
+    cells = sorted(h3.grid_disk(h3.latlng_to_cell(60, 30, 8), k_ring))
+    values = np.random.default_rng(0).integers(0, 6, size=(len(cells), len(indicators_names)))
+    hexes = gpd.GeoDataFrame(
+        {"hexagon_id": range(len(cells))} | dict(zip(indicators_names, values.T)),
+        geometry=[shape(h3.cells_to_geo([cell])) for cell in cells],
+        crs=4326,
+    )
+    if with_h3_index:
+        hexes["h3_index"] = cells
+    return hexes
+
+
 @pytest.mark.asyncio
 async def test_get_hexes_with_indicators_by_territory():
     hexes = await hex_api_getter.get_hexes_with_indicators_by_territory(1)
@@ -207,3 +229,339 @@ async def test_get():
         url = "/api/v1/territory/geojson?territory_id=-1"
         await urban_api_handler.get(url, params={})
         assert http_e.value.status_code == 422
+
+def test_hex_layer_parser():
+    ring = [[30.0, 59.0], [30.1, 59.0], [30.1, 59.1], [30.0, 59.0]]
+    hole = [[30.02, 59.01], [30.05, 59.01], [30.05, 59.04], [30.02, 59.01]]
+    indicators = [{"name_full": name, "value": 1} for name in indicators_names]
+    features = [
+        {"geometry": {"type": "Polygon", "coordinates": [ring]}, "properties": {"hexagon_id": 1, "indicators": indicators}},
+        {"geometry": {"type": "Polygon", "coordinates": [ring, hole]}, "properties": {"hexagon_id": 2, "indicators": indicators}},
+        {"geometry": {"type": "Polygon", "coordinates": [ring]}, "properties": {"hexagon_id": 3, "indicators": indicators[1:]}},
+        {"geometry": None, "properties": {"hexagon_id": 4, "indicators": indicators}},
+        {"geometry": {"type": "Polygon", "coordinates": [ring]}, "properties": {"hexagon_id": 5, "indicators": [
+            {"name_full": name, "value": None} for name in indicators_names
+        ]}},
+    ]
+    hexes = hex_layer_parser.parse({"type": "FeatureCollection", "features": features}, indicators_names)
+    assert list(hexes.columns) == ["geometry", "hexagon_id"] + indicators_names
+    assert hexes["hexagon_id"].tolist() == [1, 2]
+    assert hexes.index.tolist() == [0, 1]
+    assert (hexes[indicators_names].dtypes == "int64").all()
+    assert hexes.geometry.equals(gpd.GeoSeries([shape(i["geometry"]) for i in features[:2]], crs=4326))
+
+@pytest.mark.asyncio
+async def test_rankings_storage(tmp_path):
+    hexes = gpd.GeoDataFrame({"hexagon_id": [1, 2, 3]} | {name: [1, 2, 3] for name in indicators_names})
+    storage = RankingsStorage(tmp_path, indicators_names)
+    version = storage.indicators_version(hexes)
+    assert version == storage.indicators_version(hexes.astype(float).iloc[::-1])
+    ranking = hexes[["hexagon_id"]].assign(weighted_sum=[0.5, 1.0, None])
+    await storage.save_rankings(1, version, {"Порт": ranking})
+    restored = await RankingsStorage(tmp_path, indicators_names).get_ranking(1, version, "Порт")
+    assert restored.to_dict() == {1: 0.5, 2: 1.0}
+    assert await storage.get_ranking(1, "outdated", "Порт") is None
+    assert list(tmp_path.glob("*")) == [tmp_path / "rankings_1.parquet"]
+    small_storage = RankingsStorage(tmp_path, indicators_names, memory_cache_size=70)
+    await small_storage.save_rankings(1, version, {"Тур база": ranking}, replace=False)
+    await small_storage.save_rankings(2, version, {"Порт": ranking})
+    assert small_storage._artifacts.stats()["entries"] == 1
+    restored = await small_storage.get_ranking(1, version, "Порт")
+    assert restored.to_dict() == {1: 0.5, 2: 1.0}
+    assert (await small_storage.get_ranking(1, version, "Тур база")).to_dict() == {1: 0.5, 2: 1.0}
+
+@pytest.mark.asyncio
+async def test_indexed_hexes_version_is_cached(monkeypatch):
+    hexes = gpd.GeoDataFrame(
+        {"hexagon_id": range(4)} | {name: [1, 2, 3, 4] for name in indicators_names},
+        geometry=[box(30 + i * 0.01, 60, 30.01 + i * 0.01, 60.01) for i in range(4)],
+        crs=4326,
+    )
+    load = AsyncMock(return_value=hexes)
+    monkeypatch.setattr(hex_api_getter, "_load_hexes_with_indicators", load)
+    try:
+        local_hexes, _, version = await hex_api_getter.get_indexed_hexes_by_territory(-10, projected=True)
+        assert version == hex_layer_parser.indicators_version(hexes, indicators_names)
+        assert local_hexes.crs.equals(hexes.estimate_utm_crs())
+        assert (await hex_api_getter.get_indexed_hexes_by_territory(-10, projected=True))[2] == version
+        assert (await hex_api_getter.get_indexed_hexes_by_territory(-10))[2] == version
+        assert load.await_count == 1
+    finally:
+        hex_api_getter.invalidate_scenario(-10)
+
+@pytest.mark.asyncio
+async def test_indexed_hexes_are_not_modified_by_callers(monkeypatch):
+    hexes = gpd.GeoDataFrame(
+        {"hexagon_id": range(4)} | {name: [1, 2, 3, 4] for name in indicators_names},
+        geometry=[box(30 + i * 0.01, 60, 30.01 + i * 0.01, 60.01) for i in range(4)],
+        crs=4326,
+    )
+    monkeypatch.setattr(hex_api_getter, "_load_hexes_with_indicators", AsyncMock(return_value=hexes))
+    try:
+        shared_hexes, _, _ = await hex_api_getter.get_indexed_hexes_by_territory(-11)
+        shared_hexes["weighted_sum"] = 1.0
+        shared_hexes.to_crs(3857, inplace=True)
+        with pytest.raises(ValueError):
+            shared_hexes.loc[0, indicators_names[0]] = 0
+        cached_hexes, _, _ = await hex_api_getter.get_indexed_hexes_by_territory(-11)
+        assert "weighted_sum" not in cached_hexes.columns
+        assert cached_hexes.crs.equals(4326)
+        assert cached_hexes[indicators_names[0]].tolist() == [1, 2, 3, 4]
+        copied_hexes = await hex_api_getter.get_hexes_with_indicators_by_territory(-11)
+        copied_hexes.loc[0, indicators_names[0]] = 0
+        assert copied_hexes[indicators_names[0]].iloc[0] == 0
+    finally:
+        hex_api_getter.invalidate_scenario(-11)
+
+@pytest.mark.asyncio
+async def test_get_hexes_for_object_bbox_and_limit(monkeypatch):
+    cells = [box(30 + i * 0.01, 60 + j * 0.01, 30.01 + i * 0.01, 60.01 + j * 0.01) for i in range(10) for j in range(10)]
+    hexes = gpd.GeoDataFrame(
+        {"hexagon_id": range(100)} | {name: [1] * 100 for name in indicators_names}, geometry=cells, crs=4326
+    ).to_crs(32636)
+    ranking = pd.Series([i / 100 for i in range(0, 100, 2)], index=range(0, 100, 2), name="weighted_sum")
+    monkeypatch.setattr(hex_api_getter, "get_regional_base_scenario", AsyncMock(return_value=1))
+    monkeypatch.setattr(
+        hex_api_getter,
+        "get_indexed_hexes_by_territory",
+        AsyncMock(return_value=(hexes, STRtree(hexes.geometry.values), "version")),
+    )
+    monkeypatch.setattr(rankings_storage, "get_ranking", AsyncMock(return_value=ranking))
+    bbox = "30.005,60.005,30.025,60.015"
+    result = await prioc_service.get_hexes_for_object(HexesDTO(territory_id=1, object_type="Порт", bbox=bbox))
+    expected = hexes.to_crs(4326).intersects(box(30.005, 60.005, 30.025, 60.015)) & hexes["hexagon_id"].isin(ranking.index)
+    assert result["hexagon_id"].tolist() == hexes.loc[expected, "hexagon_id"].tolist()
+    assert result["weighted_sum"].tolist() == (result["hexagon_id"] / 100).tolist()
+    limited = await prioc_service.get_hexes_for_object(HexesDTO(territory_id=1, object_type="Порт", bbox=bbox, limit=2))
+    assert limited["hexagon_id"].tolist() == result["hexagon_id"].tolist()[:2]
+    with pytest.raises(HTTPException) as e:
+        await prioc_service.get_hexes_for_object(HexesDTO(territory_id=1, object_type="Порт", bbox="31,60,30,61"))
+    assert e.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_get_hexes_for_object_top_k(monkeypatch):
+    scores = np.array([0.3, np.nan, 0.9, 0.1, 0.9, 0.5])
+    assert prioc_service.select_best(scores).tolist() == [0, 2, 3, 4, 5]
+    assert prioc_service.select_best(scores, top_k=3).tolist() == [2, 4, 5]
+    assert prioc_service.select_best(scores, top_k=10, min_score=0.3).tolist() == [2, 4, 5, 0]
+    hexes = gpd.GeoDataFrame(
+        {"hexagon_id": range(100), "h3_index": [f"cell_{i}" for i in range(100)]}
+        | {name: [1] * 100 for name in indicators_names},
+        geometry=[box(i, 0, i + 1, 1) for i in range(100)],
+        crs=32636,
+    )
+    ranking = pd.Series(np.random.default_rng(0).random(100), index=range(100), name="weighted_sum")
+    monkeypatch.setattr(hex_api_getter, "get_regional_base_scenario", AsyncMock(return_value=1))
+    monkeypatch.setattr(
+        hex_api_getter,
+        "get_indexed_hexes_by_territory",
+        AsyncMock(return_value=(hexes, STRtree(hexes.geometry.values), "version")),
+    )
+    monkeypatch.setattr(rankings_storage, "get_ranking", AsyncMock(return_value=ranking))
+    result = await prioc_service.get_hexes_for_object(HexesDTO(territory_id=1, object_type="Порт", top_k=5))
+    assert result["weighted_sum"].tolist() == ranking.nlargest(5).tolist()
+    assert result.geometry.equals(hexes.set_index("hexagon_id").geometry.loc[ranking.nlargest(5).index].set_axis(result.index))
+    assert "h3_index" not in result.columns
+    result = await prioc_service.get_hexes_for_object(HexesDTO(territory_id=1, object_type="Порт", min_score=0.9))
+    assert result["hexagon_id"].tolist() == ranking.index[ranking >= 0.9].tolist()
+    result = await prioc_service.get_hexes_for_object(HexesDTO(territory_id=1, object_type="Порт"), with_h3_index=True)
+    assert result["h3_index"].tolist() == hexes["h3_index"].tolist()
+
+@pytest.mark.asyncio
+async def test_get_hex_clusters_for_object_bbox(monkeypatch):
+    hexes = gpd.GeoDataFrame(
+        {"hexagon_id": range(100)} | {name: [1] * 100 for name in indicators_names},
+        geometry=[box(30 + i * 0.01, 60, 30.01 + i * 0.01, 60.01) for i in range(100)],
+        crs=4326,
+    ).to_crs(32636)
+    ranking = pd.Series(np.linspace(0, 1, 100), index=range(100), name="weighted_sum")
+    clusters = gpd.GeoDataFrame(
+        {"weighted_sum": [0.1, 0.5, 0.9], "cluster": [0, 1, 2]},
+        geometry=[box(30, 60, 30.3, 60.01), box(30.3, 60, 30.6, 60.01), box(30.6, 60, 31, 60.01)],
+        crs=4326,
+    )
+    cluster_hexes = AsyncMock(return_value=clusters)
+    monkeypatch.setattr(hex_api_getter, "get_regional_base_scenario", AsyncMock(return_value=1))
+    monkeypatch.setattr(
+        hex_api_getter,
+        "get_indexed_hexes_by_territory",
+        AsyncMock(return_value=(hexes, STRtree(hexes.geometry.values), "clusters_version")),
+    )
+    monkeypatch.setattr(rankings_storage, "get_ranking", AsyncMock(return_value=ranking))
+    monkeypatch.setattr(hex_estimator, "cluster_hexes", cluster_hexes)
+    result = await prioc_service.get_hex_clusters_for_object(
+        HexesDTO(territory_id=1, object_type="Порт", bbox="30.1,59.9,30.2,60.1")
+    )
+    assert result["cluster"].tolist() == [0]
+    assert len(cluster_hexes.await_args.args[0]) == 100
+    result = await prioc_service.get_hex_clusters_for_object(
+        HexesDTO(territory_id=1, object_type="Порт", bbox="30.25,59.9,30.7,60.1", limit=2)
+    )
+    assert result["cluster"].tolist() == [0, 1]
+    result = await prioc_service.get_hex_clusters_for_object(
+        HexesDTO(territory_id=1, object_type="Порт", top_k=1)
+    )
+    assert result["cluster"].tolist() == [2]
+    assert cluster_hexes.await_count == 1
+
+@pytest.mark.asyncio
+async def test_weight_hexes_h3_grid():
+    hexes = h3_grid().drop(columns=indicators_names[-1])
+    expected = {}
+    for object_name, ranks in INDICATORS_WEIGHTS.items():
+        denominator = sum(len(ranks) - rank + 1 for rank in ranks.values())
+        expected[object_name] = sum(
+            hexes[indicator] * (len(ranks) - rank + 1) / denominator
+            for indicator, rank in ranks.items()
+            if indicator in hexes.columns
+        )
+    estimations = await hex_estimator.weight_hexes_for_objects(hexes)
+    assert estimations.columns.tolist() == list(INDICATORS_WEIGHTS)
+    for object_name, object_expected in expected.items():
+        weighted_hexes = await hex_estimator.weight_hexes(hexes.copy(), object_name)
+        assert np.allclose(weighted_hexes["weighted_sum"], object_expected)
+        assert np.allclose(estimations[object_name], object_expected)
+    estimations = await hex_estimator.weight_hexes_for_objects(hexes, ["Порт", "Тур база"])
+    assert estimations.columns.tolist() == ["Порт", "Тур база"]
+    assert estimations.index.equals(hexes.index)
+
+def test_min_object_val_mask_h3_grid():
+    hexes = h3_grid().astype({name: np.float64 for name in indicators_names})
+    hexes.loc[hexes.index[::7], "Население"] = np.nan
+    hexes.loc[hexes.index[::5], "Транспортное обеспечение"] = np.nan
+    for object_name, min_map in OBJECT_INDICATORS_MIN_VAL.items():
+        expected = [
+            not any(row[indicator] < min_value for indicator, min_value in min_map.items())
+            for _, row in hexes.iterrows()
+        ]
+        mask = hex_cleaner.min_object_val_mask(hexes, object_name)
+        assert mask.tolist() == expected
+        assert hex_cleaner.clean_by_min_object_val(hexes, object_name).index.equals(hexes.index[mask])
+    nan_hexes = hexes[hexes[indicators_names].isna().any(axis=1)]
+    port_mask = hex_cleaner.min_object_val_mask(nan_hexes, "Порт")
+    assert port_mask.tolist() == (
+        nan_hexes[indicators_names].fillna(np.inf) >= pd.Series(OBJECT_INDICATORS_MIN_VAL["Порт"])
+    ).all(axis=1).tolist()
+
+def test_negative_mask_h3_grid():
+    hexes = h3_grid().to_crs(32636)
+    services = gpd.GeoDataFrame(
+        geometry=hexes.geometry.iloc[[0, 30, 31]].representative_point().to_list(), crs=hexes.crs
+    )
+    for k_ring in (0, 1, 2):
+        mask = hex_cleaner.negative_mask(hexes, services, k_ring)
+        assert mask.tolist() == hex_cleaner.negative_geometry_mask(hexes, services, k_ring).tolist()
+        assert mask.tolist() == hex_cleaner.negative_mask(hexes.drop(columns="h3_index"), services, k_ring).tolist()
+        excluded = set().union(*[h3.grid_disk(cell, k_ring) for cell in hexes["h3_index"].iloc[[0, 30, 31]]])
+        assert mask.tolist() == (~hexes["h3_index"].isin(excluded)).tolist()
+    assert hex_cleaner.negative_mask(hexes, services.iloc[:0]).all()
+
+def clustered_h3_grid() -> gpd.GeoDataFrame:
+    hexes = h3_grid().to_crs(32636)
+    center = h3.latlng_to_cell(60, 30, 8)
+    ring = h3.grid_ring(center, 3)
+    clusters = {cell: 0 for cell in h3.grid_disk(center, 1)} | {h3.grid_ring(center, 4)[0]: 0}
+    clusters |= {cell: 1 for cell in ring[:10] + ring[12:16]}
+    hexes["cluster"] = hexes["h3_index"].map(clusters).fillna(-1).astype(int)
+    hexes["X"] = hexes.centroid.x
+    hexes["Y"] = hexes.centroid.y
+    hexes["weighted_sum"] = np.linspace(0, 1, len(hexes))
+    return hexes
+
+
+def test_largest_components_mask_h3_grid(monkeypatch):
+    hexes = clustered_h3_grid()
+    left, right = hex_estimator._adjacency_pairs(hexes)
+    touches_left, touches_right = hexes.sindex.query(hexes.geometry, predicate="touches")
+    assert sorted(zip(left, right)) == sorted(zip(touches_left, touches_right))
+    expected = np.zeros(len(hexes), dtype=bool)
+    for cluster in hexes["cluster"].unique():
+        positions = set(np.flatnonzero(hexes["cluster"].to_numpy() == cluster))
+        components = []
+        while positions:
+            component, queue = set(), [positions.pop()]
+            while queue:
+                position = queue.pop()
+                component.add(position)
+                neighbours = set(touches_right[touches_left == position]) & positions
+                positions -= neighbours
+                queue.extend(neighbours)
+            components.append(component)
+        largest = max(components, key=len)
+        if len(largest) > 1:
+            expected[list(largest)] = True
+    mask = hex_estimator._largest_components_mask(hexes)
+    assert mask.tolist() == expected.tolist()
+    assert hexes["h3_index"][mask & (hexes["cluster"] == 0).to_numpy()].tolist() == sorted(
+        h3.grid_disk(h3.latlng_to_cell(60, 30, 8), 1)
+    )
+    assert (mask & (hexes["cluster"] == 1).to_numpy()).sum() == 10
+    monkeypatch.setattr(h3_indexer, "layer_cells", lambda hexagons: None)
+    assert hex_estimator._largest_components_mask(hexes).tolist() == expected.tolist()
+
+@pytest.mark.asyncio
+async def test_dissolve_clusters_h3_grid():
+    hexes = clustered_h3_grid()
+    grouped = hexes[hex_estimator._largest_components_mask(hexes)].copy()
+    dissolved = hex_estimator._dissolve_clusters(grouped)
+    expected = grouped.drop(columns="h3_index").dissolve(by=["cluster"], aggfunc="mean")
+    assert dissolved.crs.equals(grouped.crs)
+    assert dissolved.index.tolist() == expected.index.tolist()
+    assert np.allclose(dissolved[expected.columns.drop("geometry")], expected.drop(columns="geometry"))
+    assert (dissolved.geometry.symmetric_difference(expected.geometry).area < expected.area * 1e-6).all()
+    assert (dissolved.geom_type == "Polygon").all()
+    clarified = await hex_estimator.clarify_clusters(hexes)
+    assert sorted(clarified["cluster"].tolist()) == [-1, 0, 1]
+    assert "h3_index" not in clarified.columns
+
+@pytest.mark.asyncio
+async def test_get_hexes_for_objects_from_gdf_h3_grid(monkeypatch):
+    hexes = h3_grid()
+    centroids = hexes.geometry.representative_point()
+    water = gpd.GeoDataFrame(geometry=[hexes.geometry.iloc[:30].union_all()], crs=4326)
+    services = gpd.GeoDataFrame(
+        {"service_type_id": [35, 27, 112, 143]}, geometry=centroids.iloc[[0, 20, 40, 60]].to_list(), crs=4326
+    )
+
+    async def get_negative_services(territory_id, service_type_ids):
+        return services[services["service_type_id"].isin(service_type_ids)].copy()
+
+    negative_services = AsyncMock(side_effect=get_negative_services)
+    positive_services = AsyncMock(side_effect=lambda *args, **kwargs: water.copy())
+    monkeypatch.setattr(hex_api_getter, "get_negative_service_by_territory_id", negative_services)
+    monkeypatch.setattr(hex_api_getter, "get_positive_service_by_territory_id", positive_services)
+    objects_types = list(INDICATORS_WEIGHTS)
+    estimated_hexes = await prioc_service.get_hexes_for_objects_from_gdf(hexes.copy(), 1, objects_types)
+    assert negative_services.await_count == 1
+    assert positive_services.await_count == 1
+    assert estimated_hexes.crs.equals(hexes.estimate_utm_crs())
+    for object_type in objects_types:
+        object_hexes = await prioc_service.get_hexes_for_object_from_gdf(hexes.copy(), 1, object_type)
+        object_estimation = estimated_hexes[object_type].dropna()
+        assert object_estimation.index.equals(object_hexes.index)
+        assert np.allclose(object_estimation, object_hexes["weighted_sum"])
+    assert estimated_hexes["Порт"].notna().sum() < len(hexes)
+    assert estimated_hexes["Тур база"].iloc[[40, 60]].isna().all()
+    assert estimated_hexes[["Порт", "Тур база"]].notna().any().all()
+
+@pytest.mark.asyncio
+async def test_get_object_tile_source_is_versioned(monkeypatch):
+    hexes = h3_grid().drop(columns="h3_index").assign(weighted_sum=1.0)
+    versions = iter(["first", "first", "second"])
+    get_hexes_for_object = AsyncMock(return_value=hexes)
+    monkeypatch.setattr(hex_api_getter, "get_regional_base_scenario", AsyncMock(return_value=-20))
+    monkeypatch.setattr(
+        hex_api_getter,
+        "get_indexed_hexes_by_territory",
+        AsyncMock(side_effect=lambda *args, **kwargs: (hexes, None, next(versions))),
+    )
+    monkeypatch.setattr(prioc_service, "get_hexes_for_object", get_hexes_for_object)
+    hex_params = HexesDTO(territory_id=-20, object_type="Порт")
+    try:
+        first_tile = await prioc_service.get_object_tile(hex_params, 12, 2389, 1189)
+        assert await prioc_service.get_object_tile(hex_params, 12, 2389, 1189) is first_tile
+        assert get_hexes_for_object.await_count == 1
+        await prioc_service.get_object_tile(hex_params, 12, 2389, 1189)
+        assert get_hexes_for_object.await_count == 2
+    finally:
+        prioc_service.invalidate_tiles(-20)